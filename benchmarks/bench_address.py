@@ -0,0 +1,47 @@
+"""Address parsing overhead per retrieve, before and after the fast path.
+
+Run with: python benchmarks/bench_address.py
+"""
+
+import re
+import time
+from collections.abc import Callable
+from urllib.parse import parse_qsl, urlparse
+
+from kstash import Config
+from kstash.backend import get_backend_from_address
+
+ROUNDS = 100_000
+ADDRESS = "s3://bench/context.28a5e15a666b0cd1415490dcf6674255"
+CONFIG = Config(backends=["s3"])
+
+
+def legacy_parse(address: str) -> str:
+    # Before: scheme dispatch, address parse and path regex each parsed anew.
+    urlparse(address).scheme
+    parsed = urlparse(address)
+    parse_qsl(parsed.query)
+    match = re.match(r"(?P<name>.*)\.(?P<md5>[a-f0-9]{32})$", parsed.path)
+    assert match
+    return match.groupdict()["name"].strip("/")
+
+
+def fast_parse(address: str) -> str:
+    backend = get_backend_from_address(address, CONFIG)
+    return backend.parse_address(address).name
+
+
+def measure(fn: Callable[[str], str]) -> float:
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        fn(ADDRESS)
+    return (time.perf_counter() - start) / ROUNDS * 1_000_000
+
+
+def main() -> None:
+    print(f"{'legacy parse':<16} {measure(legacy_parse):8.3f}us/retrieve")
+    print(f"{'fast parse':<16} {measure(fast_parse):8.3f}us/retrieve")
+
+
+if __name__ == "__main__":
+    main()
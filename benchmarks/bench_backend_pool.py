@@ -0,0 +1,65 @@
+"""Per-call create/retrieve latency with fresh vs pooled S3 backends.
+
+Run with: python benchmarks/bench_backend_pool.py
+"""
+
+import statistics
+import time
+from collections.abc import Callable
+
+import boto3
+from moto import mock_aws
+
+from kstash import Config, create, retrieve
+from kstash.backend import S3Backend
+
+ROUNDS = 200
+PAYLOAD = {"as_of": "today", "bin": b"0" * 1024}
+
+
+def measure(fn: Callable[[int], object]) -> list[float]:
+    timings: list[float] = []
+    for i in range(ROUNDS):
+        start = time.perf_counter()
+        fn(i)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def report(label: str, timings: list[float]) -> None:
+    median = statistics.median(timings) * 1000
+    p95 = statistics.quantiles(timings, n=20)[-1] * 1000
+    print(f"{label:<26} median={median:8.3f}ms p95={p95:8.3f}ms")
+
+
+def main() -> None:
+    with mock_aws():
+        boto3.client("s3", region_name="us-east-1").create_bucket(Bucket="bench")
+        config = Config(backends=["s3"])
+
+        # Before: every call built its own backend (and boto3 session/client).
+        def fresh_create(i: int) -> object:
+            return S3Backend(config=config).save_stash(f"f{i}", PAYLOAD, "bench")
+
+        address = str(
+            create("shared", PAYLOAD, namespace="bench", config=config).address
+        )
+
+        def fresh_retrieve(i: int) -> object:
+            return S3Backend(config=config).load_stash(address)
+
+        # After: the api reuses one pooled backend per config.
+        def pooled_create(i: int) -> object:
+            return create(f"p{i}", PAYLOAD, namespace="bench", config=config)
+
+        def pooled_retrieve(i: int) -> object:
+            return retrieve(address, config=config)
+
+        report("create (fresh backend)", measure(fresh_create))
+        report("create (pooled backend)", measure(pooled_create))
+        report("retrieve (fresh backend)", measure(fresh_retrieve))
+        report("retrieve (pooled backend)", measure(pooled_retrieve))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+"""Content hash throughput per algorithm and payload size.
+
+Run with: python benchmarks/bench_hash.py
+"""
+
+import os
+import time
+
+from kstash.digest import HASH_ALGORITHMS, hash_digest
+
+SIZES = [64, 1024, 64 * 1024, 1024 * 1024, 16 * 1024 * 1024]
+MIN_BYTES = 256 * 1024 * 1024  # hashed per measurement, to smooth out noise
+
+
+def measure(algorithm: str, payload: bytes) -> float:
+    rounds = max(MIN_BYTES // len(payload), 1)
+    start = time.perf_counter()
+    for _ in range(rounds):
+        hash_digest(algorithm, payload)
+    elapsed = time.perf_counter() - start
+    return rounds * len(payload) / elapsed / (1024 * 1024)
+
+
+def main() -> None:
+    for size in SIZES:
+        payload = os.urandom(size)
+        for algorithm in HASH_ALGORITHMS:
+            throughput = measure(algorithm, payload)
+            print(f"{size:>10}B {algorithm:<8} {throughput:10.1f} MiB/s")
+
+
+if __name__ == "__main__":
+    main()
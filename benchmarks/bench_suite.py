@@ -0,0 +1,251 @@
+"""Create/retrieve throughput, latency and peak memory per backend and payload.
+
+S3 runs against a local moto server, in its own process, over TLS so that the
+https backend can retrieve the share links it presigns.
+
+Run with: python benchmarks/bench_suite.py --output results.json
+Compare with: python benchmarks/bench_suite.py --compare results.json
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections.abc import Callable, Iterator
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+
+from kstash import Config, create, retrieve
+from kstash.stash import ArgData
+
+BACKENDS = ["inline", "mem", "s3", "https"]
+SIZES = [10, 1024, 100 * 1024, 1024 * 1024, 10 * 1024 * 1024, 100 * 1024 * 1024]
+KINDS = ["json", "binary"]
+MAX_INLINE_SIZE = 64 * 1024
+ROUND_BYTES = 256 * 1024 * 1024  # upper bound of bytes moved per measurement
+BUCKET = "bench"
+
+
+@dataclass(frozen=True)
+class Result:
+    backend: str
+    op: str
+    kind: str
+    size: int
+    rounds: int
+    ops_per_sec: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    peak_mem_bytes: int
+
+
+def make_payload(kind: str, size: int) -> ArgData:
+    if kind == "binary":
+        return os.urandom(size)
+    # Records of ~32 encoded bytes each, so the encoded size tracks `size`.
+    return {
+        "rows": [{"id": i, "name": f"r{i:08}", "v": i / 3} for i in range(size // 32)]
+    }
+
+
+def make_config(backend: str) -> Config:
+    if backend == "inline":
+        return Config(backends=["inline"], max_inline_len=2 * MAX_INLINE_SIZE)
+    if backend == "https":
+        return Config(backends=["s3", "https"])
+    return Config(backends=[backend])
+
+
+def percentile(timings: list[float], pct: int) -> float:
+    if len(timings) < 2:
+        return timings[0] * 1000
+    return statistics.quantiles(timings, n=100, method="inclusive")[pct - 1] * 1000
+
+
+def measure(
+    backend: str,
+    op: str,
+    kind: str,
+    size: int,
+    rounds: int,
+    fn: Callable[[int], object],
+) -> Result:
+    fn(-1)  # warm up pools and connections
+    timings: list[float] = []
+    for i in range(rounds):
+        start = time.perf_counter()
+        fn(i)
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    fn(rounds)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return Result(
+        backend=backend,
+        op=op,
+        kind=kind,
+        size=size,
+        rounds=rounds,
+        ops_per_sec=len(timings) / sum(timings),
+        p50_ms=percentile(timings, 50),
+        p95_ms=percentile(timings, 95),
+        p99_ms=percentile(timings, 99),
+        peak_mem_bytes=peak,
+    )
+
+
+def run_case(backend: str, kind: str, size: int, max_rounds: int) -> list[Result]:
+    config = make_config(backend)
+    data = make_payload(kind, size)
+    rounds = max(3, min(max_rounds, ROUND_BYTES // size))
+    results: list[Result] = []
+
+    def create_op(i: int) -> object:
+        # Distinct names, so content-addressed backends never skip the write.
+        return create(f"bench-{i}", data, namespace=BUCKET, config=config)
+
+    stash = create_op(-1)
+    address = stash.share(ttl_sec=3600) if backend == "https" else stash.address
+
+    def retrieve_op(i: int) -> object:
+        return retrieve(address, config=config).data
+
+    if backend != "https":  # https stashes are created through s3
+        results.append(measure(backend, "create", kind, size, rounds, create_op))
+    results.append(measure(backend, "retrieve", kind, size, rounds, retrieve_op))
+    return results
+
+
+@contextlib.contextmanager
+def moto_server() -> Iterator[None]:
+    from werkzeug.serving import make_ssl_devcert
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cert, key = make_ssl_devcert(os.path.join(tmp, "dev"), host="localhost")
+        with socket.socket() as sock:
+            sock.bind(("localhost", 0))
+            port = sock.getsockname()[1]
+        server = subprocess.Popen(
+            [sys.executable, "-m", "moto.server", "-H", "localhost", "-p", str(port)]
+            + ["-c", cert, "-k", key],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        try:
+            wait_for_port(port)
+            os.environ.update(
+                AWS_ENDPOINT_URL_S3=f"https://localhost:{port}",
+                AWS_CA_BUNDLE=cert,
+                REQUESTS_CA_BUNDLE=cert,
+                AWS_ACCESS_KEY_ID="bench",
+                AWS_SECRET_ACCESS_KEY="bench",
+                AWS_DEFAULT_REGION="us-east-1",
+            )
+            import boto3
+
+            boto3.client("s3").create_bucket(Bucket=BUCKET)
+            yield
+        finally:
+            server.terminate()
+            server.wait()
+
+
+def wait_for_port(port: int, timeout_sec: float = 30) -> None:
+    deadline = time.monotonic() + timeout_sec
+    while time.monotonic() < deadline:
+        with contextlib.suppress(OSError):
+            socket.create_connection(("localhost", port), timeout=1).close()
+            return
+        time.sleep(0.1)
+    raise TimeoutError(f"moto server did not start on port {port}")
+
+
+def git_commit() -> str | None:
+    with contextlib.suppress(OSError, subprocess.CalledProcessError):
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            text=True,
+            stderr=subprocess.DEVNULL,
+        ).strip()
+    return None
+
+
+def report(results: list[Result], baseline: dict[tuple[str, ...], float]) -> None:
+    for r in results:
+        line = (
+            f"{r.backend:<7} {r.op:<8} {r.kind:<6} {r.size:>10}B "
+            f"{r.ops_per_sec:10.1f} ops/s p50={r.p50_ms:9.3f}ms "
+            f"p95={r.p95_ms:9.3f}ms p99={r.p99_ms:9.3f}ms "
+            f"peak={r.peak_mem_bytes / 1024 / 1024:8.2f}MiB"
+        )
+        if (before := baseline.get(result_key(r))) is not None:
+            line += f" ({r.ops_per_sec / before:5.2f}x)"
+        print(line, flush=True)
+
+
+def result_key(result: Result) -> tuple[str, ...]:
+    return (result.backend, result.op, result.kind, str(result.size))
+
+
+def load_baseline(path: str | None) -> dict[tuple[str, ...], float]:
+    if not path:
+        return {}
+    with open(path) as file:
+        results = [Result(**r) for r in json.load(file)["results"]]
+    return {result_key(r): r.ops_per_sec for r in results}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backends", default=",".join(BACKENDS))
+    parser.add_argument("--sizes", default=",".join(map(str, SIZES)))
+    parser.add_argument("--kinds", default=",".join(KINDS))
+    parser.add_argument("--rounds", type=int, default=200, help="max rounds per case")
+    parser.add_argument("--output", help="write results as JSON to this path")
+    parser.add_argument("--compare", help="JSON results of a previous run")
+    args = parser.parse_args()
+
+    backends = args.backends.split(",")
+    baseline = load_baseline(args.compare)
+    results: list[Result] = []
+    remote = {"s3", "https"} & set(backends)
+    with moto_server() if remote else contextlib.nullcontext():
+        for backend in backends:
+            for kind in args.kinds.split(","):
+                for size in map(int, args.sizes.split(",")):
+                    if backend == "inline" and size > MAX_INLINE_SIZE:
+                        continue
+                    case = run_case(backend, kind, size, args.rounds)
+                    report(case, baseline)
+                    results.extend(case)
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(
+                {
+                    "meta": {
+                        "commit": git_commit(),
+                        "python": platform.python_version(),
+                        "platform": platform.platform(),
+                        "timestamp": datetime.now(timezone.utc).isoformat(),
+                    },
+                    "results": [asdict(r) for r in results],
+                },
+                file,
+                indent=2,
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,29 @@
-from .api import create, retrieve
-from .config import Config
+from .api import (
+    acreate,
+    aretrieve,
+    create,
+    create_many,
+    flush,
+    flushing,
+    open,
+    prefetch,
+    retrieve,
+    retrieve_many,
+)
+from .config import Config, ReadPolicy, Route
 
-__all__ = ["create", "retrieve", "Config"]
+__all__ = [
+    "acreate",
+    "aretrieve",
+    "create",
+    "create_many",
+    "flush",
+    "flushing",
+    "open",
+    "prefetch",
+    "retrieve",
+    "retrieve_many",
+    "Config",
+    "ReadPolicy",
+    "Route",
+]
@@ -1,29 +1,44 @@
+import functools
 from dataclasses import dataclass, field
-from typing import TYPE_CHECKING
-from urllib.parse import ParseResult, parse_qsl, urlencode, urlparse
+from typing import TYPE_CHECKING, Self
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+from .digest import parse_digest_path
 
 if TYPE_CHECKING:
     from .stash import Stash
 
+ADDRESS_CACHE_SIZE = 4096
+
 
 @dataclass(frozen=True, kw_only=True)
 class Address:
     scheme: str
     location: str
     path: str
-    extra: list[tuple[str, str]] = field(default_factory=lambda: [])
+    extra: tuple[tuple[str, str], ...] = ()
+    # Parsed from `path` on construction, see `_parse_path`.
+    name: str = field(init=False, repr=False, compare=False)
+    digest: str | None = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        name, digest = self._parse_path(self.path)
+        object.__setattr__(self, "name", name)
+        object.__setattr__(self, "digest", digest)
+
+    def _parse_path(self, path: str) -> tuple[str, str | None]:
+        return path.strip("/"), None
+
+    @classmethod
+    def from_string(cls, address: str) -> Self:
+        return _parse_address(cls, address)
 
     @classmethod
-    def from_string(cls, address: str) -> "Address":
-        parsed: ParseResult = urlparse(address)
-        if parsed.scheme != cls.scheme:
-            raise ValueError(f"invalid {cls.scheme} address: {address}")
-        return cls(
-            scheme=parsed.scheme,
-            location=parsed.netloc,
-            path=parsed.path,
-            extra=parse_qsl(parsed.query),
-        )
+    def parse(cls, address: "Address | str") -> Self:
+        """Returns `address` as is when already parsed, or parses it otherwise."""
+        if isinstance(address, cls):
+            return address
+        return cls.from_string(str(address))
 
     @classmethod
     def from_stash(cls, stash: "Stash") -> "Address":
@@ -37,7 +52,30 @@ class Address:
         return url
 
 
+@dataclass(frozen=True, kw_only=True)
+class DigestAddress(Address):
+    """Address whose path names a stash by its content digest: `name.<digest>`."""
+
+    def _parse_path(self, path: str) -> tuple[str, str | None]:
+        return parse_digest_path(path)
+
+
+# Addresses are immutable, so repeated retrievals of one address share a parse.
+@functools.lru_cache(maxsize=ADDRESS_CACHE_SIZE)
+def _parse_address[T: Address](cls: type[T], address: str) -> T:
+    parsed = urlsplit(address)
+    if parsed.scheme != cls.scheme:
+        raise ValueError(f"invalid {cls.scheme} address: {address}")
+    return cls(
+        scheme=parsed.scheme,
+        location=parsed.netloc,
+        path=parsed.path,
+        extra=tuple(parse_qsl(parsed.query)),
+    )
+
+
 def parse_address_scheme(address: Address | str) -> str:
     if isinstance(address, Address):
         return address.scheme
-    return urlparse(address).scheme
+    scheme, sep, _ = address.partition("://")
+    return scheme if sep else ""
@@ -1,30 +1,365 @@
+import asyncio
+import contextlib
+import functools
+import time
+from collections.abc import Callable, Generator, Iterable
+from concurrent.futures import Future, ThreadPoolExecutor
+from io import BufferedReader
 from typing import Optional
 
 from .address import Address
-from .backend import get_backend_from_address, get_backends_from_config
+from .backend import (
+    Backend,
+    BackendPool,
+    get_backend_from_address,
+    get_backend_pool,
+    get_backends_from_config,
+)
 from .config import CONFIG, Config
 from .exceptions import UnsupportedBackend, UnsupportedOperation
-from .stash import ArgData, SealedStash
+from .observe import notify
+from .stash import ArgData, Buffer, SealedStash, Stash
+from .stream import StreamData, is_stream, open_payload, read_stream
 
 
 def create(
     name: str,
-    data: Optional[ArgData],
+    data: Optional[ArgData] | StreamData,
     namespace: str = "default",
     config: Config = CONFIG,
 ) -> SealedStash:
+    if config.routes and not is_stream(data):
+        return _create_routed(name, data, namespace, config)
+
+    stash = None
     for backend in get_backends_from_config(config):
+        if is_stream(data) and backend.buffers_streams:
+            # Read once, so backends tried next never get a consumed stream.
+            data = read_stream(data)
+        start = time.perf_counter()
         try:
-            return backend.save_stash(name, data, namespace)
+            if is_stream(data):
+                sealed = backend.save_stream(name, data, namespace)
+            else:
+                # Encoded and hashed once, however many backends are tried.
+                if stash is None:
+                    stash = _new_stash(name, data, namespace, config)
+                sealed = backend.seal_stash(stash)
         except UnsupportedOperation:
+            _notify_skip(config, backend, start)
             continue
+        return _notify_save(config, sealed, start)
+    raise UnsupportedBackend("no backend supports this operation")
+
+
+def _new_stash(
+    name: str,
+    data: Optional[ArgData],
+    namespace: str,
+    config: Config,
+) -> Stash:
+    return Stash(
+        name=name,
+        namespace=namespace,
+        data=data,
+        hash_algorithm=config.hash_algorithm,
+        observers=config.observers,
+    )
+
+
+def _create_routed(
+    name: str,
+    data: Optional[ArgData],
+    namespace: str,
+    config: Config,
+) -> SealedStash:
+    # Encoded once, then sent straight to the backend routed for its size.
+    stash = _new_stash(name, data, namespace, config)
+    pool = get_backend_pool(config)
+    for backend_name in _select_routes(config, len(stash.encoded)):
+        backend = pool.get(backend_name)
+        start = time.perf_counter()
+        try:
+            sealed = backend.seal_stash(stash)
+        except UnsupportedOperation:
+            _notify_skip(config, backend, start)
+            continue  # e.g. compression settings differ from the route bounds
+        return _notify_save(config, sealed, start)
     raise UnsupportedBackend("no backend supports this operation")
 
 
+def _notify_skip(config: Config, backend: Backend, start: float) -> None:
+    if config.observers:
+        notify(config.observers, "backend.skip", start, backend=backend.name)
+
+
+def _notify_save(config: Config, stash: SealedStash, start: float) -> SealedStash:
+    if config.observers:
+        notify(
+            config.observers, "backend.save", start, _nbytes(stash), stash.backend.name
+        )
+    return stash
+
+
+def _load(backend: Backend, address: Address | str) -> SealedStash:
+    start = time.perf_counter()
+    return _notify_load(backend, backend.load_stash(address), start)
+
+
+def _notify_load(backend: Backend, stash: SealedStash, start: float) -> SealedStash:
+    if backend.config.observers:
+        notify(
+            backend.config.observers,
+            "backend.load",
+            start,
+            _nbytes(stash),
+            backend.name,
+        )
+    return stash
+
+
+def _nbytes(stash: Stash | None) -> int:
+    # Payloads not in memory yet (see Stash.from_digest) are not loaded for this.
+    if stash is None or "encoded" not in stash.__dict__:
+        return 0
+    return len(stash.encoded)
+
+
+def _select_routes(config: Config, encoded_len: int) -> list[str]:
+    """Backends routed for `encoded_len` bytes, the best fit first.
+
+    Larger tiers also accept smaller stashes, so they follow as fallbacks.
+    """
+    for index, route in enumerate(config.routes):
+        if route.max_len is None or encoded_len <= route.max_len:
+            return [route.backend for route in config.routes[index:]]
+    return []
+
+
 def retrieve(
     address: Address | str,
     config: Config = CONFIG,
 ) -> SealedStash:
     backend = get_backend_from_address(address, config)
-    stash = backend.load_stash(address)
-    return stash
+    if not backend.cacheable:
+        return _load(backend, address)
+    return _retrieve_cached(backend, address, get_backend_pool(config))
+
+
+def prefetch(
+    addresses: Iterable[Address | str],
+    config: Config = CONFIG,
+) -> None:
+    """Starts loading stashes in the background, ahead of their `retrieve`.
+
+    Only remote loads are prefetched, see `Backend.cacheable`, and addresses no
+    backend can load are skipped. A `retrieve` of an address still in flight
+    waits for it instead of loading it again.
+    """
+    pool = get_backend_pool(config)
+    for address in addresses:
+        try:
+            backend = get_backend_from_address(address, config)
+            if not backend.cacheable:
+                continue
+            address = backend.parse_address(address)
+        except (UnsupportedBackend, ValueError):
+            continue  # reported by the retrieve of the address, if any
+        key = str(address)
+        if pool.cache is not None and key in pool.cache:
+            continue
+        load = functools.partial(_fetch, backend, address, pool)
+        pool.prefetcher.submit(key, load)
+
+
+async def acreate(
+    name: str,
+    data: Optional[ArgData],
+    namespace: str = "default",
+    config: Config = CONFIG,
+) -> SealedStash:
+    if config.routes:
+        # Encoding happens before routing, so keep it off the event loop.
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            get_backend_pool(config).executor,
+            _create_routed,
+            name,
+            data,
+            namespace,
+            config,
+        )
+
+    # Encoded and hashed once, off the event loop, however many backends are tried.
+    loop = asyncio.get_running_loop()
+    stash = await loop.run_in_executor(
+        get_backend_pool(config).executor,
+        _new_stash,
+        name,
+        data,
+        namespace,
+        config,
+    )
+    for backend in get_backends_from_config(config):
+        start = time.perf_counter()
+        try:
+            sealed = await backend.aseal_stash(stash)
+        except UnsupportedOperation:
+            _notify_skip(config, backend, start)
+            continue
+        return _notify_save(config, sealed, start)
+    raise UnsupportedBackend("no backend supports this operation")
+
+
+async def aretrieve(
+    address: Address | str,
+    config: Config = CONFIG,
+) -> SealedStash:
+    backend = get_backend_from_address(address, config)
+    if not backend.cacheable:
+        start = time.perf_counter()
+        stash = await backend.aload_stash(address)
+        return _notify_load(backend, stash, start)
+    pool = get_backend_pool(config)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        pool.executor, _retrieve_cached, backend, address, pool
+    )
+
+
+def _retrieve_cached(
+    backend: Backend,
+    address: Address | str,
+    pool: BackendPool,
+) -> SealedStash:
+    address = backend.parse_address(address)
+    key = str(address)
+    observers = pool.config.observers
+    # Caches hold encoded bytes only: each retrieve gets a stash of its own, so
+    # consumers never see each other's changes to the decoded data.
+    if pool.cache is not None:
+        start = time.perf_counter()
+        encoded = pool.cache.get(key)
+        if observers:
+            phase = "cache.miss" if encoded is None else "cache.hit"
+            nbytes = 0 if encoded is None else len(encoded)
+            notify(observers, phase, start, nbytes, backend.name)
+        if encoded is not None:
+            return backend.make_stash(address, encoded)
+
+    # Concurrent retrieves of the address, or its prefetch, share one load.
+    load = functools.partial(_fetch_prefetched, backend, address, pool)
+    encoded = pool.flights.run(key, load)
+
+    if pool.cache is not None:
+        pool.cache.put(key, encoded)
+    return backend.make_stash(address, encoded)
+
+
+def _fetch_prefetched(backend: Backend, address: Address, pool: BackendPool) -> Buffer:
+    # Prefetches land before their flight, so the flight leader finds them here.
+    start = time.perf_counter()
+    if (encoded := pool.prefetcher.pop(str(address))) is None:
+        return _fetch(backend, address, pool)
+    if pool.config.observers:
+        notify(pool.config.observers, "prefetch.hit", start, len(encoded), backend.name)
+    return encoded
+
+
+def _fetch(backend: Backend, address: Address, pool: BackendPool) -> Buffer:
+    encoded = None
+    if pool.disk_cache is not None:
+        start = time.perf_counter()
+        encoded = pool.disk_cache.get(address)
+        if pool.config.observers:
+            phase = "disk_cache.miss" if encoded is None else "disk_cache.hit"
+            nbytes = 0 if encoded is None else len(encoded)
+            notify(pool.config.observers, phase, start, nbytes, backend.name)
+
+    if encoded is not None:
+        return encoded
+    encoded = _load(backend, address).encoded
+    if pool.disk_cache is not None:
+        pool.disk_cache.put(address, encoded)
+    return encoded
+
+
+def open(
+    address: Address | str,
+    config: Config = CONFIG,
+) -> BufferedReader:
+    """Opens a binary stash for reading without buffering the whole payload.
+
+    Iterate chunks with `iter(functools.partial(reader.read, size), b"")`.
+    """
+    backend = get_backend_from_address(address, config)
+    return open_payload(backend.open_stream(address))
+
+
+def flush(config: Config = CONFIG, timeout_sec: float | None = None) -> None:
+    """Waits for background uploads, e.g. under `Config.s3_write_behind`.
+
+    Raises the first upload error since the last flush.
+    """
+    for backend in get_backends_from_config(config):
+        backend.flush(timeout_sec)
+
+
+@contextlib.contextmanager
+def flushing(config: Config = CONFIG) -> Generator[Config]:
+    """Flushes background uploads on exit from the block, unless it raised."""
+    yield config
+    flush(config)
+
+
+def create_many(
+    items: Iterable[tuple[str, Optional[ArgData]]],
+    namespace: str = "default",
+    config: Config = CONFIG,
+    max_workers: int | None = None,
+) -> list[SealedStash | Exception]:
+    """Creates stashes concurrently, returning results in input order.
+
+    A failed item is reported by its exception in place of the stash.
+    """
+
+    def create_item(item: tuple[str, Optional[ArgData]]) -> SealedStash:
+        name, data = item
+        return create(name, data, namespace=namespace, config=config)
+
+    return _run_many(create_item, items, config, max_workers)
+
+
+def retrieve_many(
+    addresses: Iterable[Address | str],
+    config: Config = CONFIG,
+    max_workers: int | None = None,
+) -> list[SealedStash | Exception]:
+    """Retrieves stashes concurrently, returning results in input order.
+
+    A failed item is reported by its exception in place of the stash.
+    """
+
+    def retrieve_item(address: Address | str) -> SealedStash:
+        return retrieve(address, config=config)
+
+    return _run_many(retrieve_item, addresses, config, max_workers)
+
+
+def _run_many[T](
+    fn: Callable[[T], SealedStash],
+    items: Iterable[T],
+    config: Config,
+    max_workers: int | None,
+) -> list[SealedStash | Exception]:
+    with ThreadPoolExecutor(max_workers or config.batch_max_workers) as executor:
+        futures = [executor.submit(fn, item) for item in items]
+    return [_result_or_error(future) for future in futures]
+
+
+def _result_or_error(future: Future[SealedStash]) -> SealedStash | Exception:
+    if (error := future.exception()) is not None:
+        if not isinstance(error, Exception):
+            raise error
+        return error
+    return future.result()
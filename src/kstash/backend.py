@@ -1,17 +1,27 @@
 from .backend_base import (
+    Backend,
+    BackendPool,
     get_backend_from_address,
+    get_backend_pool,
     get_backends_from_config,
 )
+from .backend_file import FileBackend
 from .backend_http import HttpBackend
 from .backend_inline import InlineBackend
 from .backend_mem import MemBackend
 from .backend_s3 import S3Backend
+from .backend_shm import ShmBackend
 
 __all__ = [
+    "Backend",
+    "BackendPool",
     "get_backend_from_address",
+    "get_backend_pool",
     "get_backends_from_config",
+    "FileBackend",
     "InlineBackend",
     "MemBackend",
     "S3Backend",
+    "ShmBackend",
     "HttpBackend",
 ]
@@ -1,10 +1,21 @@
+import asyncio
+import functools
+import io
+import threading
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
-from typing import Type
+from typing import IO, ClassVar, Type
 
 from .address import Address, parse_address_scheme
+from .cache import StashCache
+from .cache_disk import DiskStashCache
 from .config import CONFIG, Config
-from .exceptions import UnsupportedBackend
-from .stash import ArgData, SealedStash, Stash
+from .exceptions import UnsupportedBackend, UnsupportedOperation
+from .observe import notify
+from .prefetch import Prefetcher, SingleFlight
+from .stash import ArgData, Buffer, SealedStash, Stash
+from .stream import StreamData
 
 
 @dataclass(frozen=True)
@@ -12,22 +23,94 @@ class Backend:
     name: str = field(init=False, default=NotImplemented)  # type: ignore
     config: Config = field(default=CONFIG)
 
+    # Whether loaded stashes may be cached by address: the address embeds a
+    # content hash and loading it involves remote I/O.
+    cacheable: ClassVar[bool] = False
+    # Whether saves and loads block on I/O. Those of non-blocking backends run
+    # on the event loop under the async api, others on the pool's executor.
+    blocking: ClassVar[bool] = True
+    # Whether `save_stream` reads the whole stream before it may reject it.
+    buffers_streams: ClassVar[bool] = False
+
     def save_stash(
         self,
         name: str,
         data: ArgData,
         namespace: str = "default",
     ) -> SealedStash:
-        stash = Stash(name=name, namespace=namespace, data=data)
+        stash = Stash(
+            name=name,
+            namespace=namespace,
+            data=data,
+            hash_algorithm=self.config.hash_algorithm,
+            observers=self.config.observers,
+        )
+        return self._save_stash(stash)
+
+    def seal_stash(self, stash: Stash) -> SealedStash:
+        """Stores an already encoded stash, e.g. one routed by its encoded size."""
         return self._save_stash(stash)
 
     def _save_stash(self, stash: Stash) -> SealedStash:
         raise NotImplementedError
 
+    def save_stream(
+        self,
+        name: str,
+        stream: StreamData,
+        namespace: str = "default",
+    ) -> SealedStash:
+        raise UnsupportedOperation("data: streams are not supported")
+
     def load_stash(self, address: Address | str) -> SealedStash:
         raise NotImplementedError
 
-    def parse_address(self, address: str) -> Address:
+    def open_stream(self, address: Address | str) -> IO[bytes]:
+        """Opens the encoded payload of a stash for incremental reading."""
+        return io.BytesIO(self.load_stash(address).encoded)
+
+    def flush(self, timeout_sec: float | None = None) -> None:
+        """Waits for saves still running in the background, if any."""
+
+    async def asave_stash(
+        self,
+        name: str,
+        data: ArgData,
+        namespace: str = "default",
+    ) -> SealedStash:
+        # Encoding is CPU bound, so it runs on the executor for every backend.
+        executor = get_backend_pool(self.config).executor
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            executor, functools.partial(self.save_stash, name, data, namespace)
+        )
+
+    async def aseal_stash(self, stash: Stash) -> SealedStash:
+        return await self._run_async(self.seal_stash, stash)
+
+    async def aload_stash(self, address: Address | str) -> SealedStash:
+        return await self._run_async(self.load_stash, address)
+
+    async def _run_async[**P, R](
+        self, fn: Callable[P, R], *args: P.args, **kwargs: P.kwargs
+    ) -> R:
+        if not self.blocking:
+            return fn(*args, **kwargs)
+        # Blocking I/O runs on the pool's executor, never on the event loop.
+        executor = get_backend_pool(self.config).executor
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            executor, functools.partial(fn, *args, **kwargs)
+        )
+
+    def parse_address(self, address: Address | str) -> Address:
+        raise NotImplementedError
+
+    def _notify(self, phase: str, start: float, nbytes: int = 0) -> None:
+        if self.config.observers:
+            notify(self.config.observers, phase, start, nbytes, self.name)
+
+    def make_stash(self, address: Address, encoded: Buffer) -> SealedStash:
         raise NotImplementedError
 
     def make_address(self, stash: Stash) -> Address:
@@ -75,16 +158,97 @@ def stash_backend(name: str):
     return wrapper
 
 
+@dataclass(frozen=True)
+class BackendPool:
+    """Lazily built, reusable backend instances bound to a single config."""
+
+    config: Config
+    _backends: dict[str, Backend] = field(default_factory=lambda: {})
+    _executor: ThreadPoolExecutor | None = field(default=None, init=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock)
+    cache: StashCache | None = field(init=False)
+    disk_cache: DiskStashCache | None = field(init=False)
+    flights: SingleFlight = field(default_factory=SingleFlight)
+    _prefetcher: Prefetcher | None = field(default=None, init=False)
+
+    def __post_init__(self):
+        cache = None
+        if self.config.cache_max_bytes:
+            cache = StashCache(max_bytes=self.config.cache_max_bytes)
+        object.__setattr__(self, "cache", cache)
+
+        disk_cache = None
+        if self.config.disk_cache_dir:
+            disk_cache = DiskStashCache(
+                directory=self.config.disk_cache_dir,
+                max_bytes=self.config.disk_cache_max_bytes,
+            )
+        object.__setattr__(self, "disk_cache", disk_cache)
+
+    def get(self, name: str) -> Backend:
+        if (backend := self._backends.get(name)) is not None:
+            return backend
+        with self._lock:
+            if (backend := self._backends.get(name)) is None:
+                backend_cls = BACKEND_REGISTRY.get(name)
+                backend = backend_cls(config=self.config)
+                self._backends[name] = backend
+            return backend
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        """Runs the blocking I/O behind the async api, up to the concurrency limit."""
+        if (executor := self._executor) is not None:
+            return executor
+        with self._lock:
+            if (executor := self._executor) is None:
+                executor = ThreadPoolExecutor(
+                    max_workers=self.config.async_max_concurrency,
+                    thread_name_prefix="kstash",
+                )
+                object.__setattr__(self, "_executor", executor)
+            return executor
+
+    @property
+    def prefetcher(self) -> Prefetcher:
+        if (prefetcher := self._prefetcher) is not None:
+            return prefetcher
+        with self._lock:
+            if (prefetcher := self._prefetcher) is None:
+                prefetcher = Prefetcher(
+                    flights=self.flights,
+                    max_inflight=self.config.prefetch_max_inflight,
+                    max_bytes=self.config.prefetch_max_bytes,
+                )
+                object.__setattr__(self, "_prefetcher", prefetcher)
+            return prefetcher
+
+
+_BACKEND_POOL_ATTR = "_backend_pool"
+_BACKEND_POOL_LOCK = threading.Lock()
+
+
+def get_backend_pool(config: Config = CONFIG) -> BackendPool:
+    # The pool lives on the config instance itself, so it shares its lifetime.
+    if (pool := vars(config).get(_BACKEND_POOL_ATTR)) is not None:
+        return pool
+    with _BACKEND_POOL_LOCK:
+        if (pool := vars(config).get(_BACKEND_POOL_ATTR)) is None:
+            pool = BackendPool(config=config)
+            object.__setattr__(config, _BACKEND_POOL_ATTR, pool)
+        return pool
+
+
 def get_backend_from_address(
     address: Address | str, config: Config = CONFIG
 ) -> Backend:
     backend_cls = BACKEND_REGISTRY.get_from_address(address)
     if backend_cls.name not in config.backends:
         raise UnsupportedBackend(f"no backend available to load stash {str(address)}")
-    return backend_cls(config=config)
+    return get_backend_pool(config).get(backend_cls.name)
 
 
 def get_backends_from_config(config: Config = CONFIG):
+    pool = get_backend_pool(config)
     for backend_name in config.backends:
-        backend_cls = BACKEND_REGISTRY.get(backend_name)
-        yield backend_cls(config=config)
+        yield pool.get(backend_name)
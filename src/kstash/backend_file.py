@@ -0,0 +1,112 @@
+import os
+from collections.abc import Iterator
+from dataclasses import dataclass
+from typing import IO
+from urllib.parse import quote
+
+from .address import Address, DigestAddress
+from .backend_base import Backend, stash_backend
+from .exceptions import StashNotFound, UnsupportedOperation
+from .fs import read_mmap, write_atomic
+from .stash import SealedStash, Stash
+from .stream import EncodedStream, StreamData
+
+FILE_CHUNK_SIZE = 1024 * 1024
+
+
+@stash_backend("file")
+@dataclass(frozen=True)
+class FileBackend(Backend):
+    """Stores stashes as content-addressed files under `Config.file_root`.
+
+    Files are written with an atomic rename and read through mmap, so a shared
+    mount can be used by many hosts at once.
+    """
+
+    def _save_stash(self, stash: Stash) -> SealedStash:
+        stash = stash.seal(backend=self, address=self.make_address(stash))
+        path = self.path(stash.address)
+        if not os.path.exists(path):
+            write_atomic(path, stash.encoded)
+        return stash
+
+    def save_stream(
+        self,
+        name: str,
+        stream: StreamData,
+        namespace: str = "default",
+    ) -> SealedStash:
+        hash_algorithm = self.config.hash_algorithm
+        with EncodedStream.open(stream, FILE_CHUNK_SIZE, hash_algorithm) as encoded:
+            stash = Stash.from_digest(
+                name=name, namespace=namespace, digest=encoded.digest
+            )
+            stash = stash.seal(backend=self, address=self.make_address(stash))
+            path = self.path(stash.address)
+            if not os.path.exists(path):
+                write_atomic(path, _read_chunks(encoded))
+            return stash
+
+    def load_stash(self, address: Address | str) -> SealedStash:
+        address = self.parse_address(address)
+        try:
+            encoded = read_mmap(self.path(address))
+        except FileNotFoundError as error:
+            raise StashNotFound(f"stash not found: {address}") from error
+        stash = Stash.from_encoded(
+            encoded,
+            name=address.name,
+            namespace=address.location,
+            digest=address.digest,
+        )
+        return stash.seal(backend=self, address=address)
+
+    def open_stream(self, address: Address | str) -> IO[bytes]:
+        address = self.parse_address(address)
+        try:
+            return open(self.path(address), "rb")
+        except FileNotFoundError as error:
+            raise StashNotFound(f"stash not found: {address}") from error
+
+    def path(self, address: Address) -> str:
+        """Local path of a stash: `root/namespace/ab/cd/name.<digest>`."""
+        if not self.config.file_root:
+            raise UnsupportedOperation("file: file_root is not configured")
+        if address.location in ("", ".", ".."):
+            raise ValueError(f"invalid address: {address}")
+        digest = address.digest or ""
+        hexdigest = digest.rpartition("-")[2]
+        return os.path.join(
+            self.config.file_root,
+            quote(address.location, safe=""),
+            hexdigest[:2],
+            hexdigest[2:4],
+            quote(f"{address.name}.{digest}", safe=""),
+        )
+
+    def make_address(self, stash: Stash) -> Address:
+        return FileAddress.from_stash(stash)
+
+    def parse_address(self, address: Address | str) -> Address:
+        return FileAddress.parse(address)
+
+    def make_share_address(self, stash: Stash, ttl_sec: int | None = None) -> Address:
+        raise UnsupportedOperation
+
+
+def _read_chunks(encoded: EncodedStream) -> Iterator[bytes]:
+    for start in range(0, encoded.size, FILE_CHUNK_SIZE):
+        yield encoded.read(start, FILE_CHUNK_SIZE)
+
+
+@dataclass(frozen=True, kw_only=True)
+class FileAddress(DigestAddress):
+    scheme: str = "file"
+
+    @classmethod
+    def from_stash(cls, stash: Stash) -> "Address":
+        return cls(
+            scheme=cls.scheme,
+            location=stash.namespace,
+            path=f"{stash.name}.{stash.digest}",
+        )
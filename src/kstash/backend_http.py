@@ -1,20 +1,36 @@
-import re
-from dataclasses import dataclass
+import functools
+import io
+import time
+from dataclasses import dataclass, field
+from typing import IO
 
-import msgpack
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import HTTPError as URLLib3HTTPError
+from urllib3.util.retry import Retry
 
-from .address import Address
+from .address import Address, DigestAddress
 from .backend_base import Backend, stash_backend
+from .chunking import MANIFEST_METADATA_KEY
+from .codec import CODEC_METADATA_KEY, decompress, get_decompressor
+from .config import Config
 from .exceptions import BackendRemoteError, StashNotFound, UnsupportedOperation
-from .stash import SealedStash, Stash
+from .stash import Buffer, SealedStash, Stash
+from .stream import ChunkReader
+
+RETRY_STATUSES = (500, 502, 503, 504)
 
 
 @stash_backend("https")
 @dataclass(frozen=True)
 class HttpBackend(Backend):
-    def parse_address(self, address: str) -> Address:
-        return HttpAddress.from_string(address)
+    session: requests.Session = field(init=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, "session", make_session(self.config))
+
+    def parse_address(self, address: Address | str) -> Address:
+        return HttpAddress.parse(address)
 
     def make_address(self, stash: Stash) -> Address:
         raise UnsupportedOperation
@@ -26,38 +42,102 @@ class HttpBackend(Backend):
         raise UnsupportedOperation
 
     def load_stash(self, address: Address | str) -> SealedStash:
-        address = self.parse_address(str(address))
+        address = self.parse_address(address)
+
+        start = time.perf_counter()
+        response = self._get(address, stream=True)
+        codec = response.headers.get(f"x-amz-meta-{CODEC_METADATA_KEY}")
+        body = _read_body(response)
+        self._notify("network", start, len(body))
+        stash = Stash.from_encoded(
+            decompress(codec, body),
+            name=address.name,
+            namespace=address.location.split(".")[0],
+            digest=address.digest,
+        )
+
+        return stash.seal(backend=self, address=address)
 
-        # TODO: refactor and parse path natively during address construction
-        path_regex = r"(?P<name>.*)\.(?P<md5>[a-f0-9]{32})$"
-        if not (match := re.match(path_regex, address.path)):
-            raise ValueError(f"invalid address: {address}")
-        grouped = match.groupdict()
-        stash_name = grouped["name"].strip("/")
+    def open_stream(self, address: Address | str) -> IO[bytes]:
+        address = self.parse_address(address)
+        response = self._get(address, stream=True)
+        codec = response.headers.get(f"x-amz-meta-{CODEC_METADATA_KEY}")
+        read = functools.partial(response.raw.read, decode_content=True)
+        reader = ChunkReader(read, get_decompressor(codec), close=response.close)
+        return io.BufferedReader(reader)
 
+    def _get(self, address: Address, stream: bool = False) -> requests.Response:
         try:
-            response = requests.get(str(address))
+            response = self.session.get(
+                str(address),
+                stream=stream,
+                timeout=(
+                    self.config.http_connect_timeout_sec,
+                    self.config.http_read_timeout_sec,
+                ),
+            )
         except requests.RequestException as error:
             raise BackendRemoteError(self.name) from error
 
         try:
             response.raise_for_status()
         except requests.HTTPError as error:
+            response.close()
             if error.response.status_code in (403, 404):
                 raise StashNotFound(f"stash not found: {address}") from error
             raise BackendRemoteError(self.name) from error
 
-        data = msgpack.unpackb(response.content)
-
-        stash = Stash(
-            name=stash_name,
-            namespace=address.location.split(".")[0],
-            data=data,
-        )
-
-        return stash.seal(backend=self, address=address)
+        if response.headers.get(f"x-amz-meta-{MANIFEST_METADATA_KEY}"):
+            response.close()
+            raise UnsupportedOperation(
+                f"https: chunked stash cannot be loaded: {address}"
+            )
+
+        return response
+
+
+def make_session(config: Config) -> requests.Session:
+    """Builds a keep-alive session whose connection pool is shared by all threads."""
+    retry = Retry(
+        total=config.http_max_retries,
+        backoff_factor=config.http_backoff_factor,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=["GET"],
+        raise_on_status=False,
+    )
+    # Sized so concurrent batch/async workers share the session's connection pool.
+    pool_maxsize = config.http_pool_maxsize or max(
+        config.batch_max_workers, config.async_max_concurrency
+    )
+    adapter = HTTPAdapter(
+        pool_connections=pool_maxsize,
+        pool_maxsize=pool_maxsize,
+        max_retries=retry,
+    )
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def _read_body(response: requests.Response) -> Buffer:
+    """Streams the response body into a single preallocated buffer when possible."""
+    with response:
+        content_length = response.headers.get("content-length")
+        if content_length is None or response.headers.get("content-encoding"):
+            return response.content
+        buffer = bytearray(int(content_length))
+        view = memoryview(buffer)
+        try:
+            while view:
+                if not (size := response.raw.readinto(view)):
+                    raise BackendRemoteError("https: truncated response")
+                view = view[size:]
+        except (requests.RequestException, URLLib3HTTPError) as error:
+            raise BackendRemoteError("https") from error
+        return buffer
 
 
 @dataclass(frozen=True, kw_only=True)
-class HttpAddress(Address):
+class HttpAddress(DigestAddress):
     scheme: str = "https"
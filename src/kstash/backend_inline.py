@@ -1,43 +1,64 @@
 import base64
 from dataclasses import dataclass
 
-import msgpack
-
 from .address import Address
 from .backend_base import Backend, stash_backend
+from .codec import compress_stash, decompress
+from .digest import DEFAULT_HASH_ALGORITHM, digest_algorithm
 from .exceptions import UnsupportedOperation
-from .stash import SealedStash, Stash
+from .stash import Buffer, SealedStash, Stash
+
+
+# Payloads larger than this many times the inline capacity are not compressed
+# just to find out they do not fit.
+MAX_COMPRESSION_RATIO = 16
 
 
 @stash_backend("inline")
 @dataclass(frozen=True, kw_only=True)
 class InlineBackend(Backend):
+    blocking = False
+
     def make_address(self, stash: Stash) -> Address:
-        return InlineAddress.from_stash(stash)
+        codec, payload = compress_stash(self.config, stash)
+        return InlineAddress.from_payload(stash, payload, codec)
 
-    def parse_address(self, address: str) -> Address:
-        return InlineAddress.from_string(address)
+    def parse_address(self, address: Address | str) -> Address:
+        return InlineAddress.parse(address)
 
     def make_share_address(self, stash: Stash, ttl_sec: int | None = None) -> Address:
         raise UnsupportedOperation
 
     def _save_stash(self, stash: Stash) -> SealedStash:
-        address = self.make_address(stash)
-        if len(address.extra[0][1]) > self.config.max_inline_len:
+        max_len = self.config.max_inline_len // 4 * 3
+        if len(stash.encoded) > max_len * (
+            MAX_COMPRESSION_RATIO if self.config.codec else 1
+        ):
+            raise UnsupportedOperation("data: too large to inline")
+        codec, payload = compress_stash(self.config, stash)
+        # Checked before paying for the base64 pass over the payload.
+        if base64_len(len(payload)) > self.config.max_inline_len:
             raise UnsupportedOperation("data: too large to inline")
+        address = InlineAddress.from_payload(stash, payload, codec)
         return stash.seal(backend=self, address=address)
 
     def load_stash(self, address: Address | str) -> SealedStash:
-        address = self.parse_address(str(address))
-        raw = base64.b64decode(address.extra[0][1])
-        data = msgpack.unpackb(raw)
-        return SealedStash(
-            name=address.path.strip("/"),
+        address = self.parse_address(address)
+        params = dict(address.extra)
+        raw = base64.b64decode(params["data"])
+        stash = Stash.from_encoded(
+            decompress(params.get("codec"), raw),
+            name=address.name,
             namespace=address.location,
-            data=data,
-            backend=self,
-            address=address,
+            # Recorded by the writer, as the reader's config may differ.
+            hash_algorithm=params.get("hash", DEFAULT_HASH_ALGORITHM),
         )
+        return stash.seal(backend=self, address=address)
+
+
+def base64_len(size: int) -> int:
+    """Length of the padded base64 encoding of `size` bytes."""
+    return 4 * ((size + 2) // 3)
 
 
 @dataclass(frozen=True, kw_only=True)
@@ -46,10 +67,20 @@ class InlineAddress(Address):
 
     @classmethod
     def from_stash(cls, stash: Stash) -> "InlineAddress":
-        data = base64.b64encode(stash.encoded).decode("utf-8")
+        return cls.from_payload(stash, stash.encoded)
+
+    @classmethod
+    def from_payload(
+        cls, stash: Stash, payload: Buffer, codec: str | None = None
+    ) -> "InlineAddress":
+        extra = [("data", base64.b64encode(payload).decode("utf-8"))]
+        if codec:
+            extra.append(("codec", codec))
+        if (algorithm := digest_algorithm(stash.digest)) != DEFAULT_HASH_ALGORITHM:
+            extra.append(("hash", algorithm))
         return cls(
             scheme=cls.scheme,
             location=stash.namespace,
             path=stash.name,
-            extra=[("data", data)],
+            extra=tuple(extra),
         )
@@ -1,40 +1,176 @@
-from dataclasses import dataclass
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import dataclass, field
 
-from .address import Address
+from .address import Address, DigestAddress
 from .backend_base import Backend, stash_backend
 from .exceptions import StashNotFound, UnsupportedOperation
-from .stash import SealedStash, Stash
+from .stash import Buffer, SealedStash, Stash
+from .stream import StreamData, read_stream
 
-MEM_BACKEND_STORE: dict[str, SealedStash] = {}
+
+@dataclass(frozen=True)
+class MemStoreStats:
+    entries: int = 0
+    size: int = 0
+    evictions: int = 0
+    expirations: int = 0
+
+
+@dataclass
+class _MemEntry:
+    encoded: Buffer
+    expires_at: float | None
+
+
+@dataclass
+class MemStore:
+    """Thread-safe, process-wide store of encoded stashes with LRU/TTL eviction.
+
+    Bounds are given on each `put`, so every config sharing the store enforces
+    its own `mem_max_bytes` and `mem_ttl_sec` on the entries it writes.
+    """
+
+    clock: Callable[[], float] = time.monotonic
+    _entries: OrderedDict[str, _MemEntry] = field(
+        default_factory=OrderedDict[str, _MemEntry]
+    )
+    _lock: threading.Lock = field(default_factory=threading.Lock)
+    _size: int = 0
+    _evictions: int = 0
+    _expirations: int = 0
+
+    def get(self, key: str) -> Buffer | None:
+        with self._lock:
+            if (entry := self._entries.get(key)) is None:
+                return None
+            if entry.expires_at is not None and entry.expires_at <= self.clock():
+                self._remove(key)
+                self._expirations += 1
+                return None
+            self._entries.move_to_end(key)
+            return entry.encoded
+
+    def put(
+        self,
+        key: str,
+        encoded: Buffer,
+        max_bytes: int | None = None,
+        ttl_sec: float | None = None,
+    ) -> bool:
+        """Stores `encoded` under `key`, returning False when it can never fit."""
+        size = len(encoded)
+        if max_bytes is not None and size > max_bytes:
+            return False
+        now = self.clock()
+        expires_at = None if ttl_sec is None else now + ttl_sec
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = _MemEntry(encoded, expires_at)
+            self._size += size
+            self._expire_oldest(now)
+            while max_bytes is not None and self._size > max_bytes:
+                self._remove(next(iter(self._entries)))
+                self._evictions += 1
+        return True
+
+    def purge_expired(self) -> None:
+        now = self.clock()
+        with self._lock:
+            for key, entry in list(self._entries.items()):
+                if entry.expires_at is not None and entry.expires_at <= now:
+                    self._remove(key)
+                    self._expirations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self) -> MemStoreStats:
+        with self._lock:
+            return MemStoreStats(
+                entries=len(self._entries),
+                size=self._size,
+                evictions=self._evictions,
+                expirations=self._expirations,
+            )
+
+    def _expire_oldest(self, now: float) -> None:
+        # Cheap sweep from the least recently used end; see purge_expired().
+        while self._entries:
+            key, entry = next(iter(self._entries.items()))
+            if entry.expires_at is None or entry.expires_at > now:
+                return
+            self._remove(key)
+            self._expirations += 1
+
+    def _remove(self, key: str) -> None:
+        if (entry := self._entries.pop(key, None)) is not None:
+            self._size -= len(entry.encoded)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+MEM_BACKEND_STORE = MemStore()
 
 
 @stash_backend("mem")
 @dataclass(frozen=True)
 class MemBackend(Backend):
+    blocking = False
+    buffers_streams = True
+
     def _save_stash(self, stash: Stash) -> SealedStash:
         stash = stash.seal(backend=self, address=self.make_address(stash))
-        MEM_BACKEND_STORE[str(stash.address)] = stash
+        stored = MEM_BACKEND_STORE.put(
+            str(stash.address),
+            stash.encoded,
+            max_bytes=self.config.mem_max_bytes,
+            ttl_sec=self.config.mem_ttl_sec,
+        )
+        if not stored:
+            raise UnsupportedOperation("data: too large for mem_max_bytes")
         return stash
 
+    def save_stream(
+        self,
+        name: str,
+        stream: StreamData,
+        namespace: str = "default",
+    ) -> SealedStash:
+        return self.save_stash(name, read_stream(stream), namespace)
+
     def make_address(self, stash: Stash) -> Address:
         return MemAddress.from_stash(stash)
 
-    def parse_address(self, address: str) -> Address:
-        return MemAddress.from_string(address)
+    def parse_address(self, address: Address | str) -> Address:
+        return MemAddress.parse(address)
 
     def make_share_address(self, stash: Stash, ttl_sec: int | None = None) -> Address:
         raise UnsupportedOperation
 
     def load_stash(self, address: Address | str) -> SealedStash:
-        address = self.parse_address(str(address))
-        try:
-            return MEM_BACKEND_STORE[str(address)]
-        except KeyError as error:
-            raise StashNotFound(f"stash not found: {address}") from error
+        address = self.parse_address(address)
+        if (encoded := MEM_BACKEND_STORE.get(str(address))) is None:
+            raise StashNotFound(f"stash not found: {address}")
+        stash = Stash.from_encoded(
+            encoded,
+            name=address.name,
+            namespace=address.location,
+            digest=address.digest,
+        )
+        return stash.seal(backend=self, address=address)
 
 
 @dataclass(frozen=True, kw_only=True)
-class MemAddress(Address):
+class MemAddress(DigestAddress):
     scheme: str = "mem"
 
     @classmethod
@@ -42,5 +178,5 @@ class MemAddress(Address):
         return cls(
             scheme=cls.scheme,
             location=stash.namespace,
-            path=f"{stash.name}.{stash.md5}",
+            path=f"{stash.name}.{stash.digest}",
         )
@@ -1,76 +1,408 @@
-import re
+import functools
+import io
+import itertools
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
+from typing import IO
 
 import msgpack
 from boto3.session import Session
-from botocore.exceptions import ClientError
+from botocore.config import Config as BotocoreConfig
+from botocore.exceptions import ClientError, ConnectionError, ReadTimeoutError
+from botocore.response import StreamingBody
 from types_boto3_s3 import S3Client
+from types_boto3_s3.type_defs import CompletedPartTypeDef, GetObjectOutputTypeDef
 
-from .address import Address
+from .address import Address, DigestAddress
 from .backend_base import Backend, stash_backend
 from .backend_http import HttpAddress
-from .exceptions import BackendRemoteError, StashNotFound
-from .stash import SealedStash, Stash
+from .chunking import CHUNK_KEY_PREFIX, MANIFEST_METADATA_KEY, chunk_boundaries
+from .codec import (
+    CODEC_METADATA_KEY,
+    compress,
+    compress_stash,
+    decompress,
+    get_decompressor,
+)
+from .digest import hash_digest
+from .exceptions import BackendRemoteError, StashNotFound, UnsupportedOperation
+from .hedge import HedgedReader, ReadStats
+from .stash import Buffer, SealedStash, Stash
+from .stream import ChunkReader, EncodedStream, StreamData
+from .write_behind import PENDING_PAYLOADS, WriteBehindQueue
+
+MAX_PARTS = 10000
 
 
 @stash_backend("s3")
 @dataclass(frozen=True)
 class S3Backend(Backend):
+    cacheable = True
+
     s3_client: S3Client = field(init=False)
+    reader: HedgedReader | None = field(init=False, default=None)
+    writer: WriteBehindQueue | None = field(init=False, default=None)
 
     def __post_init__(self):
         session = Session()
-        client: S3Client = session.client("s3")  # type: ignore
+        # Sized so concurrent batch/async workers share the client's connection pool.
+        client_config = BotocoreConfig(
+            max_pool_connections=max(
+                self.config.batch_max_workers, self.config.async_max_concurrency
+            )
+        )
+        client: S3Client = session.client("s3", config=client_config)  # type: ignore
         object.__setattr__(self, "s3_client", client)
 
+        if (policy := self.config.s3_read_policy) is not None:
+            reader = HedgedReader(
+                policy=policy,
+                is_retryable=_is_retryable,
+                # Hedged parts of concurrent downloads may double the requests.
+                max_workers=2 * client_config.max_pool_connections,  # type: ignore
+            )
+            object.__setattr__(self, "reader", reader)
+
+        if self.config.s3_write_behind:
+            writer = WriteBehindQueue(
+                max_workers=self.config.s3_write_behind_max_workers,
+                max_bytes=self.config.s3_write_behind_max_bytes,
+            )
+            object.__setattr__(self, "writer", writer)
+
     def make_address(self, stash: Stash) -> Address:
         return S3Address.from_stash(stash)
 
-    def parse_address(self, address: str) -> Address:
-        return S3Address.from_string(address)
+    def parse_address(self, address: Address | str) -> Address:
+        return S3Address.parse(address)
 
     def _save_stash(self, stash: Stash) -> SealedStash:
+        bucket, key = stash.namespace, s3_key_from_stash(stash)
+        if not self._is_known_present(bucket, key):
+            if self.writer is not None:
+                upload = functools.partial(self._upload, stash)
+                self.writer.submit(f"{bucket}/{key}", stash.encoded, upload)
+            else:
+                self._upload(stash)
+        return stash.seal(backend=self, address=self.make_address(stash))
+
+    def _upload(self, stash: Stash) -> None:
+        if self._is_chunked(stash):
+            return self._upload_chunked(stash)
+
+        codec, payload = compress_stash(self.config, stash)
+        metadata = {CODEC_METADATA_KEY: codec} if codec else {}
+
+        start = time.perf_counter()
+        if len(payload) >= self.config.multipart_threshold:
+            view = memoryview(payload)
+
+            def read_part(start: int, length: int) -> bytes:
+                return bytes(view[start : start + length])
+
+            self._upload_multipart(stash, len(payload), read_part, metadata)
+        else:
+            self._put_object(
+                stash.namespace, s3_key_from_stash(stash), payload, metadata
+            )
+        self._notify("network", start, len(payload))
+
+        S3_KNOWN_KEYS.add(f"{stash.namespace}/{s3_key_from_stash(stash)}")
+
+    def _is_chunked(self, stash: Stash) -> bool:
+        return (
+            self.config.s3_chunking
+            and len(stash.encoded) >= self.config.s3_chunking_threshold
+        )
+
+    def _upload_chunked(self, stash: Stash) -> None:
+        bucket, key = stash.namespace, s3_key_from_stash(stash)
+        if self._object_exists(bucket, key):
+            return  # a metadata request saves hashing and probing every chunk
+
+        view = memoryview(stash.encoded).cast("B")
+        boundaries = chunk_boundaries(
+            view,
+            self.config.s3_chunk_min_size,
+            self.config.s3_chunk_avg_size,
+            self.config.s3_chunk_max_size,
+        )
+        chunks = [
+            view[start:end]
+            for start, end in itertools.pairwise(itertools.chain([0], boundaries))
+        ]
+
+        def upload_chunk(chunk: memoryview) -> tuple[str, int, int]:
+            chunk_key = CHUNK_KEY_PREFIX + hash_digest(
+                self.config.hash_algorithm, chunk
+            )
+            if self._is_known_present(bucket, chunk_key) or self._object_exists(
+                bucket, chunk_key
+            ):
+                S3_KNOWN_KEYS.add(f"{bucket}/{chunk_key}")
+                return chunk_key, len(chunk), 0
+            codec, payload = compress(self.config, chunk)
+            metadata = {CODEC_METADATA_KEY: codec} if codec else {}
+            self._put_object(bucket, chunk_key, payload, metadata)
+            S3_KNOWN_KEYS.add(f"{bucket}/{chunk_key}")
+            return chunk_key, len(chunk), len(payload)
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(self.config.multipart_max_workers) as executor:
+            uploads = list(executor.map(upload_chunk, chunks))
+        manifest = msgpack.packb([[chunk_key, size] for chunk_key, size, _ in uploads])
+        self._put_object(bucket, key, manifest, {MANIFEST_METADATA_KEY: "1"})
+        uploaded = sum(nbytes for _, _, nbytes in uploads) + len(manifest)
+        self._notify("network", start, uploaded)
+        S3_KNOWN_KEYS.add(f"{bucket}/{key}")
+
+    def flush(self, timeout_sec: float | None = None) -> None:
+        """Waits for write-behind uploads, raising the first one that failed."""
+        if self.writer is not None:
+            self.writer.flush(timeout_sec)
+
+    def save_stream(
+        self,
+        name: str,
+        stream: StreamData,
+        namespace: str = "default",
+    ) -> SealedStash:
+        chunk_size = self.config.multipart_chunk_size
+        hash_algorithm = self.config.hash_algorithm
+        with EncodedStream.open(stream, chunk_size, hash_algorithm) as encoded:
+            if encoded.size < self.config.multipart_threshold:
+                stash = Stash.from_encoded(
+                    encoded.read(0, encoded.size),
+                    name=name,
+                    namespace=namespace,
+                    digest=encoded.digest,
+                )
+                return self._save_stash(stash)
+
+            stash = Stash.from_digest(
+                name=name, namespace=namespace, digest=encoded.digest
+            )
+            bucket, key = stash.namespace, s3_key_from_stash(stash)
+            if not self._is_known_present(bucket, key):
+                start = time.perf_counter()
+                self._upload_multipart(stash, encoded.size, encoded.read, {})
+                self._notify("network", start, encoded.size)
+                S3_KNOWN_KEYS.add(f"{bucket}/{key}")
+            return stash.seal(backend=self, address=self.make_address(stash))
+
+    def _put_object(
+        self, bucket: str, key: str, payload: Buffer, metadata: dict[str, str]
+    ):
         try:
             self.s3_client.put_object(
-                Bucket=stash.namespace,
-                Key=s3_key_from_stash(stash),
-                Body=stash.encoded,
+                Bucket=bucket,
+                Key=key,
+                Body=bytes(payload),  # put_object does not take memoryviews
+                Metadata=metadata,
                 IfNoneMatch="*",  # Prevents accidental stash overwriting.
             )
         except ClientError as e:
+            # The key embeds the content hash: an existing object holds the same
+            # content, so the payload in hand is not uploaded again.
             if e.response["Error"]["Code"] == "PreconditionFailed":  # type: ignore
-                return self.load_stash(self.make_address(stash))
+                return
             raise BackendRemoteError(self.name) from e
 
-        return stash.seal(backend=self, address=self.make_address(stash))
+    def _is_known_present(self, bucket: str, key: str) -> bool:
+        return self.config.s3_skip_known_present and f"{bucket}/{key}" in S3_KNOWN_KEYS
 
-    def load_stash(self, address: Address | str) -> SealedStash:
-        address = self.parse_address(str(address))  # induce validation
+    def _object_exists(self, bucket: str, key: str) -> bool:
+        try:
+            self.s3_client.head_object(Bucket=bucket, Key=key)
+        except ClientError as e:
+            if e.response["Error"]["Code"] in ("404", "NoSuchKey"):  # type: ignore
+                return False
+            raise BackendRemoteError(self.name) from e
+        return True
+
+    def _upload_multipart(
+        self,
+        stash: Stash,
+        size: int,
+        read_part: Callable[[int, int], bytes],
+        metadata: dict[str, str],
+    ) -> None:
+        bucket, key = stash.namespace, s3_key_from_stash(stash)
+        if self._object_exists(bucket, key):
+            return  # a metadata request saves uploading the same content again
 
-        # TODO: refactor and parse path natively during address construction
-        path_regex = r"(?P<name>.*)\.(?P<md5>[a-f0-9]{32})$"
-        if not (match := re.match(path_regex, address.path)):
-            raise ValueError(f"invalid address: {address}")
-        grouped = match.groupdict()
-        stash_name = grouped["name"].strip("/")
+        # S3 caps uploads at 10000 parts, larger payloads get larger parts.
+        part_size = max(self.config.multipart_chunk_size, -(-size // MAX_PARTS))
+
+        def upload_part(part_number: int) -> CompletedPartTypeDef:
+            start = (part_number - 1) * part_size
+            response = self.s3_client.upload_part(
+                Bucket=bucket,
+                Key=key,
+                UploadId=upload_id,
+                PartNumber=part_number,
+                Body=read_part(start, min(part_size, size - start)),
+            )
+            return {"ETag": response["ETag"], "PartNumber": part_number}
 
         try:
-            response = self.s3_client.get_object(
-                Bucket=address.location,
-                Key=address.path.strip("/"),
+            upload = self.s3_client.create_multipart_upload(
+                Bucket=bucket, Key=key, Metadata=metadata
             )
         except ClientError as e:
-            if e.response["Error"]["Code"] in ("NoSuchKey", "NoSuchBucket"):  # type: ignore
-                raise StashNotFound(str(address)) from e
             raise BackendRemoteError(self.name) from e
+        upload_id = upload["UploadId"]
+
+        try:
+            # Parts are read within the workers, so memory stays bounded by
+            # multipart_max_workers * part_size.
+            with ThreadPoolExecutor(self.config.multipart_max_workers) as executor:
+                part_numbers = range(1, -(-size // part_size) + 1)
+                parts = list(executor.map(upload_part, part_numbers))
+            self.s3_client.complete_multipart_upload(
+                Bucket=bucket,
+                Key=key,
+                UploadId=upload_id,
+                MultipartUpload={"Parts": parts},
+                IfNoneMatch="*",  # Prevents accidental stash overwriting.
+            )
+        except BaseException as e:
+            self.s3_client.abort_multipart_upload(
+                Bucket=bucket, Key=key, UploadId=upload_id
+            )
+            if not isinstance(e, ClientError):
+                raise
+            if e.response["Error"]["Code"] == "PreconditionFailed":  # type: ignore
+                return  # same content was already stored
+            raise BackendRemoteError(self.name) from e
+
+    def load_stash(self, address: Address | str) -> SealedStash:
+        address = self.parse_address(address)
+        if (encoded := self._get_pending(address)) is not None:
+            return self.make_stash(address, encoded)
+        start = time.perf_counter()
+        bucket, key = address.location, address.path.strip("/")
+        raw, metadata = self._download(bucket, key)
+        if metadata.get(MANIFEST_METADATA_KEY):
+            encoded = self._download_chunks(bucket, _unpack_manifest(raw))
+            self._notify("network", start, len(encoded))
+            return self.make_stash(address, encoded)
+        self._notify("network", start, len(raw))
+        return self.make_stash(
+            address, decompress(metadata.get(CODEC_METADATA_KEY), raw)
+        )
+
+    def _download(self, bucket: str, key: str) -> tuple[Buffer, dict[str, str]]:
+        # The first part also tells the object size: small objects take a single
+        # request, larger ones have their remaining parts fetched concurrently.
+        part_size = self.config.s3_download_part_size
+        response = self._get_object(bucket, key, Range=f"bytes=0-{part_size - 1}")
+        metadata = response.get("Metadata", {})
+        size = int(response.get("ContentRange", "/0").rpartition("/")[2])
+        if size <= part_size:
+            return response["Body"].read(), metadata
+
+        buffer = bytearray(size)
+        view = memoryview(buffer)
+        _read_into(response["Body"], view[:part_size])
+
+        def download_part(start: int) -> None:
+            end = min(start + part_size, size)
+            part = self._get_object(
+                bucket,
+                key,
+                Range=f"bytes={start}-{end - 1}",
+                IfMatch=response["ETag"],
+            )
+            _read_into(part["Body"], view[start:end])
+
+        with ThreadPoolExecutor(self.config.s3_download_max_workers) as executor:
+            list(executor.map(download_part, range(part_size, size, part_size)))
+
+        return buffer, metadata  # handed over as is, without a copy to bytes
+
+    def _download_chunks(self, bucket: str, manifest: list[tuple[str, int]]) -> Buffer:
+        offsets = itertools.accumulate((size for _, size in manifest), initial=0)
+        buffer = bytearray(sum(size for _, size in manifest))
+        view = memoryview(buffer)
+
+        def download_chunk(entry: tuple[tuple[str, int], int]) -> None:
+            (chunk_key, size), start = entry
+            view[start : start + size] = self._download_chunk(bucket, chunk_key)
+
+        with ThreadPoolExecutor(self.config.s3_download_max_workers) as executor:
+            list(executor.map(download_chunk, zip(manifest, offsets)))
+        return buffer
+
+    def _download_chunk(self, bucket: str, chunk_key: str) -> Buffer:
+        raw, metadata = self._download(bucket, chunk_key)
+        return decompress(metadata.get(CODEC_METADATA_KEY), raw)
+
+    def open_stream(self, address: Address | str) -> IO[bytes]:
+        address = self.parse_address(address)
+        if (encoded := self._get_pending(address)) is not None:
+            return io.BytesIO(encoded)
+        bucket, key = address.location, address.path.strip("/")
+        response = self._get_object(bucket, key)
+        body = response["Body"]
+        metadata = response.get("Metadata", {})
+        if metadata.get(MANIFEST_METADATA_KEY):
+            # Chunks are downloaded one at a time, as the reader consumes them.
+            manifest = _unpack_manifest(body.read())
+            body.close()
+            chunks = (self._download_chunk(bucket, chunk) for chunk, _ in manifest)
+            return io.BufferedReader(ChunkReader(lambda _: next(chunks, b"")))
+        codec = metadata.get(CODEC_METADATA_KEY)
+        reader = ChunkReader(body.read, get_decompressor(codec), close=body.close)
+        return io.BufferedReader(reader)
+
+    def _get_pending(self, address: Address) -> Buffer | None:
+        # Pending uploads of any config are shared process-wide.
+        return PENDING_PAYLOADS.get(f"{address.location}/{address.path.strip('/')}")
+
+    def _get_object(
+        self, bucket: str, key: str, **kwargs: str
+    ) -> GetObjectOutputTypeDef:
+        if self.reader is None:
+            return self._get_object_once(bucket, key, **kwargs)
+        return self.reader.read(
+            functools.partial(self._get_object_once, bucket, key, **kwargs),
+            discard=lambda response: response["Body"].close(),
+        )
+
+    def read_stats(self) -> ReadStats:
+        """Retry and hedging counters of reads under `Config.s3_read_policy`."""
+        return self.reader.stats() if self.reader is not None else ReadStats()
 
-        raw = response.get("Body").read()
-        data = msgpack.unpackb(raw)
+    def _get_object_once(
+        self, bucket: str, key: str, **kwargs: str
+    ) -> GetObjectOutputTypeDef:
+        try:
+            return self.s3_client.get_object(Bucket=bucket, Key=key, **kwargs)  # type: ignore
+        except ClientError as e:
+            if e.response["Error"]["Code"] in ("NoSuchKey", "NoSuchBucket"):  # type: ignore
+                S3_KNOWN_KEYS.discard(f"{bucket}/{key}")
+                raise StashNotFound(f"s3://{bucket}/{key}") from e
+            raise BackendRemoteError(self.name) from e
 
-        stash = Stash(name=stash_name, namespace=address.location, data=data)
+    def make_stash(self, address: Address, encoded: Buffer) -> SealedStash:
+        stash = Stash.from_encoded(
+            encoded,
+            name=address.name,
+            namespace=address.location,
+            digest=address.digest,
+        )
         return stash.seal(backend=self, address=address)
 
     def make_share_address(self, stash: Stash, ttl_sec: int | None = None) -> Address:
+        # A link would only reach the chunk manifest (streamed stashes are never
+        # chunked, and their payload is not loaded for this check).
+        if "encoded" in vars(stash) and self._is_chunked(stash):
+            raise UnsupportedOperation("share: chunked stashes cannot be shared")
         presigned_url = self.s3_client.generate_presigned_url(
             "get_object",
             Params={"Bucket": stash.namespace, "Key": s3_key_from_stash(stash)},
@@ -79,8 +411,34 @@ class S3Backend(Backend):
         return HttpAddress.from_string(presigned_url)
 
 
+@dataclass
+class KnownKeys:
+    """Bounded, thread-safe set of the most recently written object keys."""
+
+    max_entries: int = 100_000
+    _keys: OrderedDict[str, None] = field(default_factory=OrderedDict[str, None])
+    _lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def add(self, key: str) -> None:
+        with self._lock:
+            self._keys[key] = None
+            self._keys.move_to_end(key)
+            if len(self._keys) > self.max_entries:
+                self._keys.popitem(last=False)
+
+    def discard(self, key: str) -> None:
+        with self._lock:
+            self._keys.pop(key, None)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._keys
+
+
+S3_KNOWN_KEYS = KnownKeys()
+
+
 @dataclass(frozen=True, kw_only=True)
-class S3Address(Address):
+class S3Address(DigestAddress):
     scheme: str = "s3"
 
     @classmethod
@@ -92,5 +450,38 @@ class S3Address(Address):
         )
 
 
+# Throttling and server side errors worth a retry.
+RETRYABLE_ERROR_CODES = {
+    "InternalError",
+    "RequestLimitExceeded",
+    "RequestTimeout",
+    "ServiceUnavailable",
+    "SlowDown",
+    "Throttling",
+    "ThrottlingException",
+}
+
+
+def _is_retryable(error: Exception) -> bool:
+    if isinstance(error, (ConnectionError, ReadTimeoutError)):
+        return True
+    if not isinstance(cause := error.__cause__, ClientError):
+        return False
+    status = cause.response.get("ResponseMetadata", {}).get("HTTPStatusCode", 0)
+    return cause.response["Error"]["Code"] in RETRYABLE_ERROR_CODES or status >= 500  # type: ignore
+
+
+def _unpack_manifest(raw: Buffer) -> list[tuple[str, int]]:
+    return [(chunk_key, size) for chunk_key, size in msgpack.unpackb(raw)]
+
+
+def _read_into(body: StreamingBody, view: memoryview) -> None:
+    while view:
+        # botocore-stubs wrongly types the buffer as IO[bytes].
+        if not (size := body.readinto(view)):  # type: ignore
+            raise BackendRemoteError("s3: truncated response")
+        view = view[size:]
+
+
 def s3_key_from_stash(stash: Stash) -> str:
-    return f"{stash.name}.{stash.md5}"
+    return f"{stash.name}.{stash.digest}"
@@ -0,0 +1,228 @@
+import hashlib
+import io
+import struct
+import threading
+from dataclasses import dataclass, field
+from multiprocessing.shared_memory import SharedMemory
+from typing import IO
+
+from .address import Address, DigestAddress
+from .backend_base import Backend, stash_backend
+from .exceptions import StashNotFound, UnsupportedOperation
+from .stash import SealedStash, Stash
+from .stream import StreamData, read_stream
+
+# Segments start with the payload length, written last to mark them complete.
+SHM_HEADER = struct.Struct("<Q")
+
+
+@stash_backend("shm")
+@dataclass(frozen=True)
+class ShmBackend(Backend):
+    """Hands stashes over between processes of a host through shared memory.
+
+    Segments outlive the producing process: they are only removed from the host
+    by `unlink_stash`. Loaded stashes read the segment in place, so the mapping
+    stays open until each `load_stash` is matched by a `release_stash`.
+    """
+
+    blocking = False
+    buffers_streams = True
+
+    def _save_stash(self, stash: Stash) -> SealedStash:
+        stash = stash.seal(backend=self, address=self.make_address(stash))
+        name = shm_segment_name(stash.address)
+        size = len(stash.encoded)
+        try:
+            segment = _create_segment(name, size)
+        except FileExistsError:
+            if _segment_size(name):
+                return stash  # content-addressed: already on this host
+            # Left incomplete, e.g. by a producer that crashed while writing it.
+            # Readers never map incomplete segments, so it can be replaced.
+            _unlink_segment(name)
+            try:
+                segment = _create_segment(name, size)
+            except FileExistsError:
+                return stash  # replaced by a concurrent producer
+        try:
+            buf = segment.buf
+            assert buf is not None
+            buf[SHM_HEADER.size : SHM_HEADER.size + size] = stash.encoded
+            SHM_HEADER.pack_into(buf, 0, size)
+        finally:
+            segment.close()
+        return stash
+
+    def save_stream(
+        self,
+        name: str,
+        stream: StreamData,
+        namespace: str = "default",
+    ) -> SealedStash:
+        return self.save_stash(name, read_stream(stream), namespace)
+
+    def load_stash(self, address: Address | str) -> SealedStash:
+        address = self.parse_address(address)
+        view = SHM_SEGMENTS.acquire(shm_segment_name(address))
+        if view is None:
+            raise StashNotFound(f"stash not found: {address}")
+        stash = Stash.from_encoded(
+            view,
+            name=address.name,
+            namespace=address.location,
+            digest=address.digest,
+        )
+        return stash.seal(backend=self, address=address)
+
+    def open_stream(self, address: Address | str) -> IO[bytes]:
+        """Opens a copy of the encoded payload, leaving no reference to release."""
+        name = shm_segment_name(self.parse_address(address))
+        view = SHM_SEGMENTS.acquire(name)
+        if view is None:
+            raise StashNotFound(f"stash not found: {address}")
+        try:
+            return io.BytesIO(view)
+        finally:
+            SHM_SEGMENTS.release(name)
+
+    def release_stash(self, address: Address | str) -> None:
+        """Drops one `load_stash` reference, unmapping the segment after the last.
+
+        Stashes loaded from the address must not be used afterwards.
+        """
+        SHM_SEGMENTS.release(shm_segment_name(self.parse_address(address)))
+
+    def unlink_stash(self, address: Address | str) -> None:
+        """Removes the segment from the host; current mappings stay readable."""
+        _unlink_segment(shm_segment_name(self.parse_address(address)))
+
+    def make_address(self, stash: Stash) -> Address:
+        return ShmAddress.from_stash(stash)
+
+    def parse_address(self, address: Address | str) -> Address:
+        return ShmAddress.parse(address)
+
+    def make_share_address(self, stash: Stash, ttl_sec: int | None = None) -> Address:
+        raise UnsupportedOperation
+
+
+@dataclass
+class _Attachment:
+    segment: SharedMemory
+    view: memoryview
+    refs: int = 0
+
+
+@dataclass
+class ShmSegments:
+    """Refcounted, per-process attachments to shared memory segments."""
+
+    _attachments: dict[str, _Attachment] = field(default_factory=lambda: {})
+    _closing: list[SharedMemory] = field(default_factory=lambda: [])
+    _lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def acquire(self, name: str) -> memoryview | None:
+        """Maps the segment if needed, returning a view over its payload."""
+        with self._lock:
+            if (attachment := self._attachments.get(name)) is None:
+                if (attachment := self._attach(name)) is None:
+                    return None
+                self._attachments[name] = attachment
+            attachment.refs += 1
+            return attachment.view
+
+    def release(self, name: str) -> None:
+        with self._lock:
+            if (attachment := self._attachments.get(name)) is None:
+                return
+            attachment.refs -= 1
+            if attachment.refs > 0:
+                return
+            try:
+                attachment.view.release()
+            except BufferError:
+                return  # still exported: unmapped by a later release
+            del self._attachments[name]
+            self._closing.append(attachment.segment)
+            self._close_segments()
+
+    def refs(self, name: str) -> int:
+        with self._lock:
+            attachment = self._attachments.get(name)
+            return attachment.refs if attachment else 0
+
+    def _close_segments(self) -> None:
+        # Slices of a released payload view keep the mapping alive, so segments
+        # failing to close are retried on the next release.
+        closing: list[SharedMemory] = []
+        for segment in self._closing:
+            try:
+                segment.close()
+            except BufferError:
+                closing.append(segment)
+        self._closing = closing
+
+    def _attach(self, name: str) -> _Attachment | None:
+        try:
+            segment = SharedMemory(name, track=False)
+        except FileNotFoundError:
+            return None
+        buf = segment.buf
+        assert buf is not None
+        (size,) = SHM_HEADER.unpack_from(buf, 0)
+        if not size:  # still being written by its producer
+            segment.close()
+            return None
+        view = buf[SHM_HEADER.size : SHM_HEADER.size + size].toreadonly()
+        return _Attachment(segment=segment, view=view)
+
+
+SHM_SEGMENTS = ShmSegments()
+
+
+@dataclass(frozen=True, kw_only=True)
+class ShmAddress(DigestAddress):
+    scheme: str = "shm"
+
+    @classmethod
+    def from_stash(cls, stash: Stash) -> "Address":
+        return cls(
+            scheme=cls.scheme,
+            location=stash.namespace,
+            path=f"{stash.name}.{stash.digest}",
+        )
+
+
+def _create_segment(name: str, size: int) -> SharedMemory:
+    return SharedMemory(name, create=True, size=SHM_HEADER.size + size, track=False)
+
+
+def _segment_size(name: str) -> int:
+    """Payload size written to the segment, 0 while incomplete or missing."""
+    try:
+        segment = SharedMemory(name, track=False)
+    except FileNotFoundError:
+        return 0
+    try:
+        buf = segment.buf
+        assert buf is not None
+        (size,) = SHM_HEADER.unpack_from(buf, 0)
+        return size
+    finally:
+        segment.close()
+
+
+def _unlink_segment(name: str) -> None:
+    try:
+        segment = SharedMemory(name, track=False)
+    except FileNotFoundError:
+        return
+    segment.close()
+    segment.unlink()
+
+
+def shm_segment_name(address: Address) -> str:
+    # Derived from the content hash, and short enough for macOS' 31 chars limit.
+    key = f"{address.location}/{address.name}.{address.digest}".encode()
+    return "ks-" + hashlib.blake2b(key, digest_size=12).hexdigest()
@@ -0,0 +1,81 @@
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+from .stash import Buffer
+
+
+@dataclass(frozen=True)
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    entries: int = 0
+    size: int = 0
+
+
+@dataclass
+class StashCache:
+    """Thread-safe LRU of encoded stashes, bounded by their total size.
+
+    Only encoded bytes are kept, so each hit decodes into data of its own.
+    """
+
+    max_bytes: int
+    _entries: OrderedDict[str, Buffer] = field(default_factory=OrderedDict[str, Buffer])
+    _lock: threading.Lock = field(default_factory=threading.Lock)
+    _size: int = 0
+    _hits: int = 0
+    _misses: int = 0
+    _evictions: int = 0
+
+    def get(self, key: str) -> Buffer | None:
+        with self._lock:
+            if (encoded := self._entries.get(key)) is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return encoded
+
+    def pop(self, key: str) -> Buffer | None:
+        """Like `get`, but also removes the entry."""
+        with self._lock:
+            if (encoded := self._entries.pop(key, None)) is None:
+                self._misses += 1
+                return None
+            self._size -= len(encoded)
+            self._hits += 1
+            return encoded
+
+    def put(self, key: str, encoded: Buffer) -> None:
+        size = len(encoded)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if (previous := self._entries.pop(key, None)) is not None:
+                self._size -= len(previous)
+            self._entries[key] = encoded
+            self._size += size
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+                self._evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+                entries=len(self._entries),
+                size=self._size,
+            )
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
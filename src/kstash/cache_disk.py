@@ -0,0 +1,119 @@
+import hashlib
+import os
+import threading
+from dataclasses import dataclass, field
+from urllib.parse import quote
+
+from .address import Address
+from .fs import read_mmap, write_atomic
+from .stash import Buffer
+
+# Eviction frees space below the cap, so that a scan of the cache directory
+# happens once per few puts rather than on each one.
+EVICTION_TARGET_RATIO = 0.9
+
+
+@dataclass(frozen=True)
+class DiskCacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+
+@dataclass
+class DiskStashCache:
+    """Content-addressed cache of encoded stashes, shared by processes on a host.
+
+    Entries are written with an atomic rename, read through mmap and evicted in
+    least recently used order once their total size exceeds `max_bytes`. The
+    size is tracked from this process' puts between scans of the directory, so
+    the cache may overshoot by what other processes wrote in the meantime.
+    """
+
+    directory: str
+    max_bytes: int
+    _lock: threading.Lock = field(default_factory=threading.Lock)
+    _hits: int = 0
+    _misses: int = 0
+    _evictions: int = 0
+    _size: int | None = None  # estimated, until the first scan
+
+    def path(self, address: Address) -> str:
+        # Address paths embed the content hash, so entries never go stale.
+        filename = quote(address.path.strip("/"), safe="")
+        shard = hashlib.blake2b(filename.encode(), digest_size=1).hexdigest()
+        return os.path.join(
+            self.directory,
+            quote(address.scheme, safe=""),
+            quote(address.location, safe=""),
+            shard,
+            filename,
+        )
+
+    def get(self, address: Address) -> Buffer | None:
+        path = self.path(address)
+        try:
+            encoded = read_mmap(path)
+            os.utime(path)  # marks the entry as recently used
+        except FileNotFoundError:
+            with self._lock:
+                self._misses += 1
+            return None
+        with self._lock:
+            self._hits += 1
+        return encoded
+
+    def put(self, address: Address, encoded: Buffer) -> None:
+        if len(encoded) > self.max_bytes:
+            return
+        path = self.path(address)
+        if os.path.exists(path):
+            return
+        write_atomic(path, encoded)
+        with self._lock:
+            if self._size is not None:
+                self._size += len(encoded)
+            scan = self._size is None or self._size > self.max_bytes
+        if scan:
+            self._evict()
+
+    def _evict(self) -> None:
+        entries: list[tuple[float, int, str]] = []
+        for root, _, files in os.walk(self.directory):
+            for filename in files:
+                if filename.startswith(".tmp-"):
+                    continue
+                path = os.path.join(root, filename)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+        size = sum(entry_size for _, entry_size, _ in entries)
+        if size > self.max_bytes:
+            size = self._evict_entries(entries, size)
+        with self._lock:
+            self._size = size
+
+    def _evict_entries(self, entries: list[tuple[float, int, str]], size: int) -> int:
+        target = int(self.max_bytes * EVICTION_TARGET_RATIO)
+        for _, entry_size, path in sorted(entries):
+            if size <= target:
+                break
+            try:
+                os.unlink(path)  # readers keep their mappings after an unlink
+            except FileNotFoundError:
+                continue
+            size -= entry_size
+            with self._lock:
+                self._evictions += 1
+        return size
+
+    def stats(self) -> DiskCacheStats:
+        with self._lock:
+            return DiskCacheStats(
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+            )
@@ -0,0 +1,69 @@
+import hashlib
+
+from .stash import Buffer
+
+# Gear hash (as in FastCDC): each byte shifts the hash left and adds the
+# pseudo-random 64-bit entry of its value, so the top bits of the hash mix
+# all of the last 64 bytes. A cut follows every byte whose hash has its top
+# `n` bits clear: on any varied data, one in 2**n positions.
+GEAR = tuple(
+    int.from_bytes(hashlib.blake2b(bytes([i]), digest_size=8).digest())
+    for i in range(256)
+)
+GEAR_WINDOW = 64
+HASH_MASK = 2**64 - 1
+
+# Marks objects holding a chunk manifest instead of the stash payload.
+MANIFEST_METADATA_KEY = "kstash-manifest"
+CHUNK_KEY_PREFIX = "kstash-chunks/"
+
+
+def chunk_boundaries(
+    data: Buffer,
+    min_size: int,
+    avg_size: int,
+    max_size: int,
+) -> list[int]:
+    """Returns the end offsets of the content-defined chunks of `data`.
+
+    Cut points depend on the surrounding bytes only, so an edit only changes the
+    chunks around it. Chunks span `min_size` to `max_size` bytes, and about
+    `avg_size` on varied data.
+    """
+    view = memoryview(data).cast("B")
+    size = len(view)
+    # Normalized chunking: cuts are harder to find before avg_size and easier
+    # after it, which narrows the spread of chunk sizes.
+    bits = _cut_bits(avg_size - min_size)
+    strict, loose = _cut_mask(bits + 1), _cut_mask(bits - 1)
+
+    boundaries: list[int] = []
+    start = 0
+    while start < size:
+        lo, mid, hi = (min(start + n, size) for n in (min_size, avg_size, max_size))
+        end = _find_cut(view, max(start, lo - GEAR_WINDOW), lo, mid, strict)
+        end = end or _find_cut(view, max(start, mid - GEAR_WINDOW), mid, hi, loose)
+        boundaries.append(end or hi)
+        start = end or hi
+    return boundaries
+
+
+def _cut_bits(spacing: int) -> int:
+    return min(max(spacing.bit_length() - 1, 2), 48)
+
+
+def _cut_mask(bits: int) -> int:
+    return ((1 << bits) - 1) << (64 - bits)
+
+
+def _find_cut(view: memoryview, begin: int, lo: int, hi: int, mask: int) -> int | None:
+    # Only chunk ends past `lo` are searched, but the window before it is hashed
+    # too: cuts then depend on the bytes before them, not on the chunk start.
+    gear, h = GEAR, 0
+    for byte in view[begin:lo]:
+        h = ((h << 1) + gear[byte]) & HASH_MASK
+    for end, byte in enumerate(view[lo:hi], lo + 1):
+        h = ((h << 1) + gear[byte]) & HASH_MASK
+        if not h & mask:
+            return end
+    return None
@@ -0,0 +1,97 @@
+import lzma
+import zlib
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Protocol
+
+from .config import Config
+from .exceptions import UnsupportedOperation
+from .stash import Buffer, Stash
+
+CODEC_METADATA_KEY = "kstash-codec"
+
+
+class Decompressor(Protocol):
+    def decompress(self, data: Buffer, /) -> bytes: ...
+
+
+@dataclass(frozen=True)
+class Codec:
+    name: str
+    compress: Callable[[Buffer], bytes]
+    decompress: Callable[[Buffer], bytes]
+    # Incremental decompression, required to stream compressed payloads.
+    decompressor: Callable[[], Decompressor] | None = None
+
+
+CODEC_REGISTRY: dict[str, Codec] = {}
+
+
+def register_codec(codec: Codec) -> Codec:
+    """Makes a codec selectable through `Config.codec` (e.g. zstd, lz4)."""
+    if codec.name in CODEC_REGISTRY:
+        raise ValueError(f"'{codec.name}' is already registered")
+    CODEC_REGISTRY[codec.name] = codec
+    return codec
+
+
+def get_codec(name: str) -> Codec:
+    try:
+        return CODEC_REGISTRY[name]
+    except KeyError:
+        raise ValueError(f"unknown codec: {name}")
+
+
+def compress(config: Config, encoded: Buffer) -> tuple[str | None, Buffer]:
+    """Returns the codec applied (if any) and the payload to store."""
+    if config.codec is None or len(encoded) < config.codec_min_len:
+        return None, encoded
+    compressed = get_codec(config.codec).compress(encoded)
+    if len(compressed) >= len(encoded):
+        return None, encoded  # not worth it
+    return config.codec, compressed
+
+
+def compress_stash(config: Config, stash: Stash) -> tuple[str | None, Buffer]:
+    """Like `compress`, reused by every backend the same stash is saved to."""
+    key = (config.codec, config.codec_min_len)
+    # Kept off the stash fields, so sealing the stash drops it (see Stash.seal).
+    cache: dict[tuple[str | None, int], tuple[str | None, Buffer]] = (
+        stash.__dict__.setdefault("_compressed", {})
+    )
+    if key not in cache:
+        cache[key] = compress(config, stash.encoded)
+    return cache[key]
+
+
+def decompress(codec_name: str | None, payload: Buffer) -> Buffer:
+    if codec_name is None:
+        return payload
+    return get_codec(codec_name).decompress(payload)
+
+
+def get_decompressor(codec_name: str | None) -> Decompressor | None:
+    if codec_name is None:
+        return None
+    codec = get_codec(codec_name)
+    if codec.decompressor is None:
+        raise UnsupportedOperation(f"codec '{codec_name}' cannot be streamed")
+    return codec.decompressor()
+
+
+register_codec(
+    Codec(
+        name="zlib",
+        compress=zlib.compress,
+        decompress=zlib.decompress,
+        decompressor=zlib.decompressobj,
+    )
+)
+register_codec(
+    Codec(
+        name="lzma",
+        compress=lzma.compress,
+        decompress=lzma.decompress,
+        decompressor=lzma.LZMADecompressor,
+    )
+)
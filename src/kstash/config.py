@@ -1,16 +1,127 @@
 from dataclasses import dataclass, field
 
+from .observe import Observer
+
+MIN_MULTIPART_CHUNK_SIZE = 5 * 1024 * 1024  # S3's minimum part size
+
+
+@dataclass(frozen=True)
+class Route:
+    """Sends stashes whose encoded length is at most `max_len` to `backend`.
+
+    A route without `max_len` takes any remaining size.
+    """
+
+    backend: str
+    max_len: int | None = None
+
+
+@dataclass(frozen=True, kw_only=True)
+class ReadPolicy:
+    """Retries and hedging of S3 reads.
+
+    Failed reads are retried on throttling, 5xx and connection errors, with
+    exponential backoff and full jitter. With `hedge_percentile` set, a read
+    still pending after that percentile of recent read latencies is sent again,
+    and whichever answers first is used.
+    """
+
+    max_retries: int = 3
+    backoff_sec: float = 0.05
+    max_backoff_sec: float = 1.0
+    hedge_percentile: float | None = None
+    hedge_min_delay_sec: float = 0.005
+    hedge_initial_delay_sec: float = 0.05  # until enough latencies are observed
+    latency_window: int = 1000
+
 
 # TODO: improve: adopt pydantic
 @dataclass(kw_only=True, frozen=True)
 class Config:
     max_inline_len: int = 100
     backends: list[str] = field(default_factory=lambda: ["inline", "s3", "https"])
+    routes: list[Route] = field(default_factory=lambda: [])
     share_ttl_sec: int = 10
+    batch_max_workers: int = 16
+    async_max_concurrency: int = 100
+    cache_max_bytes: int = 0
+    disk_cache_dir: str | None = None
+    disk_cache_max_bytes: int = 1024 * 1024 * 1024
+    codec: str | None = None
+    codec_min_len: int = 1024
+    multipart_threshold: int = 64 * 1024 * 1024
+    multipart_chunk_size: int = 16 * 1024 * 1024
+    multipart_max_workers: int = 8
+    s3_download_part_size: int = 8 * 1024 * 1024
+    s3_download_max_workers: int = 8
+    s3_skip_known_present: bool = False
+    hash_algorithm: str = "md5"
+    http_pool_maxsize: int | None = None
+    http_connect_timeout_sec: float = 5.0
+    http_read_timeout_sec: float = 30.0
+    http_max_retries: int = 3
+    http_backoff_factor: float = 0.25
+    mem_max_bytes: int | None = None
+    mem_ttl_sec: float | None = None
+    file_root: str | None = None
+    observers: list[Observer] = field(default_factory=lambda: [])
+    s3_read_policy: ReadPolicy | None = None
+    s3_write_behind: bool = False
+    s3_write_behind_max_workers: int = 4
+    s3_write_behind_max_bytes: int = 256 * 1024 * 1024
+    prefetch_max_inflight: int = 8
+    prefetch_max_bytes: int = 256 * 1024 * 1024
+    s3_chunking: bool = False
+    s3_chunking_threshold: int = 8 * 1024 * 1024
+    s3_chunk_min_size: int = 256 * 1024
+    s3_chunk_avg_size: int = 1024 * 1024
+    s3_chunk_max_size: int = 4 * 1024 * 1024
+
+    def __getstate__(self) -> dict[str, object]:
+        # Copies and pickles leave out the backend pool (see get_backend_pool):
+        # its locks, threads and clients are rebuilt on first use.
+        return {k: v for k, v in vars(self).items() if k != "_backend_pool"}
 
     def __post_init__(self) -> None:
         self._validate_max_inline_len(self.max_inline_len)
         self._validate_backends(self.backends)
+        self._validate_routes(self.routes, self.backends, self.max_inline_len)
+        self._validate_batch_max_workers(self.batch_max_workers)
+        self._validate_async_max_concurrency(self.async_max_concurrency)
+        self._validate_cache_max_bytes(self.cache_max_bytes)
+        self._validate_disk_cache_max_bytes(self.disk_cache_max_bytes)
+        self._validate_codec(self.codec)
+        self._validate_codec_min_len(self.codec_min_len)
+        self._validate_multipart(
+            self.multipart_threshold,
+            self.multipart_chunk_size,
+            self.multipart_max_workers,
+        )
+        self._validate_s3_download(
+            self.s3_download_part_size,
+            self.s3_download_max_workers,
+        )
+        self._validate_hash_algorithm(self.hash_algorithm)
+        self._validate_http(
+            self.http_pool_maxsize,
+            self.http_connect_timeout_sec,
+            self.http_read_timeout_sec,
+            self.http_max_retries,
+            self.http_backoff_factor,
+        )
+        self._validate_mem(self.mem_max_bytes, self.mem_ttl_sec)
+        self._validate_file_root(self.file_root, self.backends)
+        self._validate_s3_read_policy(self.s3_read_policy)
+        self._validate_s3_write_behind(
+            self.s3_write_behind_max_workers,
+            self.s3_write_behind_max_bytes,
+        )
+        self._validate_prefetch(self.prefetch_max_inflight, self.prefetch_max_bytes)
+        self._validate_s3_chunking(
+            self.s3_chunk_min_size,
+            self.s3_chunk_avg_size,
+            self.s3_chunk_max_size,
+        )
 
     def _validate_max_inline_len(self, max_inline_len: int) -> None:
         if max_inline_len < 1:
@@ -23,5 +134,218 @@ class Config:
         if "inline" in backends and backends.index("inline") != 0:
             raise ValueError("invalid config (backends): inline must come first")
 
+    def _validate_routes(
+        self, routes: list[Route], backends: list[str], max_inline_len: int
+    ) -> None:
+        max_len = -1
+        for index, route in enumerate(routes):
+            if route.backend not in backends:
+                raise ValueError(
+                    f"invalid config (routes): '{route.backend}' is not in backends"
+                )
+            if route.backend == "inline" and not self._fits_inline(
+                route.max_len, max_inline_len
+            ):
+                raise ValueError(
+                    "invalid config (routes): inline max_len must be at most "
+                    f"{max_inline_len // 4 * 3} to fit max_inline_len"
+                )
+            if route.max_len is None:
+                if index != len(routes) - 1:
+                    raise ValueError(
+                        "invalid config (routes): only the last route may be unbounded"
+                    )
+                continue
+            if route.max_len <= max_len:
+                raise ValueError(
+                    "invalid config (routes): max_len must be strictly increasing"
+                )
+            max_len = route.max_len
+
+    def _fits_inline(self, max_len: int | None, max_inline_len: int) -> bool:
+        from .backend_inline import base64_len
+
+        return max_len is not None and base64_len(max_len) <= max_inline_len
+
+    def _validate_batch_max_workers(self, batch_max_workers: int) -> None:
+        if batch_max_workers < 1:
+            raise ValueError(
+                "invalid config (batch_max_workers): must be greater than 0"
+            )
+
+    def _validate_async_max_concurrency(self, async_max_concurrency: int) -> None:
+        if async_max_concurrency < 1:
+            raise ValueError(
+                "invalid config (async_max_concurrency): must be greater than 0"
+            )
+
+    def _validate_cache_max_bytes(self, cache_max_bytes: int) -> None:
+        if cache_max_bytes < 0:
+            raise ValueError("invalid config (cache_max_bytes): must not be negative")
+
+    def _validate_disk_cache_max_bytes(self, disk_cache_max_bytes: int) -> None:
+        if disk_cache_max_bytes < 1:
+            raise ValueError(
+                "invalid config (disk_cache_max_bytes): must be greater than 0"
+            )
+
+    def _validate_codec(self, codec: str | None) -> None:
+        if codec is None:
+            return
+
+        from .codec import CODEC_REGISTRY
+
+        if codec not in CODEC_REGISTRY:
+            raise ValueError(f"invalid config (codec): '{codec}' is not registered")
+
+    def _validate_codec_min_len(self, codec_min_len: int) -> None:
+        if codec_min_len < 0:
+            raise ValueError("invalid config (codec_min_len): must not be negative")
+
+    def _validate_multipart(
+        self,
+        multipart_threshold: int,
+        multipart_chunk_size: int,
+        multipart_max_workers: int,
+    ) -> None:
+        if multipart_chunk_size < MIN_MULTIPART_CHUNK_SIZE:
+            raise ValueError(
+                "invalid config (multipart_chunk_size): must be at least 5 MiB"
+            )
+        if multipart_threshold < multipart_chunk_size:
+            raise ValueError(
+                "invalid config (multipart_threshold): below multipart_chunk_size"
+            )
+        if multipart_max_workers < 1:
+            raise ValueError(
+                "invalid config (multipart_max_workers): must be greater than 0"
+            )
+
+    def _validate_s3_download(
+        self,
+        s3_download_part_size: int,
+        s3_download_max_workers: int,
+    ) -> None:
+        if s3_download_part_size < 1:
+            raise ValueError(
+                "invalid config (s3_download_part_size): must be greater than 0"
+            )
+        if s3_download_max_workers < 1:
+            raise ValueError(
+                "invalid config (s3_download_max_workers): must be greater than 0"
+            )
+
+    def _validate_hash_algorithm(self, hash_algorithm: str) -> None:
+        from .digest import HASH_ALGORITHMS
+
+        if hash_algorithm not in HASH_ALGORITHMS:
+            raise ValueError(
+                f"invalid config (hash_algorithm): '{hash_algorithm}' is not available"
+            )
+
+    def _validate_http(
+        self,
+        http_pool_maxsize: int | None,
+        http_connect_timeout_sec: float,
+        http_read_timeout_sec: float,
+        http_max_retries: int,
+        http_backoff_factor: float,
+    ) -> None:
+        if http_pool_maxsize is not None and http_pool_maxsize < 1:
+            raise ValueError(
+                "invalid config (http_pool_maxsize): must be greater than 0"
+            )
+        if http_connect_timeout_sec <= 0:
+            raise ValueError(
+                "invalid config (http_connect_timeout_sec): must be greater than 0"
+            )
+        if http_read_timeout_sec <= 0:
+            raise ValueError(
+                "invalid config (http_read_timeout_sec): must be greater than 0"
+            )
+        if http_max_retries < 0:
+            raise ValueError("invalid config (http_max_retries): must not be negative")
+        if http_backoff_factor < 0:
+            raise ValueError(
+                "invalid config (http_backoff_factor): must not be negative"
+            )
+
+    def _validate_mem(
+        self, mem_max_bytes: int | None, mem_ttl_sec: float | None
+    ) -> None:
+        if mem_max_bytes is not None and mem_max_bytes < 1:
+            raise ValueError("invalid config (mem_max_bytes): must be greater than 0")
+        if mem_ttl_sec is not None and mem_ttl_sec <= 0:
+            raise ValueError("invalid config (mem_ttl_sec): must be greater than 0")
+
+    def _validate_file_root(self, file_root: str | None, backends: list[str]) -> None:
+        if "file" in backends and not file_root:
+            raise ValueError("invalid config (file_root): required by the file backend")
+
+    def _validate_s3_read_policy(self, policy: ReadPolicy | None) -> None:
+        if policy is None:
+            return
+        if policy.max_retries < 0:
+            raise ValueError("invalid config (s3_read_policy): max_retries is negative")
+        if policy.backoff_sec < 0 or policy.max_backoff_sec < policy.backoff_sec:
+            raise ValueError(
+                "invalid config (s3_read_policy): backoff_sec must be within "
+                "0 and max_backoff_sec"
+            )
+        if (
+            policy.hedge_percentile is not None
+            and not 0 < policy.hedge_percentile < 100
+        ):
+            raise ValueError(
+                "invalid config (s3_read_policy): hedge_percentile must be within "
+                "0 and 100"
+            )
+        if policy.latency_window < 1:
+            raise ValueError(
+                "invalid config (s3_read_policy): latency_window must be greater than 0"
+            )
+
+    def _validate_s3_write_behind(
+        self,
+        s3_write_behind_max_workers: int,
+        s3_write_behind_max_bytes: int,
+    ) -> None:
+        if s3_write_behind_max_workers < 1:
+            raise ValueError(
+                "invalid config (s3_write_behind_max_workers): must be greater than 0"
+            )
+        if s3_write_behind_max_bytes < 1:
+            raise ValueError(
+                "invalid config (s3_write_behind_max_bytes): must be greater than 0"
+            )
+
+    def _validate_prefetch(
+        self, prefetch_max_inflight: int, prefetch_max_bytes: int
+    ) -> None:
+        if prefetch_max_inflight < 1:
+            raise ValueError(
+                "invalid config (prefetch_max_inflight): must be greater than 0"
+            )
+        if prefetch_max_bytes < 1:
+            raise ValueError(
+                "invalid config (prefetch_max_bytes): must be greater than 0"
+            )
+
+    def _validate_s3_chunking(
+        self,
+        s3_chunk_min_size: int,
+        s3_chunk_avg_size: int,
+        s3_chunk_max_size: int,
+    ) -> None:
+        if s3_chunk_min_size < 1:
+            raise ValueError(
+                "invalid config (s3_chunk_min_size): must be greater than 0"
+            )
+        if not s3_chunk_min_size < s3_chunk_avg_size < s3_chunk_max_size:
+            raise ValueError(
+                "invalid config (s3_chunk_avg_size): must be within "
+                "s3_chunk_min_size and s3_chunk_max_size"
+            )
+
 
 CONFIG = Config()
@@ -0,0 +1,67 @@
+import functools
+import hashlib
+import re
+from collections.abc import Buffer, Callable
+from typing import Protocol
+
+DEFAULT_HASH_ALGORITHM = "md5"
+
+
+class Hasher(Protocol):
+    def update(self, data: Buffer, /) -> None: ...
+
+    def hexdigest(self) -> str: ...
+
+
+HASH_ALGORITHMS: dict[str, Callable[[], Hasher]] = {
+    "md5": hashlib.md5,
+    "sha256": hashlib.sha256,
+    "blake2b": functools.partial(hashlib.blake2b, digest_size=16),
+}
+
+try:
+    import xxhash  # type: ignore
+
+    HASH_ALGORITHMS["xxh3"] = xxhash.xxh3_128  # type: ignore
+except ImportError:  # pragma: no cover
+    pass
+
+# Digests are tagged with their algorithm, e.g. `blake2b-<hex>`, except md5
+# digests which keep the original untagged `<32 hex>` form.
+DIGEST_PATH_REGEX = re.compile(
+    r"(?P<name>.*)\.(?P<digest>[a-f0-9]{32}|[a-z][a-z0-9]*-[a-f0-9]+)$"
+)
+
+
+def new_hasher(algorithm: str) -> Hasher:
+    try:
+        return HASH_ALGORITHMS[algorithm]()
+    except KeyError:
+        raise ValueError(f"unknown hash algorithm: {algorithm}")
+
+
+def format_digest(algorithm: str, hexdigest: str) -> str:
+    if algorithm == DEFAULT_HASH_ALGORITHM:
+        return hexdigest
+    return f"{algorithm}-{hexdigest}"
+
+
+def hash_digest(algorithm: str, data: Buffer) -> str:
+    hasher = new_hasher(algorithm)
+    hasher.update(data)
+    return format_digest(algorithm, hasher.hexdigest())
+
+
+def digest_algorithm(digest: str) -> str:
+    algorithm, sep, _ = digest.partition("-")
+    return algorithm if sep else DEFAULT_HASH_ALGORITHM
+
+
+def parse_digest_path(path: str) -> tuple[str, str]:
+    """Splits a `name.<digest>` address path into its name and digest."""
+    if not (match := DIGEST_PATH_REGEX.match(path)):
+        raise ValueError(f"invalid address path: {path}")
+    name, digest = match.group("name", "digest")
+    if digest_algorithm(digest) not in HASH_ALGORITHMS:
+        raise ValueError(f"invalid address path: {path}")
+    return name.strip("/"), digest
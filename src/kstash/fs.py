@@ -0,0 +1,49 @@
+import mmap
+import os
+import tempfile
+from collections.abc import Iterable
+
+from .stash import Buffer
+
+
+def write_atomic(path: str, data: Buffer | Iterable[Buffer]) -> None:
+    """Writes data, or chunks of it, so that readers never observe a partial file.
+
+    The data and the rename are synced to disk, so that a crash cannot leave a
+    truncated file in place: callers skip writing to paths that exist.
+    """
+    dirname = os.path.dirname(path)
+    os.makedirs(dirname, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=dirname, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as file:
+            if isinstance(data, (bytes, bytearray, memoryview)):
+                file.write(data)
+            else:
+                file.writelines(data)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_path, path)
+        _fsync_dir(dirname)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+def _fsync_dir(dirname: str) -> None:
+    fd = os.open(dirname, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def read_mmap(path: str) -> memoryview:
+    """Maps path read-only, the mapping outlives a later unlink of the file."""
+    with open(path, "rb") as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            return memoryview(b"")
+        return memoryview(mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ))
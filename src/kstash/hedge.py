@@ -0,0 +1,142 @@
+import random
+import statistics
+import threading
+import time
+from collections import deque
+from collections.abc import Callable
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+
+from .config import ReadPolicy
+
+# The hedge delay is recomputed after this many new latency samples.
+HEDGE_DELAY_REFRESH = 50
+
+
+@dataclass(frozen=True)
+class ReadStats:
+    reads: int = 0
+    retries: int = 0
+    hedges: int = 0
+    hedge_wins: int = 0
+
+
+@dataclass
+class HedgedReader:
+    """Runs reads under a `ReadPolicy`: retried on transient errors, and hedged."""
+
+    policy: ReadPolicy
+    is_retryable: Callable[[Exception], bool]
+    max_workers: int = 32
+    _latencies: deque[float] = field(init=False)
+    _hedge_delay_sec: float = field(init=False)
+    _samples: int = 0
+    _executor: ThreadPoolExecutor | None = None
+    _lock: threading.Lock = field(default_factory=threading.Lock)
+    _reads: int = 0
+    _retries: int = 0
+    _hedges: int = 0
+    _hedge_wins: int = 0
+
+    def __post_init__(self):
+        self._latencies = deque(maxlen=self.policy.latency_window)
+        self._hedge_delay_sec = self.policy.hedge_initial_delay_sec
+
+    def read[T](self, fn: Callable[[], T], discard: Callable[[T], None]) -> T:
+        """Calls `fn` until it succeeds or retries run out.
+
+        `discard` releases the result of a hedged call that lost the race.
+        """
+        with self._lock:
+            self._reads += 1
+        attempt = 0
+        while True:
+            try:
+                if self.policy.hedge_percentile is None:
+                    return self._timed(fn)
+                return self._hedged(fn, discard)
+            except Exception as error:
+                if attempt >= self.policy.max_retries or not self.is_retryable(error):
+                    raise
+            attempt += 1
+            with self._lock:
+                self._retries += 1
+            backoff = min(
+                self.policy.max_backoff_sec, self.policy.backoff_sec * 2**attempt
+            )
+            time.sleep(random.uniform(0, backoff))
+
+    def stats(self) -> ReadStats:
+        with self._lock:
+            return ReadStats(
+                reads=self._reads,
+                retries=self._retries,
+                hedges=self._hedges,
+                hedge_wins=self._hedge_wins,
+            )
+
+    @property
+    def hedge_delay_sec(self) -> float:
+        return self._hedge_delay_sec
+
+    def _hedged[T](self, fn: Callable[[], T], discard: Callable[[T], None]) -> T:
+        executor = self._get_executor()
+        primary = executor.submit(self._timed, fn)
+        done, _ = wait([primary], timeout=self._hedge_delay_sec)
+        if done:
+            return primary.result()
+
+        with self._lock:
+            self._hedges += 1
+        hedge = executor.submit(self._timed, fn)
+        pending = {primary, hedge}
+        error: BaseException | None = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if (error := future.exception()) is not None:
+                    continue  # the other call may still succeed
+                for loser in pending:
+                    loser.add_done_callback(_discard_result(discard))
+                if future is hedge:
+                    with self._lock:
+                        self._hedge_wins += 1
+                return future.result()
+        assert error is not None
+        raise error
+
+    def _timed[T](self, fn: Callable[[], T]) -> T:
+        start = time.perf_counter()
+        result = fn()
+        self._observe(time.perf_counter() - start)
+        return result
+
+    def _observe(self, latency_sec: float) -> None:
+        with self._lock:
+            self._latencies.append(latency_sec)
+            self._samples += 1
+            if self.policy.hedge_percentile is None:
+                return
+            if self._samples % HEDGE_DELAY_REFRESH or len(self._latencies) < 2:
+                return
+            cut = statistics.quantiles(self._latencies, n=1000, method="inclusive")
+            delay = cut[max(int(self.policy.hedge_percentile * 10) - 1, 0)]
+            self._hedge_delay_sec = max(self.policy.hedge_min_delay_sec, delay)
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    self.max_workers, thread_name_prefix="kstash-hedge"
+                )
+            return self._executor
+
+
+def _discard_result[T](
+    discard: Callable[[T], None],
+) -> Callable[[Future[T]], None]:
+    def callback(future: Future[T]) -> None:
+        if future.exception() is None:
+            discard(future.result())
+
+    return callback
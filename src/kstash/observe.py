@@ -0,0 +1,126 @@
+import bisect
+import threading
+import time
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+from typing import Protocol
+
+# Upper bounds of the histogram buckets: 1us doubling up to ~2 minutes.
+DEFAULT_BUCKETS_SEC = tuple(1e-6 * 2**i for i in range(28))
+
+
+@dataclass(frozen=True)
+class Event:
+    """One timed phase of a stash operation.
+
+    Phases: encode, hash, decode, backend.save, backend.skip, backend.load,
+    network, cache.hit, cache.miss, disk_cache.hit and disk_cache.miss.
+    """
+
+    phase: str
+    duration_sec: float
+    nbytes: int = 0
+    backend: str | None = None
+
+
+class Observer(Protocol):
+    def __call__(self, event: Event) -> None: ...
+
+
+def notify(
+    observers: Sequence[Observer],
+    phase: str,
+    start: float,
+    nbytes: int = 0,
+    backend: str | None = None,
+) -> None:
+    """Reports a phase started at `start` (a `time.perf_counter()` reading)."""
+    event = Event(
+        phase=phase,
+        duration_sec=time.perf_counter() - start,
+        nbytes=nbytes,
+        backend=backend,
+    )
+    for observer in observers:
+        observer(event)
+
+
+@dataclass(frozen=True)
+class Histogram:
+    count: int
+    total_sec: float
+    nbytes: int
+    min_sec: float
+    max_sec: float
+    bounds_sec: tuple[float, ...]
+    counts: tuple[int, ...]
+
+    def percentile(self, pct: float) -> float:
+        """Upper bound of the bucket holding the given percentile of events."""
+        if not self.count:
+            return 0.0
+        rank = pct / 100 * self.count
+        seen = 0
+        for bound, count in zip(self.bounds_sec, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max_sec)
+        return self.max_sec
+
+
+@dataclass
+class _Series:
+    counts: list[int]
+    count: int = 0
+    total_sec: float = 0.0
+    nbytes: int = 0
+    min_sec: float = float("inf")
+    max_sec: float = 0.0
+
+
+@dataclass
+class HistogramCollector:
+    """Observer aggregating event durations per (phase, backend) in memory."""
+
+    bounds_sec: tuple[float, ...] = DEFAULT_BUCKETS_SEC
+    _series: dict[tuple[str, str | None], _Series] = field(default_factory=lambda: {})
+    _lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def __call__(self, event: Event) -> None:
+        index = bisect.bisect_left(self.bounds_sec, event.duration_sec)
+        key = (event.phase, event.backend)
+        with self._lock:
+            if (series := self._series.get(key)) is None:
+                series = _Series(counts=[0] * (len(self.bounds_sec) + 1))
+                self._series[key] = series
+            series.counts[index] += 1
+            series.count += 1
+            series.total_sec += event.duration_sec
+            series.nbytes += event.nbytes
+            series.min_sec = min(series.min_sec, event.duration_sec)
+            series.max_sec = max(series.max_sec, event.duration_sec)
+
+    def get(self, phase: str, backend: str | None = None) -> Histogram | None:
+        with self._lock:
+            if (series := self._series.get((phase, backend))) is None:
+                return None
+            return self._histogram(series)
+
+    def snapshot(self) -> dict[tuple[str, str | None], Histogram]:
+        with self._lock:
+            return {key: self._histogram(s) for key, s in self._series.items()}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+    def _histogram(self, series: _Series) -> Histogram:
+        return Histogram(
+            count=series.count,
+            total_sec=series.total_sec,
+            nbytes=series.nbytes,
+            min_sec=series.min_sec,
+            max_sec=series.max_sec,
+            bounds_sec=self.bounds_sec + (float("inf"),),
+            counts=tuple(series.counts),
+        )
@@ -0,0 +1,127 @@
+import functools
+import threading
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+from .cache import StashCache
+from .stash import Buffer
+
+
+@dataclass
+class SingleFlight:
+    """Coalesces concurrent loads of one key into a single call."""
+
+    _flights: dict[str, Future[Buffer]] = field(default_factory=lambda: {})
+    _joined: set[str] = field(default_factory=lambda: set[str]())
+    _lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def run(self, key: str, load: Callable[[], Buffer]) -> Buffer:
+        """Returns the result of the load in flight for `key`, or of `load`."""
+        future, leader = self.begin(key)
+        if leader:
+            self.complete(key, future, load)
+        return future.result()
+
+    def begin(self, key: str) -> tuple[Future[Buffer], bool]:
+        """Joins the flight for `key`, leading a new one if there is none.
+
+        The leader must `complete` the flight, other callers wait on it.
+        """
+        with self._lock:
+            if (future := self._flights.get(key)) is not None:
+                self._joined.add(key)
+                return future, False
+            future = self._flights[key] = Future()
+            return future, True
+
+    def complete(
+        self,
+        key: str,
+        future: Future[Buffer],
+        load: Callable[[], Buffer],
+        unclaimed: Callable[[Buffer], None] | None = None,
+    ) -> None:
+        """Runs `load` for the flight led by the caller.
+
+        `unclaimed` gets the result if no other caller joined the flight. It runs
+        before the flight lands, so callers starting a flight afterwards see it.
+        """
+        try:
+            result = load()
+        except BaseException as e:
+            with self._lock:
+                self._land(key)
+            future.set_exception(e)
+            return
+        with self._lock:
+            if unclaimed is not None and key not in self._joined:
+                unclaimed(result)
+            self._land(key)
+        future.set_result(result)
+
+    def _land(self, key: str) -> None:
+        del self._flights[key]
+        self._joined.discard(key)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._flights
+
+
+@dataclass
+class Prefetcher:
+    """Loads encoded stashes in the background, holding them until first retrieved.
+
+    At most `max_inflight` loads run at once. Prefetched stashes are bounded by
+    `max_bytes`, the least recently prefetched ones being dropped first.
+    """
+
+    flights: SingleFlight
+    max_inflight: int
+    max_bytes: int
+    store: StashCache = field(init=False)
+    _queued: set[str] = field(default_factory=lambda: set[str]())
+    _executor: ThreadPoolExecutor | None = None
+    _lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def __post_init__(self):
+        self.store = StashCache(max_bytes=self.max_bytes)
+
+    def submit(self, key: str, load: Callable[[], Buffer]) -> None:
+        """Queues loading `key`, unless it is prefetched, queued or in flight.
+
+        Loads join the flight for `key` when they start, not while queued, and a
+        retrieve taking a queued key loads it itself. Loads joined by a retrieve
+        are handed over to it instead of being held.
+        """
+        if key in self.store or key in self.flights:
+            return
+        with self._lock:
+            if key in self._queued:
+                return
+            self._queued.add(key)
+        self._get_executor().submit(self._run, key, load)
+
+    def pop(self, key: str) -> Buffer | None:
+        """Takes the stash prefetched for `key`, cancelling its load if queued."""
+        with self._lock:
+            self._queued.discard(key)
+        return self.store.pop(key)
+
+    def _run(self, key: str, load: Callable[[], Buffer]) -> None:
+        with self._lock:
+            if key not in self._queued:
+                return  # taken by a retrieve meanwhile
+            self._queued.discard(key)
+        future, leader = self.flights.begin(key)
+        if leader:
+            store = functools.partial(self.store.put, key)
+            self.flights.complete(key, future, load, store)
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    self.max_inflight, thread_name_prefix="kstash-prefetch"
+                )
+            return self._executor
@@ -1,10 +1,13 @@
-import hashlib
-from dataclasses import dataclass, field
-from typing import TYPE_CHECKING
+import time
+from collections.abc import Sequence
+from dataclasses import InitVar, dataclass, field
+from typing import TYPE_CHECKING, TypeIs
 
 import msgpack
 
 from .address import Address
+from .digest import DEFAULT_HASH_ALGORITHM, hash_digest
+from .observe import Observer, notify
 
 if TYPE_CHECKING:
     from .backend_base import Backend
@@ -14,6 +17,13 @@ type JSONData = (
 )
 type BinData = bytes | bytearray
 type ArgData = JSONData | BinData
+type Buffer = bytes | bytearray | memoryview
+
+# Binary payloads above msgpack's bin limit are split into parts, encoded as
+# [LARGE_BIN_MARKER, *parts]: the marker tells them apart from plain lists.
+MAX_BIN_LEN = 2**32 - 1
+LARGE_BIN_EXT_CODE = 0x4B
+LARGE_BIN_MARKER = msgpack.ExtType(LARGE_BIN_EXT_CODE, b"")
 
 
 @dataclass(kw_only=True, frozen=True)
@@ -21,15 +31,92 @@ class Stash:
     namespace: str = "default"
     name: str
     data: ArgData
-    encoded: bytes = field(init=False)
-    md5: str = field(init=False)
+    encoded: Buffer = field(init=False)
+    digest: str = field(init=False)
+    hash_algorithm: InitVar[str] = DEFAULT_HASH_ALGORITHM
+    observers: InitVar[Sequence[Observer]] = ()
+
+    def __post_init__(self, hash_algorithm: str, observers: Sequence[Observer]):
+        start = time.perf_counter()
+        encoded = self._encode(self.data)
+        object.__setattr__(self, "encoded", encoded)
+        if observers:
+            notify(observers, "encode", start, len(encoded))
+            start = time.perf_counter()
+        object.__setattr__(self, "digest", hash_digest(hash_algorithm, encoded))
+        if observers:
+            notify(observers, "hash", start, len(encoded))
+
+    @classmethod
+    def from_encoded(
+        cls,
+        encoded: Buffer,
+        *,
+        name: str,
+        namespace: str = "default",
+        digest: str | None = None,
+        hash_algorithm: str = DEFAULT_HASH_ALGORITHM,
+    ) -> "Stash":
+        """Builds a stash from already encoded bytes without encoding them again.
+
+        The bytes are only hashed when no digest is given, and only decoded on
+        first access to `data`.
+        """
+        return _assemble(
+            cls,
+            namespace=namespace,
+            name=name,
+            encoded=encoded,
+            digest=digest or hash_digest(hash_algorithm, encoded),
+        )
 
-    def __post_init__(self):
-        object.__setattr__(self, "encoded", self._encode(self.data))
-        object.__setattr__(self, "md5", hashlib.md5(self.encoded).hexdigest())
+    @classmethod
+    def from_digest(
+        cls, *, name: str, namespace: str = "default", digest: str
+    ) -> "Stash":
+        """Builds a stash whose payload is not held in memory.
+
+        Once sealed, `encoded` and `data` are loaded from its backend on access.
+        """
+        return _assemble(cls, namespace=namespace, name=name, digest=digest)
+
+    @property
+    def md5(self) -> str:
+        """Alias of `digest`, kept for backwards compatibility."""
+        return self.digest
+
+    def __getattr__(self, name: str) -> ArgData | Buffer:
+        # Only reached for payload fields still pending (see from_encoded/from_digest).
+        fields = self.__dict__
+        if name == "encoded" and "address" in fields:
+            encoded = fields["backend"].load_stash(fields["address"]).encoded
+            object.__setattr__(self, "encoded", encoded)
+            return encoded
+        if name == "data" and ("encoded" in fields or "address" in fields):
+            encoded = self.encoded
+            start = time.perf_counter()
+            data = _decode(encoded)
+            object.__setattr__(self, "data", data)
+            backend = fields.get("backend")
+            if backend is not None and backend.config.observers:
+                notify(
+                    backend.config.observers,
+                    "decode",
+                    start,
+                    len(encoded),
+                    backend.name,
+                )
+            return data
+        raise AttributeError(name)
+
+    @property
+    def is_decoded(self) -> bool:
+        return "data" in self.__dict__
 
     def _encode(self, data: ArgData) -> bytes:
         try:
+            if isinstance(data, bytes | bytearray) and len(data) > MAX_BIN_LEN:
+                return msgpack.packb([LARGE_BIN_MARKER, *_split_bin(data)])
             return msgpack.packb(data)
         except Exception as error:
             raise ValueError(f"invalid data: {data}") from error
@@ -43,14 +130,14 @@ class Stash:
         return (
             self.name == other.name
             and self.namespace == other.namespace
-            and self.md5 == other.md5
+            and self.digest == other.digest
         )
 
     def seal(self, backend: "Backend", address: Address | None = None) -> "SealedStash":
-        return SealedStash(
-            namespace=self.namespace,
-            name=self.name,
-            data=self.data,
+        fields = {k: v for k, v in self.__dict__.items() if k in _STASH_FIELDS}
+        return _assemble(
+            SealedStash,
+            **fields,
             backend=backend,
             address=address or backend.make_address(self),
         )
@@ -69,3 +156,33 @@ class SealedStash(Stash):
 
     def share(self, ttl_sec: int | None = None) -> "Address":
         return self.backend.make_share_address(self, ttl_sec)
+
+
+_STASH_FIELDS = ("namespace", "name", "data", "encoded", "digest")
+
+
+def _assemble[T: Stash](cls: type[T], **fields: object) -> T:
+    # Bypasses __post_init__ for stashes whose encoded form is already known.
+    stash = object.__new__(cls)
+    for key, value in fields.items():
+        object.__setattr__(stash, key, value)
+    return stash
+
+
+def _split_bin(data: BinData) -> list[memoryview]:
+    view = memoryview(data)
+    return [view[i : i + MAX_BIN_LEN] for i in range(0, len(view), MAX_BIN_LEN)]
+
+
+def _decode(encoded: Buffer) -> ArgData:
+    data = msgpack.unpackb(encoded)
+    if _is_split_bin(data):
+        return b"".join(data[1:])
+    return data
+
+
+def _is_split_bin(data: object) -> TypeIs[list[bytes]]:
+    # The marker is not bytes, but only the parts after it are read.
+    if not isinstance(data, list):
+        return False
+    return data[:1] == [LARGE_BIN_MARKER]  # type: ignore
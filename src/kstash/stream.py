@@ -0,0 +1,246 @@
+import io
+import shutil
+import tempfile
+import threading
+from collections.abc import Callable, Generator, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import IO, TYPE_CHECKING, TypeIs
+
+import msgpack
+
+from .codec import Decompressor
+from .digest import DEFAULT_HASH_ALGORITHM, format_digest, new_hasher
+from .stash import LARGE_BIN_MARKER, MAX_BIN_LEN, Buffer
+
+if TYPE_CHECKING:
+    from _typeshed import WriteableBuffer
+
+type StreamData = IO[bytes] | Iterator[bytes]
+
+
+def is_stream(data: object) -> TypeIs[StreamData]:
+    return is_file(data) or isinstance(data, Iterator)
+
+
+def is_file(data: object) -> TypeIs[IO[bytes]]:
+    # Checked first: file objects are iterators too, but of lines.
+    return hasattr(data, "read")
+
+
+def read_stream(data: StreamData) -> bytes:
+    if is_file(data):
+        return data.read()
+    return b"".join(data)
+
+
+def bin_header(size: int) -> bytes:
+    """Returns the msgpack header of a binary payload of the given size."""
+    if size < 2**8:
+        return b"\xc4" + size.to_bytes(1, "big")
+    if size < 2**16:
+        return b"\xc5" + size.to_bytes(2, "big")
+    if size <= MAX_BIN_LEN:
+        return b"\xc6" + size.to_bytes(4, "big")
+    raise ValueError("data: too large, binary payloads are limited to 4 GiB")
+
+
+def bin_frames(size: int) -> list[tuple[bytes, int]]:
+    """Returns the msgpack framing of a binary payload of the given size.
+
+    Each header is followed by the given number of payload bytes. Payloads over
+    MAX_BIN_LEN are split into parts, as `Stash` does.
+    """
+    if size <= MAX_BIN_LEN:
+        return [(bin_header(size), size)]
+    parts = [MAX_BIN_LEN] * (size // MAX_BIN_LEN)
+    if size % MAX_BIN_LEN:
+        parts.append(size % MAX_BIN_LEN)
+    head = array_header(len(parts) + 1) + LARGE_BIN_HEADER
+    frames = [(bin_header(part), part) for part in parts]
+    frames[0] = (head + frames[0][0], frames[0][1])
+    return frames
+
+
+def array_header(length: int) -> bytes:
+    """Returns the msgpack header of an array of the given length."""
+    if length < 16:
+        return bytes([0x90 | length])
+    if length < 2**16:
+        return b"\xdc" + length.to_bytes(2, "big")
+    return b"\xdd" + length.to_bytes(4, "big")
+
+
+BIN_HEADER_SIZES = {0xC4: 1, 0xC5: 2, 0xC6: 4}
+ARRAY_HEADER_SIZES = {0xDC: 2, 0xDD: 4}
+LARGE_BIN_HEADER = msgpack.packb(LARGE_BIN_MARKER)
+
+
+@dataclass
+class EncodedStream:
+    """Random access to the msgpack encoding of a binary stream.
+
+    The encoding matches `Stash(data=payload).encoded`, so a streamed stash gets
+    the same address as one created from the same bytes in memory.
+    """
+
+    file: IO[bytes]
+    offset: int
+    payload_size: int
+    hash_algorithm: str = DEFAULT_HASH_ALGORITHM
+    frames: list[tuple[bytes, int]] = field(init=False)
+    digest: str = field(init=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def __post_init__(self):
+        self.frames = bin_frames(self.payload_size)
+        self.digest = self._hash()
+
+    @property
+    def size(self) -> int:
+        return sum(len(header) for header, _ in self.frames) + self.payload_size
+
+    @classmethod
+    @contextmanager
+    def open(
+        cls,
+        data: StreamData,
+        chunk_size: int,
+        hash_algorithm: str = DEFAULT_HASH_ALGORITHM,
+    ) -> Generator["EncodedStream"]:
+        if is_file(data) and data.seekable():
+            offset = data.tell()
+            size = data.seek(0, io.SEEK_END) - offset
+            yield cls(
+                file=data,
+                offset=offset,
+                payload_size=size,
+                hash_algorithm=hash_algorithm,
+            )
+            return
+
+        # Sizing and hashing need a second pass: spool through a temp file.
+        with tempfile.SpooledTemporaryFile(max_size=chunk_size) as spool:
+            if is_file(data):
+                shutil.copyfileobj(data, spool, chunk_size)
+            else:
+                for chunk in data:
+                    spool.write(chunk)
+            yield cls(
+                file=spool,
+                offset=0,
+                payload_size=spool.tell(),
+                hash_algorithm=hash_algorithm,
+            )
+
+    def read(self, start: int, length: int) -> bytes:
+        """Reads `length` bytes of the encoding starting at `start`."""
+        end = start + length
+        chunks: list[bytes] = []
+        position = offset = 0  # in the encoding and in the payload
+        for header, part in self.frames:
+            if start < position + len(header) and position < end:
+                chunks.append(header[max(start - position, 0) : end - position])
+            position += len(header)
+            if start < position + part and position < end:
+                lo, hi = max(start, position), min(end, position + part)
+                with self._lock:
+                    self.file.seek(self.offset + offset + lo - position)
+                    chunks.append(self.file.read(hi - lo))
+            position += part
+            offset += part
+        return b"".join(chunks)
+
+    def _hash(self) -> str:
+        hasher = new_hasher(self.hash_algorithm)
+        self.file.seek(self.offset)
+        for header, part in self.frames:
+            hasher.update(header)
+            while part and (chunk := self.file.read(min(part, 1024 * 1024))):
+                hasher.update(chunk)
+                part -= len(chunk)
+        return format_digest(self.hash_algorithm, hasher.hexdigest())
+
+
+class ChunkReader(io.RawIOBase):
+    """Adapts a `read(size)` callable to a raw stream, decompressing on the fly."""
+
+    def __init__(
+        self,
+        read: Callable[[int], Buffer],
+        decompressor: Decompressor | None = None,
+        close: Callable[[], None] | None = None,
+    ):
+        self._read = read
+        self._decompressor = decompressor
+        self._close = close
+        self._pending = memoryview(b"")
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: "WriteableBuffer", /) -> int:
+        view = memoryview(buffer).cast("B")
+        while not self._pending:
+            if not (chunk := self._read(len(view))):
+                return 0
+            if self._decompressor is not None:
+                chunk = self._decompressor.decompress(chunk)
+            self._pending = memoryview(chunk)
+        size = min(len(view), len(self._pending))
+        view[:size] = self._pending[:size]
+        self._pending = self._pending[size:]
+        return size
+
+    def close(self) -> None:
+        if not self.closed and self._close is not None:
+            self._close()
+        super().close()
+
+
+def open_payload(encoded: IO[bytes]) -> io.BufferedReader:
+    """Returns a reader over the binary payload carried by a msgpack stream."""
+    try:
+        remaining, parts = _read_payload_head(encoded)
+    except ValueError:
+        encoded.close()
+        raise
+
+    def read(size: int) -> bytes:
+        nonlocal parts, remaining
+        while not remaining:
+            if not parts:
+                return b""
+            parts -= 1
+            remaining = _read_bin_size(encoded)
+        if not (chunk := encoded.read(min(size, remaining))):
+            raise ValueError("data: truncated stream")
+        remaining -= len(chunk)
+        return chunk
+
+    return io.BufferedReader(ChunkReader(read, close=encoded.close))
+
+
+def _read_payload_head(encoded: IO[bytes]) -> tuple[int, int]:
+    # Returns the size of the first part, and the number of parts after it.
+    header = encoded.read(1)
+    if header and 0x90 <= header[0] <= 0x9F:
+        length = header[0] & 0x0F
+    elif header and header[0] in ARRAY_HEADER_SIZES:
+        length = int.from_bytes(encoded.read(ARRAY_HEADER_SIZES[header[0]]), "big")
+    else:
+        return _read_bin_size(encoded, header), 0
+    if length < 2 or encoded.read(len(LARGE_BIN_HEADER)) != LARGE_BIN_HEADER:
+        raise ValueError("data: not binary, cannot be streamed")
+    return _read_bin_size(encoded), length - 2
+
+
+def _read_bin_size(encoded: IO[bytes], header: bytes | None = None) -> int:
+    if header is None:
+        header = encoded.read(1)
+    if not header or header[0] not in BIN_HEADER_SIZES:
+        raise ValueError("data: not binary, cannot be streamed")
+    size_len = BIN_HEADER_SIZES[header[0]]
+    if len(size := encoded.read(size_len)) < size_len:
+        raise ValueError("data: truncated stream")
+    return int.from_bytes(size, "big")
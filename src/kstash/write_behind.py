@@ -0,0 +1,114 @@
+import threading
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+from .stash import Buffer
+
+
+@dataclass
+class _Pending:
+    encoded: Buffer
+    size: int
+
+
+@dataclass
+class PendingPayloads:
+    """Thread-safe map of the payloads pending upload in any queue, by key."""
+
+    _payloads: dict[str, tuple[Buffer, int]] = field(default_factory=lambda: {})
+    _lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def add(self, key: str, encoded: Buffer) -> None:
+        with self._lock:
+            _, count = self._payloads.get(key, (encoded, 0))
+            self._payloads[key] = (encoded, count + 1)
+
+    def discard(self, key: str) -> None:
+        with self._lock:
+            encoded, count = self._payloads.pop(key)
+            if count > 1:
+                self._payloads[key] = (encoded, count - 1)
+
+    def get(self, key: str) -> Buffer | None:
+        with self._lock:
+            pending = self._payloads.get(key)
+            return pending[0] if pending is not None else None
+
+
+PENDING_PAYLOADS = PendingPayloads()
+
+
+@dataclass
+class WriteBehindQueue:
+    """Runs uploads on background workers, keeping their payloads until done.
+
+    Payloads of pending uploads are readable by key, here and through
+    `registry` (by default shared by all queues of the process), so the
+    writing process sees its own writes whatever config it reads them with.
+    Submitting blocks while `max_bytes` are pending.
+    """
+
+    max_workers: int
+    max_bytes: int
+    registry: PendingPayloads = field(default_factory=lambda: PENDING_PAYLOADS)
+    _pending: dict[str, _Pending] = field(default_factory=lambda: {})
+    _errors: list[Exception] = field(default_factory=lambda: [])
+    _size: int = 0
+    _executor: ThreadPoolExecutor | None = None
+    _cond: threading.Condition = field(default_factory=threading.Condition)
+
+    def submit(self, key: str, encoded: Buffer, upload: Callable[[], None]) -> None:
+        """Queues `upload` of `encoded` under `key`, unless already pending."""
+        size = len(encoded)
+        with self._cond:
+            if key in self._pending:
+                return
+            # A payload larger than max_bytes waits for an empty queue instead.
+            self._cond.wait_for(
+                lambda: not self._pending or self._size + size <= self.max_bytes
+            )
+            if key in self._pending:
+                return
+            self._pending[key] = _Pending(encoded, size)
+            self.registry.add(key, encoded)
+            self._size += size
+            executor = self._get_executor()
+        executor.submit(self._run, key, upload)
+
+    def get(self, key: str) -> Buffer | None:
+        with self._cond:
+            pending = self._pending.get(key)
+            return pending.encoded if pending is not None else None
+
+    def flush(self, timeout_sec: float | None = None) -> None:
+        """Waits for pending uploads, raising the first error since last flush."""
+        with self._cond:
+            if not self._cond.wait_for(lambda: not self._pending, timeout_sec):
+                raise TimeoutError(f"{len(self._pending)} uploads still pending")
+            errors, self._errors = self._errors, []
+        if errors:
+            raise errors[0]
+
+    def _run(self, key: str, upload: Callable[[], None]) -> None:
+        try:
+            upload()
+        except Exception as e:
+            with self._cond:
+                self._errors.append(e)
+        finally:
+            with self._cond:
+                self._size -= self._pending.pop(key).size
+                self.registry.discard(key)
+                self._cond.notify_all()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                self.max_workers, thread_name_prefix="kstash-upload"
+            )
+        return self._executor
+
+    def __len__(self) -> int:
+        with self._cond:
+            return len(self._pending)
@@ -0,0 +1,78 @@
+import pytest
+from kstash.address import Address, parse_address_scheme
+from kstash.backend_http import HttpAddress
+from kstash.backend_inline import InlineAddress
+from kstash.backend_mem import MemAddress
+from kstash.backend_s3 import S3Address
+
+DIGEST = "28a5e15a666b0cd1415490dcf6674255"
+
+
+@pytest.mark.parametrize(
+    "address, scheme",
+    [
+        pytest.param(f"s3://app/x.{DIGEST}", "s3", id="s3"),
+        pytest.param("inline://app/x?data=oXg%3D", "inline", id="inline"),
+        pytest.param(MemAddress.from_string(f"mem://app/x.{DIGEST}"), "mem", id="obj"),
+        pytest.param("app/x", "", id="no-scheme"),
+    ],
+)
+def test_parse_address_scheme(address: Address | str, scheme: str):
+    assert parse_address_scheme(address) == scheme
+
+
+@pytest.mark.parametrize(
+    "address_cls, address",
+    [
+        pytest.param(S3Address, f"s3://app/dir/x.{DIGEST}", id="s3"),
+        pytest.param(MemAddress, f"mem://app/dir/x.{DIGEST}", id="mem"),
+        pytest.param(
+            HttpAddress, f"https://app.s3.amazonaws.com/dir/x.{DIGEST}", id="https"
+        ),
+    ],
+)
+def test_digest_address_parses_name_and_digest(
+    address_cls: type[Address], address: str
+):
+    parsed = address_cls.from_string(address)
+    assert parsed.name == "dir/x"
+    assert parsed.digest == DIGEST
+    assert str(parsed) == address
+
+
+def test_digest_address_with_tagged_digest():
+    address = S3Address.from_string(f"s3://app/x.blake2b-{DIGEST}")
+    assert address.name == "x"
+    assert address.digest == f"blake2b-{DIGEST}"
+
+
+@pytest.mark.parametrize("path", ["/x", "/x.1234", f"/x.crc32-{DIGEST}"])
+def test_digest_address_with_invalid_path_should_raise(path: str):
+    with pytest.raises(ValueError, match="invalid address path"):
+        S3Address.from_string(f"s3://app{path}")
+
+
+def test_inline_address_name():
+    address = InlineAddress.from_string("inline://app/x?data=oXg%3D")
+    assert address.name == "x"
+    assert address.digest is None
+    assert address.extra == (("data", "oXg="),)
+
+
+def test_address_with_wrong_scheme_should_raise():
+    with pytest.raises(ValueError, match="invalid s3 address"):
+        S3Address.from_string(f"mem://app/x.{DIGEST}")
+
+
+def test_address_from_string_is_cached():
+    address = f"s3://app/x.{DIGEST}"
+    assert S3Address.from_string(address) is S3Address.from_string(address)
+    assert MemAddress.from_string(f"mem://app/x.{DIGEST}") is not S3Address.from_string(
+        address
+    )
+
+
+def test_address_parse_returns_parsed_address_as_is():
+    address = S3Address.from_string(f"s3://app/x.{DIGEST}")
+    assert S3Address.parse(address) is address
+    assert S3Address.parse(str(address)) == address
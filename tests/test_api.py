@@ -1,10 +1,27 @@
+import asyncio
+import threading
+import time
+
 import msgpack
 import pytest
 import responses
-from kstash.api import create, retrieve
-from kstash.config import Config
+from kstash import backend_inline
+from kstash.address import Address
+from kstash.api import (
+    acreate,
+    aretrieve,
+    create,
+    create_many,
+    open,
+    retrieve,
+    retrieve_many,
+)
+from kstash.backend_s3 import S3Backend
+from kstash.config import Config, Route
 from kstash.exceptions import StashNotFound, UnsupportedBackend
-from kstash.stash import ArgData
+from kstash.observe import Event
+from kstash.stash import ArgData, SealedStash
+from pytest import MonkeyPatch
 from types_boto3_s3 import S3Client
 
 
@@ -95,6 +112,59 @@ def test_create_skips_inline_for_large_data():
     assert stash.backend.name == "mem"
 
 
+ROUTED_CONFIG = Config(
+    backends=["inline", "mem", "s3"],
+    routes=[Route("inline", max_len=50), Route("mem", max_len=1000), Route("s3")],
+)
+
+
+@pytest.mark.parametrize(
+    "data, backend",
+    [
+        pytest.param("c" * 10, "inline", id="inline"),
+        pytest.param("c" * 100, "mem", id="mem"),
+        pytest.param("c" * 1000, "s3", id="s3"),
+    ],
+)
+def test_create_routes_by_encoded_size(data: str, backend: str, s3_setup: S3Client):
+    stash = create("x", data, namespace="app", config=ROUTED_CONFIG)
+    assert stash.backend.name == backend
+    assert retrieve(stash.address, config=ROUTED_CONFIG).data == data
+
+
+def test_create_routed_skips_inline_encoding(monkeypatch: MonkeyPatch):
+    config = Config(
+        backends=["inline", "mem"],
+        routes=[Route("inline", max_len=50), Route("mem")],
+    )
+    monkeypatch.setattr(backend_inline.base64, "b64encode", fail)
+    stash = create("x", "c" * 100, config=config)
+    assert stash.backend.name == "mem"
+
+
+def test_create_routed_falls_back_to_larger_routes(s3_setup: S3Client):
+    # The mem route admits more than mem_max_bytes allows.
+    config = Config(
+        backends=["mem", "s3"],
+        routes=[Route("mem", max_len=1000), Route("s3")],
+        mem_max_bytes=10,
+    )
+    stash = create("x", "c" * 100, namespace="app", config=config)
+    assert stash.backend.name == "s3"
+    assert retrieve(stash.address, config=config).data == "c" * 100
+
+
+def test_create_routed_with_no_matching_route_should_raise():
+    config = Config(backends=["inline"], routes=[Route("inline", max_len=50)])
+    with pytest.raises(UnsupportedBackend):
+        create("x", "c" * 100, config=config)
+
+
+def test_async_create_routes_by_encoded_size(s3_setup: S3Client):
+    stash = asyncio.run(acreate("x", "c" * 100, namespace="app", config=ROUTED_CONFIG))
+    assert stash.backend.name == "mem"
+
+
 def test_create_with_no_available_backend_should_raise():
     config = Config(backends=["inline"])
     data_len = config.max_inline_len + 1
@@ -119,6 +189,33 @@ def test_create_stash_is_idempotent(backend: str, s3_setup: S3Client):
     assert stash1 == stash2
 
 
+def test_inline_stash_with_hash_algorithm():
+    config = Config(backends=["inline"], hash_algorithm="blake2b")
+    stash = create("color", "red", namespace="app", config=config)
+    assert dict(stash.address.extra)["hash"] == "blake2b"
+    loaded = retrieve(stash.address, config=Config(backends=["inline"]))
+    assert loaded == stash
+    assert loaded.digest.startswith("blake2b-")
+
+
+@pytest.mark.parametrize("backend", ["mem", "s3"])
+def test_stash_with_hash_algorithm(backend: str, s3_setup: S3Client):
+    config = Config(backends=[backend, "https"], hash_algorithm="blake2b")
+    stash = create("color", "red" * 50, namespace="app", config=config)
+    assert stash.address.path.strip("/") == f"color.{stash.digest}"
+    assert stash.digest.startswith("blake2b-")
+
+    # Loading trusts the digest found in the address, whatever the config says.
+    loaded = retrieve(stash.address, config=Config(backends=[backend, "https"]))
+    assert loaded == stash
+    assert loaded.data == "red" * 50
+
+    if backend == "s3":
+        shared = retrieve(stash.share(), config=config)
+        assert shared.digest == stash.digest
+        assert shared.data == "red" * 50
+
+
 @pytest.mark.parametrize(
     "address",
     [
@@ -139,3 +236,144 @@ def test_retrieve_with_no_available_backend_should_raise():
     stash = create("test", "a", config=Config(backends=["inline"]))
     with pytest.raises(UnsupportedBackend):
         retrieve(stash.address, config=Config(backends=["s3"]))
+
+
+@pytest.mark.parametrize("backend", ["mem", "s3"])
+def test_create_many_and_retrieve_many(backend: str, s3_setup: S3Client):
+    config = Config(backends=[backend])
+    items = [(f"item{i}", {"index": i}) for i in range(20)]
+    stashes = create_many(items, namespace="app", config=config, max_workers=4)
+    assert [s.name for s in stashes if isinstance(s, SealedStash)] == [
+        name for name, _ in items
+    ]
+    addresses = [s.address for s in stashes if isinstance(s, SealedStash)]
+    loaded = retrieve_many(addresses, config=config, max_workers=4)
+    assert [s.data for s in loaded if isinstance(s, SealedStash)] == [
+        data for _, data in items
+    ]
+
+
+def test_create_many_reports_errors_per_item():
+    class CustomClass:
+        value = 10.09
+
+    config = Config(backends=["inline"])
+    items = [("ok", "a"), ("bad", CustomClass()), ("large", "a" * 200)]
+    results = create_many(items, config=config)  # type: ignore
+    assert isinstance(results[0], SealedStash) and results[0].data == "a"
+    assert isinstance(results[1], ValueError)
+    assert isinstance(results[2], UnsupportedBackend)
+
+
+def test_retrieve_many_reports_errors_per_item(s3_setup: S3Client):
+    config = Config(backends=["mem", "s3"])
+    stash = create("x", "data", namespace="app", config=config)
+    missing = "s3://app/x.28a5e15a666b0cd1415490dcf6674255"
+    results = retrieve_many([missing, stash.address, "unknown://x"], config=config)
+    assert isinstance(results[0], StashNotFound)
+    assert results[1] == stash
+    assert isinstance(results[2], UnsupportedBackend)
+
+
+@pytest.mark.parametrize("backend", ["inline", "mem", "s3"])
+def test_async_stash_creation_and_retrieval(backend: str, s3_setup: S3Client):
+    config = Config(backends=[backend])
+
+    async def roundtrip() -> tuple[SealedStash, SealedStash]:
+        stash = await acreate("color", "red", namespace="app", config=config)
+        return stash, await aretrieve(stash.address, config=config)
+
+    stash, loaded = asyncio.run(roundtrip())
+    assert stash.backend.name == backend
+    assert loaded == stash
+    assert loaded.data == "red"
+
+
+def test_async_retrieve_does_not_block_event_loop(
+    s3_setup: S3Client, monkeypatch: MonkeyPatch
+):
+    config = Config(backends=["s3"])
+    stash = create("color", "red", namespace="app", config=config)
+    load_stash = S3Backend.load_stash
+
+    def slow_load_stash(self: S3Backend, address: Address | str) -> SealedStash:
+        time.sleep(0.2)
+        return load_stash(self, address)
+
+    monkeypatch.setattr(S3Backend, "load_stash", slow_load_stash)
+
+    async def retrieve_all() -> list[SealedStash]:
+        tasks = [aretrieve(stash.address, config=config) for _ in range(20)]
+        return await asyncio.gather(*tasks)
+
+    start = time.perf_counter()
+    loaded = asyncio.run(retrieve_all())
+    assert time.perf_counter() - start < 1
+    assert all(s == stash for s in loaded)
+
+
+def test_async_create_encodes_once_off_the_event_loop(s3_setup: S3Client):
+    encode_threads: list[int] = []
+
+    def observer(event: Event) -> None:
+        if event.phase == "encode":
+            encode_threads.append(threading.get_ident())
+
+    config = Config(backends=["inline", "mem"], observers=[observer])
+
+    async def create_stash() -> SealedStash:
+        return await acreate("x", "c" * 200, namespace="app", config=config)
+
+    stash = asyncio.run(create_stash())
+    assert stash.backend.name == "mem"
+    assert len(encode_threads) == 1
+    assert encode_threads[0] != threading.get_ident()
+
+
+def test_async_create_with_no_available_backend_should_raise():
+    config = Config(backends=["inline"])
+    with pytest.raises(UnsupportedBackend):
+        asyncio.run(acreate("test", "a" * 200, config=config))
+
+
+@pytest.mark.parametrize(
+    "backend, codec",
+    [
+        pytest.param("inline", None, id="inline"),
+        pytest.param("mem", None, id="mem"),
+        pytest.param("s3", None, id="s3"),
+        pytest.param("s3", "zlib", id="s3.zlib"),
+        pytest.param("s3", "lzma", id="s3.lzma"),
+    ],
+)
+def test_open_stash_stream(backend: str, codec: str | None, s3_setup: S3Client):
+    config = Config(backends=[backend], codec=codec, codec_min_len=0)
+    payload = b"abc" * 20 if backend == "inline" else b"abc" * 100_000
+    stash = create("blob", payload, namespace="app", config=config)
+    with open(stash.address, config=config) as reader:
+        assert b"".join(iter(lambda: reader.read(4096), b"")) == payload
+
+
+@pytest.mark.parametrize("codec", [None, "zlib"])
+def test_open_shared_stash_stream(codec: str | None, s3_setup: S3Client):
+    config = Config(backends=["s3", "https"], codec=codec)
+    stash = create("blob", b"abc" * 100_000, namespace="app", config=config)
+    with open(stash.share(), config=config) as reader:
+        assert reader.read() == b"abc" * 100_000
+
+
+def test_open_non_binary_stash_should_raise():
+    config = Config(backends=["mem"])
+    stash = create("x", {"color": "red"}, config=config)
+    with pytest.raises(ValueError, match="not binary"):
+        open(stash.address, config=config)
+
+
+def test_open_stash_not_found(s3_setup: S3Client):
+    config = Config(backends=["s3"])
+    with pytest.raises(StashNotFound):
+        open("s3://app/x.28a5e15a666b0cd1415490dcf6674255", config=config)
+
+
+def fail(*args: object, **kwargs: object) -> None:
+    raise AssertionError("unexpected call")
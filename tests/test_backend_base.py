@@ -1,5 +1,14 @@
+import copy
+import pickle
+from concurrent.futures import ThreadPoolExecutor
+
 import pytest
-from kstash.backend import get_backend_from_address
+from kstash.api import create
+from kstash.backend import (
+    get_backend_from_address,
+    get_backend_pool,
+    get_backends_from_config,
+)
 from kstash.config import CONFIG, Config
 from kstash.exceptions import UnsupportedBackend
 
@@ -21,3 +30,46 @@ def test_get_backend_from_address(address: str, backend_name: str):
 def test_get_backend_from_address_unsupported_schema_should_raise():
     with pytest.raises(UnsupportedBackend):
         get_backend_from_address("unknown://default/test/cmVkICAxMQ==", CONFIG)
+
+
+def test_get_backend_from_address_reuses_backend_instances():
+    config = Config(backends=["inline", "mem", "s3"])
+    address = "mem://ns/x.28a5e15a666b0cd1415490dcf6674255"
+    backend1 = get_backend_from_address(address, config)
+    backend2 = get_backend_from_address(address, config)
+    assert backend1 is backend2
+    assert backend1 is get_backend_pool(config).get("mem")
+
+
+def test_get_backends_from_config_reuses_backend_instances():
+    config = Config(backends=["inline", "mem"])
+    backends1 = list(get_backends_from_config(config))
+    backends2 = list(get_backends_from_config(config))
+    assert [b.name for b in backends1] == ["inline", "mem"]
+    assert all(b1 is b2 for b1, b2 in zip(backends1, backends2))
+
+
+def test_backend_pool_is_bound_to_config():
+    config1 = Config(backends=["mem"])
+    config2 = Config(backends=["mem"])
+    assert get_backend_pool(config1) is get_backend_pool(config1)
+    assert get_backend_pool(config1) is not get_backend_pool(config2)
+    assert get_backend_pool(config1).get("mem").config is config1
+
+
+def test_used_config_can_be_pickled_and_copied():
+    config = Config(backends=["inline", "mem"])
+    create("x", "data" * 100, config=config)
+    for clone in [pickle.loads(pickle.dumps(config)), copy.deepcopy(config)]:
+        assert clone == config
+        assert get_backend_pool(clone) is not get_backend_pool(config)
+        assert create("x", "data" * 100, config=clone).backend.name == "mem"
+
+
+def test_backend_pool_builds_each_backend_once_under_concurrency():
+    config = Config(backends=["mem"])
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        backends = list(
+            executor.map(lambda _: get_backend_pool(config).get("mem"), range(64))
+        )
+    assert all(backend is backends[0] for backend in backends)
@@ -0,0 +1,101 @@
+import io
+import os
+from pathlib import Path
+
+import pytest
+from kstash.api import create, open, retrieve
+from kstash.backend_file import FileBackend
+from kstash.config import Config
+from kstash.exceptions import StashNotFound, UnsupportedOperation
+from kstash.stash import Stash
+from pytest import MonkeyPatch
+
+
+@pytest.fixture
+def config(tmp_path: Path) -> Config:
+    return Config(backends=["file"], file_root=str(tmp_path))
+
+
+def test_file_backend_save_and_load(config: Config, tmp_path: Path):
+    backend = FileBackend(config=config)
+    stash = backend.save_stash("dir/x", {"bin": b"0" * 1024}, namespace="app")
+    assert str(stash.address) == f"file://app/dir/x.{stash.digest}"
+    path = backend.path(stash.address)
+    assert path == os.path.join(
+        tmp_path, "app", stash.digest[:2], stash.digest[2:4], f"dir%2Fx.{stash.digest}"
+    )
+    loaded = backend.load_stash(stash.address)
+    assert loaded == stash
+    assert isinstance(loaded.encoded, memoryview)
+    assert loaded.data == {"bin": b"0" * 1024}
+
+
+def test_file_backend_shards_tagged_digests(tmp_path: Path):
+    config = Config(
+        backends=["file"], file_root=str(tmp_path), hash_algorithm="blake2b"
+    )
+    backend = FileBackend(config=config)
+    stash = backend.save_stash("x", "data", namespace="app")
+    hexdigest = stash.digest.removeprefix("blake2b-")
+    assert backend.path(stash.address).startswith(
+        os.path.join(tmp_path, "app", hexdigest[:2], hexdigest[2:4])
+    )
+
+
+def test_file_backend_skips_existing_content(config: Config, monkeypatch: MonkeyPatch):
+    backend = FileBackend(config=config)
+    stash = backend.save_stash("x", "data", namespace="app")
+    monkeypatch.setattr("kstash.backend_file.write_atomic", fail)
+    assert backend.save_stash("x", "data", namespace="app") == stash
+
+
+def test_file_backend_syncs_before_rename(config: Config, monkeypatch: MonkeyPatch):
+    backend = FileBackend(config=config)
+    calls: list[str] = []
+    fsync, replace = os.fsync, os.replace
+    monkeypatch.setattr(os, "fsync", lambda fd: calls.append("fsync") or fsync(fd))
+    monkeypatch.setattr(
+        os, "replace", lambda *args: calls.append("replace") or replace(*args)
+    )
+    backend.save_stash("x", "data", namespace="app")
+    assert calls == ["fsync", "replace", "fsync"]  # file, then directory
+
+
+def test_file_backend_save_stream(config: Config):
+    backend = FileBackend(config=config)
+    payload = os.urandom(3 * 1024 * 1024 + 5)
+    stash = backend.save_stream("x", io.BytesIO(payload), namespace="app")
+    assert stash == Stash(name="x", namespace="app", data=payload)
+    assert retrieve(stash.address, config=config).data == payload
+    with open(stash.address, config=config) as stream:
+        assert stream.read() == payload
+
+
+def test_file_backend_load_not_found(config: Config):
+    backend = FileBackend(config=config)
+    address = "file://app/x.28a5e15a666b0cd1415490dcf6674255"
+    with pytest.raises(StashNotFound):
+        backend.load_stash(address)
+    with pytest.raises(StashNotFound):
+        backend.open_stream(address)
+
+
+def test_file_backend_rejects_escaping_namespace(config: Config):
+    backend = FileBackend(config=config)
+    with pytest.raises(ValueError, match="invalid address"):
+        backend.load_stash("file://../x.28a5e15a666b0cd1415490dcf6674255")
+
+
+def test_file_backend_without_root_should_raise():
+    with pytest.raises(UnsupportedOperation, match="file_root is not configured"):
+        FileBackend().save_stash("x", "data")
+
+
+def test_file_backend_through_api(config: Config):
+    stash = create("x", "data", namespace="app", config=config)
+    assert stash.backend.name == "file"
+    assert retrieve(stash.address, config=config).data == "data"
+
+
+def fail(*args: object, **kwargs: object) -> None:
+    raise AssertionError("unexpected call")
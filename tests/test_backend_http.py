@@ -2,8 +2,10 @@ import msgpack
 import pytest
 import responses
 from kstash.backend_http import HttpBackend
+from kstash.config import Config
 from kstash.exceptions import BackendRemoteError, StashNotFound, UnsupportedOperation
 from kstash.stash import Stash
+from requests.adapters import HTTPAdapter
 from requests.exceptions import ConnectionError
 
 SAMPLE_URL = "https://app.s3.amazonaws.com/x.34472d91b2f84052bf26d4eaa862ef86"
@@ -55,7 +57,7 @@ def test_backend_http_load_stash_when_connection_error_should_raise():
 
 @responses.activate
 def test_backend_http_load_stash_when_http_500_should_raise():
-    backend = HttpBackend()
+    backend = HttpBackend(config=Config(http_backoff_factor=0))
     responses.add(responses.GET, SAMPLE_URL, status=500)
     with pytest.raises(BackendRemoteError):
         backend.load_stash(SAMPLE_URL)
@@ -75,3 +77,48 @@ def test_backend_http_load_stash_when_http_404_should_raise():
     responses.add(responses.GET, SAMPLE_URL, status=404)
     with pytest.raises(StashNotFound):
         backend.load_stash(SAMPLE_URL)
+
+
+@responses.activate
+def test_backend_http_load_stash_retries_server_errors():
+    backend = HttpBackend(config=Config(http_backoff_factor=0))
+    responses.add(responses.GET, SAMPLE_URL, status=503)
+    responses.add(responses.GET, SAMPLE_URL, body=msgpack.packb("123"))
+    stash = backend.load_stash(SAMPLE_URL)
+    assert stash.data == "123"
+    assert len(responses.calls) == 2
+
+
+@responses.activate
+def test_backend_http_load_stash_gives_up_after_max_retries():
+    backend = HttpBackend(config=Config(http_max_retries=2, http_backoff_factor=0))
+    responses.add(responses.GET, SAMPLE_URL, status=503)
+    with pytest.raises(BackendRemoteError):
+        backend.load_stash(SAMPLE_URL)
+    assert len(responses.calls) == 3
+
+
+@responses.activate
+def test_backend_http_load_stash_does_not_retry_not_found():
+    backend = HttpBackend(config=Config(http_backoff_factor=0))
+    responses.add(responses.GET, SAMPLE_URL, status=404)
+    with pytest.raises(StashNotFound):
+        backend.load_stash(SAMPLE_URL)
+    assert len(responses.calls) == 1
+
+
+@responses.activate
+def test_backend_http_load_stash_applies_timeouts():
+    config = Config(http_connect_timeout_sec=1.5, http_read_timeout_sec=7)
+    backend = HttpBackend(config=config)
+    responses.add(responses.GET, SAMPLE_URL, body=msgpack.packb("123"))
+    backend.load_stash(SAMPLE_URL)
+    assert responses.calls[0].request.req_kwargs["timeout"] == (1.5, 7)
+
+
+def test_backend_http_session_pool_size():
+    backend = HttpBackend(config=Config(http_pool_maxsize=7))
+    adapter = backend.session.get_adapter(SAMPLE_URL)
+    assert isinstance(adapter, HTTPAdapter)
+    assert adapter._pool_maxsize == 7  # type: ignore
+    assert HttpBackend().session is not backend.session
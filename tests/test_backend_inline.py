@@ -1,5 +1,7 @@
+import base64
+
 import pytest
-from kstash.backend_inline import InlineBackend
+from kstash.backend_inline import InlineBackend, base64_len
 from kstash.exceptions import UnsupportedOperation
 from kstash.stash import Stash
 
@@ -15,3 +17,8 @@ def test_inline_backend_cannot_share_stash():
     with pytest.raises(UnsupportedOperation):
         stash = Stash(name="x", data="config-data")
         backend.make_share_address(stash)
+
+
+@pytest.mark.parametrize("size", [0, 1, 2, 3, 4, 74, 75, 76])
+def test_inline_backend_base64_len(size: int):
+    assert base64_len(size) == len(base64.b64encode(b"0" * size))
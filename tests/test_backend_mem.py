@@ -1,7 +1,15 @@
+import io
+from concurrent.futures import ThreadPoolExecutor
+
 import pytest
-from kstash.backend_mem import MemBackend
-from kstash.exceptions import UnsupportedOperation
+from kstash import backend_mem
+from kstash.api import create, retrieve
+from kstash.backend_mem import MemBackend, MemStore, MemStoreStats
+from kstash.config import Config
+from kstash.exceptions import StashNotFound, UnsupportedOperation
 from kstash.stash import Stash
+from pytest import MonkeyPatch
+from types_boto3_s3 import S3Client
 
 
 def test_mem_backend_cannot_share_stash():
@@ -9,3 +17,125 @@ def test_mem_backend_cannot_share_stash():
     with pytest.raises(UnsupportedOperation):
         stash = Stash(name="x", data="config-data")
         backend.make_share_address(stash)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_mem_store_evicts_least_recently_used():
+    store = MemStore()
+    store.put("a", b"x" * 100, max_bytes=250)
+    store.put("b", b"x" * 100, max_bytes=250)
+    store.get("a")
+    store.put("c", b"x" * 100, max_bytes=250)
+    assert "a" in store
+    assert "b" not in store
+    assert "c" in store
+    assert store.stats() == MemStoreStats(entries=2, size=200, evictions=1)
+
+
+def test_mem_store_rejects_oversized_entries():
+    store = MemStore()
+    assert not store.put("a", b"x" * 100, max_bytes=50)
+    assert "a" not in store
+    assert store.stats().size == 0
+
+
+def test_mem_store_replaces_entry():
+    store = MemStore()
+    store.put("a", b"x" * 100)
+    store.put("a", b"x" * 10)
+    assert store.stats() == MemStoreStats(entries=1, size=10)
+
+
+def test_mem_store_expires_entries():
+    clock = FakeClock()
+    store = MemStore(clock=clock)
+    store.put("a", b"x", ttl_sec=10)
+    store.put("b", b"x")
+    clock.now = 5
+    assert store.get("a") == b"x"
+    clock.now = 10
+    assert store.get("a") is None
+    assert store.get("b") == b"x"
+    assert store.stats() == MemStoreStats(entries=1, size=1, expirations=1)
+
+
+def test_mem_store_put_sweeps_expired_entries():
+    clock = FakeClock()
+    store = MemStore(clock=clock)
+    store.put("a", b"x", ttl_sec=1)
+    clock.now = 2
+    store.put("b", b"x", ttl_sec=1)
+    assert "a" not in store
+    assert store.stats().expirations == 1
+
+
+def test_mem_store_purge_expired():
+    clock = FakeClock()
+    store = MemStore(clock=clock)
+    store.put("a", b"x")
+    store.put("b", b"x", ttl_sec=1)
+    store.get("a")  # moves the non-expiring entry to the end
+    clock.now = 2
+    store.purge_expired()
+    assert len(store) == 1
+    assert "b" not in store
+
+
+def test_mem_store_concurrent_puts_keep_size_bounded():
+    store = MemStore()
+
+    def put(i: int) -> None:
+        store.put(str(i % 50), b"x" * (i % 7 + 1), max_bytes=64)
+
+    with ThreadPoolExecutor(8) as executor:
+        list(executor.map(put, range(2000)))
+
+    stats = store.stats()
+    assert stats.size <= 64
+    assert stats.size == sum(len(store.get(key) or b"") for key in map(str, range(50)))
+
+
+def test_mem_backend_enforces_config_bounds(monkeypatch: MonkeyPatch):
+    monkeypatch.setattr(backend_mem, "MEM_BACKEND_STORE", MemStore())
+    backend = MemBackend(config=Config(backends=["mem"], mem_max_bytes=100))
+    first = backend.save_stash("a", b"x" * 60)
+    backend.save_stash("b", b"x" * 30)
+    backend.save_stash("c", b"x" * 30)
+    with pytest.raises(StashNotFound):
+        backend.load_stash(first.address)
+    with pytest.raises(UnsupportedOperation, match="too large"):
+        backend.save_stash("d", b"x" * 200)
+
+
+@pytest.mark.parametrize(
+    "make_stream",
+    [
+        pytest.param(lambda payload: io.BytesIO(payload), id="file"),
+        pytest.param(lambda payload: iter([payload[:50], payload[50:]]), id="iterator"),
+    ],
+)
+def test_oversized_mem_stream_falls_through_unconsumed(
+    make_stream,  # type: ignore
+    s3_setup: S3Client,
+):
+    config = Config(backends=["mem", "s3"], mem_max_bytes=10)
+    stash = create("blob", make_stream(b"x" * 100), namespace="app", config=config)
+    assert stash.backend.name == "s3"
+    assert retrieve(stash.address, config=config).data == b"x" * 100
+
+
+def test_mem_backend_load_does_not_keep_decoded_data(monkeypatch: MonkeyPatch):
+    monkeypatch.setattr(backend_mem, "MEM_BACKEND_STORE", MemStore())
+    backend = MemBackend()
+    stash = backend.save_stash("a", {"color": "red"})
+    loaded = backend.load_stash(stash.address)
+    assert not loaded.is_decoded
+    assert loaded == stash
+    assert loaded.data == {"color": "red"}
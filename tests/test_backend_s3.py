@@ -1,8 +1,13 @@
+import io
+import os
+
+import msgpack
 import pytest
 from botocore.exceptions import ClientError
-from kstash.api import Config, create
-from kstash.backend_s3 import S3Backend
-from kstash.exceptions import BackendRemoteError
+from kstash.api import Config, create, retrieve
+from kstash.backend_s3 import KnownKeys, S3Address, S3Backend
+from kstash.stash import Stash
+from kstash.exceptions import BackendRemoteError, StashNotFound
 from pytest import MonkeyPatch
 from types_boto3_s3 import S3Client
 
@@ -39,6 +44,213 @@ def test_stash_share(s3_setup: S3Client):
     assert str(share_address).startswith("https://")
 
 
+MIB = 1024 * 1024
+
+MULTIPART_CONFIG = Config(
+    backends=["s3"], multipart_threshold=5 * MIB, multipart_chunk_size=5 * MIB
+)
+
+
+@pytest.mark.parametrize(
+    "make_stream",
+    [
+        pytest.param(lambda payload: io.BytesIO(payload), id="file"),
+        pytest.param(
+            lambda payload: (payload[i : i + MIB] for i in range(0, len(payload), MIB)),
+            id="iterator",
+        ),
+    ],
+)
+def test_s3_backend_save_stream_multipart(make_stream, s3_setup: S3Client):  # type: ignore
+    payload = os.urandom(11 * MIB)
+    stash = create(
+        "blob", make_stream(payload), namespace="app", config=MULTIPART_CONFIG
+    )  # type: ignore
+    assert stash.address == S3Address.from_stash(
+        Stash(name="blob", namespace="app", data=payload)
+    )
+    stored = s3_setup.get_object(Bucket="app", Key=stash.address.path.strip("/"))
+    assert stored["ContentLength"] == len(msgpack.packb(payload))
+    assert "-3" in stored["ETag"]  # three parts
+    assert retrieve(stash.address, config=MULTIPART_CONFIG).data == payload
+
+
+def test_s3_backend_save_stream_keeps_payload_out_of_memory(s3_setup: S3Client):
+    payload = os.urandom(6 * MIB)
+    stash = create(
+        "blob", io.BytesIO(payload), namespace="app", config=MULTIPART_CONFIG
+    )
+    assert not stash.is_decoded
+    assert "encoded" not in vars(stash)
+    assert stash.data == payload  # loaded from the backend on access
+
+
+def test_s3_backend_save_stream_small_payload(s3_setup: S3Client):
+    stash = create("blob", io.BytesIO(b"abc"), namespace="app", config=MULTIPART_CONFIG)
+    assert stash.encoded == msgpack.packb(b"abc")
+    assert retrieve(stash.address, config=MULTIPART_CONFIG).data == b"abc"
+
+
+def test_s3_backend_save_large_bytes_multipart(s3_setup: S3Client):
+    payload = os.urandom(11 * MIB)
+    stash = create("blob", payload, namespace="app", config=MULTIPART_CONFIG)
+    stored = s3_setup.head_object(Bucket="app", Key=stash.address.path.strip("/"))
+    assert "-3" in stored["ETag"]
+    assert retrieve(stash.address, config=MULTIPART_CONFIG).data == payload
+
+
+def test_s3_backend_save_stream_multipart_is_idempotent(s3_setup: S3Client):
+    payload = os.urandom(6 * MIB)
+    stash1 = create(
+        "blob", io.BytesIO(payload), namespace="app", config=MULTIPART_CONFIG
+    )
+    stash2 = create(
+        "blob", io.BytesIO(payload), namespace="app", config=MULTIPART_CONFIG
+    )
+    assert stash1 == stash2
+    assert s3_setup.list_multipart_uploads(Bucket="app").get("Uploads", []) == []
+
+
+def test_s3_backend_save_stream_multipart_remote_error(
+    s3_setup: S3Client, monkeypatch: MonkeyPatch
+):
+    backend = S3Backend(config=MULTIPART_CONFIG)
+    monkeypatch.setattr(backend.s3_client, "upload_part", mock_upload_part)  # type: ignore
+    with pytest.raises(BackendRemoteError):
+        backend.save_stream("blob", io.BytesIO(os.urandom(6 * MIB)), namespace="app")
+    assert s3_setup.list_multipart_uploads(Bucket="app").get("Uploads", []) == []
+
+
+def test_stream_falls_through_inline_backend():
+    config = Config(backends=["inline", "mem"])
+    stash = create("blob", iter([b"a", b"b"]), config=config)
+    assert stash.backend.name == "mem"
+    assert stash.data == b"ab"
+
+
+@pytest.mark.parametrize("codec", [None, "zlib"])
+def test_s3_backend_load_stash_parallel_ranges(
+    codec: str | None, s3_setup: S3Client, monkeypatch: MonkeyPatch
+):
+    config = Config(
+        backends=["s3"], s3_download_part_size=1000, codec=codec, codec_min_len=0
+    )
+    payload = os.urandom(4500) if codec is None else os.urandom(1500) * 3
+    stash = create("blob", payload, namespace="app", config=config)
+
+    backend = S3Backend(config=config)
+    ranges: list[str] = []
+    get_object = backend.s3_client.get_object
+
+    def spy_get_object(**kwargs: str) -> object:
+        ranges.append(kwargs["Range"])
+        return get_object(**kwargs)  # type: ignore
+
+    monkeypatch.setattr(backend.s3_client, "get_object", spy_get_object)
+    loaded = backend.load_stash(stash.address)
+    assert loaded.data == payload
+    assert loaded.encoded == stash.encoded
+    stored_size = s3_setup.head_object(Bucket="app", Key=stash.address.path.strip("/"))[
+        "ContentLength"
+    ]
+    assert len(ranges) == -(-stored_size // 1000)
+    assert sorted(ranges) == sorted(
+        f"bytes={start}-{min(start + 1000, stored_size) - 1}"
+        for start in range(0, stored_size, 1000)
+    )
+    if codec is None:
+        assert isinstance(loaded.encoded, bytearray)  # no copy to bytes
+
+
+def test_s3_backend_load_stash_single_request_for_small_objects(
+    s3_setup: S3Client, monkeypatch: MonkeyPatch
+):
+    backend = S3Backend()
+    stash = backend.save_stash("x", "config-data", namespace="app")
+    calls: list[object] = []
+    get_object = backend.s3_client.get_object
+
+    def spy_get_object(**kwargs: str) -> object:
+        calls.append(kwargs)
+        return get_object(**kwargs)  # type: ignore
+
+    monkeypatch.setattr(backend.s3_client, "get_object", spy_get_object)
+    assert backend.load_stash(stash.address).data == "config-data"
+    assert len(calls) == 1
+
+
+def test_s3_backend_save_existing_stash_does_not_download(
+    s3_setup: S3Client, monkeypatch: MonkeyPatch
+):
+    backend = S3Backend()
+    stash1 = backend.save_stash("x", "config-data", namespace="app")
+    monkeypatch.setattr(backend.s3_client, "get_object", mock_get_object)  # type: ignore
+    stash2 = backend.save_stash("x", "config-data", namespace="app")
+    assert stash1 == stash2
+    assert stash2.data == "config-data"
+
+
+def test_s3_backend_skips_put_of_known_present_keys(
+    s3_setup: S3Client, monkeypatch: MonkeyPatch
+):
+    backend = S3Backend(config=Config(s3_skip_known_present=True))
+    stash1 = backend.save_stash("known", "config-data", namespace="app")
+    monkeypatch.setattr(backend.s3_client, "put_object", mock_put_object)  # type: ignore
+    stash2 = backend.save_stash("known", "config-data", namespace="app")
+    assert stash1 == stash2
+
+
+def test_s3_backend_puts_known_present_keys_by_default(
+    s3_setup: S3Client, monkeypatch: MonkeyPatch
+):
+    backend = S3Backend()
+    backend.save_stash("known", "config-data", namespace="app")
+    monkeypatch.setattr(backend.s3_client, "put_object", mock_put_object)  # type: ignore
+    with pytest.raises(BackendRemoteError):
+        backend.save_stash("known", "config-data", namespace="app")
+
+
+def test_s3_backend_forgets_known_keys_not_found(s3_setup: S3Client):
+    backend = S3Backend(config=Config(s3_skip_known_present=True))
+    stash = backend.save_stash("gone", "config-data", namespace="app")
+    s3_setup.delete_object(Bucket="app", Key=stash.address.path.strip("/"))
+    with pytest.raises(StashNotFound):
+        backend.load_stash(stash.address)
+    backend.save_stash("gone", "config-data", namespace="app")
+    assert backend.load_stash(stash.address) == stash
+
+
+def test_s3_backend_multipart_skips_existing_objects(
+    s3_setup: S3Client, monkeypatch: MonkeyPatch
+):
+    payload = os.urandom(6 * MIB)
+    backend = S3Backend(config=MULTIPART_CONFIG)
+    stash1 = backend.save_stream("blob", io.BytesIO(payload), namespace="app")
+    monkeypatch.setattr(backend.s3_client, "create_multipart_upload", mock_put_object)  # type: ignore
+    stash2 = backend.save_stream("blob", io.BytesIO(payload), namespace="app")
+    assert stash1 == stash2
+
+
+def test_known_keys_are_bounded():
+    keys = KnownKeys(max_entries=2)
+    keys.add("a")
+    keys.add("b")
+    keys.add("a")
+    keys.add("c")
+    assert "a" in keys
+    assert "b" not in keys
+    assert "c" in keys
+    keys.discard("c")
+    assert "c" not in keys
+
+
+def mock_upload_part(*args: object, **kwargs: object) -> None:
+    raise ClientError(
+        error_response={"Error": {"Code": "InternalError", "Message": "Mocked"}},
+        operation_name="UploadPart",
+    )
+
+
 def mock_get_object(*args: object, **kwargs: object) -> None:
     raise ClientError(
         error_response={"Error": {"Code": "InternalError", "Message": "Mocked"}},
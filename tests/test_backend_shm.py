@@ -0,0 +1,141 @@
+import multiprocessing
+from collections.abc import Iterator
+from multiprocessing.shared_memory import SharedMemory
+
+import pytest
+from kstash.address import Address
+from kstash.api import create, retrieve
+from kstash.backend_shm import SHM_SEGMENTS, ShmBackend, shm_segment_name
+from kstash.config import Config
+from kstash.exceptions import StashNotFound, UnsupportedOperation
+from kstash.stash import SealedStash, Stash
+from pytest import MonkeyPatch
+
+CONFIG = Config(backends=["shm"])
+
+
+@pytest.fixture
+def backend(monkeypatch: MonkeyPatch) -> Iterator[ShmBackend]:
+    # Segments outlive the test process unless unlinked, so track them all.
+    saved: list[Address] = []
+    save_stash = ShmBackend._save_stash  # type: ignore
+
+    def save_and_track(self: ShmBackend, stash: Stash) -> SealedStash:
+        sealed = save_stash(self, stash)
+        saved.append(sealed.address)
+        return sealed
+
+    monkeypatch.setattr(ShmBackend, "_save_stash", save_and_track)
+    backend = ShmBackend(config=CONFIG)
+    yield backend
+    for address in saved:
+        backend.unlink_stash(address)
+
+
+def load_in_subprocess(address: str) -> object:
+    stash = retrieve(address, config=CONFIG)
+    data = stash.data
+    stash.backend.release_stash(address)  # type: ignore
+    return data
+
+
+def test_shm_backend_save_and_load(backend: ShmBackend):
+    stash = backend.save_stash("x", {"bin": b"0" * 1024}, namespace="app")
+    assert str(stash.address) == f"shm://app/x.{stash.digest}"
+    loaded = backend.load_stash(stash.address)
+    assert loaded == stash
+    assert loaded.data == {"bin": b"0" * 1024}
+    assert isinstance(loaded.encoded, memoryview)
+    assert loaded.encoded.readonly
+    assert bytes(loaded.encoded) == stash.encoded
+    del loaded
+    backend.release_stash(stash.address)
+
+
+def test_shm_backend_load_from_another_process(backend: ShmBackend):
+    stash = backend.save_stash("x", {"bin": b"0" * 1024}, namespace="app")
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(1) as pool:
+        data = pool.apply(load_in_subprocess, (str(stash.address),))
+    assert data == {"bin": b"0" * 1024}
+
+
+def test_shm_backend_save_is_idempotent(backend: ShmBackend):
+    stash1 = backend.save_stash("x", "data", namespace="app")
+    stash2 = backend.save_stash("x", "data", namespace="app")
+    assert stash1 == stash2
+    assert backend.load_stash(stash1.address).data == "data"
+    backend.release_stash(stash1.address)
+
+
+def test_shm_backend_replaces_incomplete_segment(backend: ShmBackend):
+    stash = Stash(name="x", namespace="app", data="data")
+    address = backend.make_address(stash)
+    # A producer crashed after creating the segment, before writing its header.
+    segment = SharedMemory(shm_segment_name(address), create=True, size=64, track=False)
+    segment.close()
+    assert backend.save_stash("x", "data", namespace="app").address == address
+    assert backend.load_stash(address).data == "data"
+    backend.release_stash(address)
+
+
+def test_shm_backend_refcounts_attachments(backend: ShmBackend):
+    stash = backend.save_stash("x", "data", namespace="app")
+    name = shm_segment_name(stash.address)
+    first = backend.load_stash(stash.address)
+    second = backend.load_stash(stash.address)
+    assert first.encoded is second.encoded  # one mapping per process
+    assert SHM_SEGMENTS.refs(name) == 2
+    backend.release_stash(stash.address)
+    assert SHM_SEGMENTS.refs(name) == 1
+    assert second.data == "data"
+    del first, second
+    backend.release_stash(stash.address)
+    assert SHM_SEGMENTS.refs(name) == 0
+
+
+def test_shm_backend_release_with_live_slices(backend: ShmBackend):
+    stash = backend.save_stash("x", b"0" * 1024, namespace="app")
+    name = shm_segment_name(stash.address)
+    payload = backend.load_stash(stash.address).encoded[1:]
+    backend.release_stash(stash.address)  # mapping held by the slice
+    assert SHM_SEGMENTS.refs(name) == 0
+    assert backend.load_stash(stash.address).data == b"0" * 1024
+    del payload
+    backend.release_stash(stash.address)
+    assert SHM_SEGMENTS.refs(name) == 0
+
+
+def test_shm_backend_open_stream_releases(backend: ShmBackend):
+    stash = backend.save_stash("x", "data", namespace="app")
+    with backend.open_stream(stash.address) as stream:
+        assert stream.read() == stash.encoded
+    assert SHM_SEGMENTS.refs(shm_segment_name(stash.address)) == 0
+
+
+def test_shm_backend_unlink(backend: ShmBackend):
+    stash = backend.save_stash("x", "data", namespace="app")
+    loaded = backend.load_stash(stash.address)
+    backend.unlink_stash(stash.address)
+    assert loaded.data == "data"  # mapped segments stay readable
+    del loaded
+    backend.release_stash(stash.address)
+    with pytest.raises(StashNotFound):
+        backend.load_stash(stash.address)
+    backend.unlink_stash(stash.address)  # no-op once removed
+
+
+def test_shm_backend_load_not_found(backend: ShmBackend):
+    with pytest.raises(StashNotFound):
+        backend.load_stash("shm://app/x.28a5e15a666b0cd1415490dcf6674255")
+
+
+def test_shm_backend_cannot_share_stash(backend: ShmBackend):
+    with pytest.raises(UnsupportedOperation):
+        backend.make_share_address(Stash(name="x", data="data"))
+
+
+def test_shm_backend_through_api(backend: ShmBackend):
+    stash = create("x", "data", namespace="app", config=CONFIG)
+    assert retrieve(stash.address, config=CONFIG).data == "data"
+    backend.release_stash(stash.address)
@@ -0,0 +1,99 @@
+import pytest
+from kstash.api import create, retrieve
+from kstash.backend import get_backend_pool
+from kstash.backend_s3 import S3Backend
+from kstash.cache import CacheStats, StashCache
+from kstash.config import Config
+from kstash.stash import Stash
+from pytest import MonkeyPatch
+from types_boto3_s3 import S3Client
+
+
+def make_encoded(size: int) -> bytes:
+    return Stash(name="x", data=b"x" * size).encoded
+
+
+def test_stash_cache_hit_and_miss():
+    cache = StashCache(max_bytes=1024)
+    encoded = make_encoded(10)
+    assert cache.get("a") is None
+    cache.put("a", encoded)
+    assert cache.get("a") is encoded
+    assert cache.stats() == CacheStats(
+        hits=1, misses=1, evictions=0, entries=1, size=len(encoded)
+    )
+
+
+def test_stash_cache_evicts_least_recently_used():
+    cache = StashCache(max_bytes=250)
+    cache.put("a", make_encoded(100))
+    cache.put("b", make_encoded(100))
+    cache.get("a")
+    cache.put("c", make_encoded(100))
+    assert "a" in cache
+    assert "b" not in cache
+    assert "c" in cache
+    assert cache.stats().evictions == 1
+    assert cache.stats().size <= 250
+
+
+def test_stash_cache_skips_oversized_entries():
+    cache = StashCache(max_bytes=50)
+    cache.put("a", make_encoded(100))
+    assert "a" not in cache
+    assert cache.stats().size == 0
+
+
+def test_stash_cache_replaces_entry():
+    cache = StashCache(max_bytes=1024)
+    cache.put("a", make_encoded(100))
+    cache.put("a", make_encoded(10))
+    assert cache.stats().entries == 1
+    assert cache.stats().size == len(make_encoded(10))
+    cache.clear()
+    assert cache.stats().entries == 0
+
+
+def test_stash_cache_pop():
+    cache = StashCache(max_bytes=1024)
+    encoded = make_encoded(10)
+    cache.put("a", encoded)
+    assert cache.pop("a") is encoded
+    assert cache.pop("a") is None
+    assert cache.stats() == CacheStats(hits=1, misses=1, entries=0, size=0)
+
+
+def test_retrieve_is_served_from_cache(s3_setup: S3Client, monkeypatch: MonkeyPatch):
+    config = Config(backends=["s3"], cache_max_bytes=1024)
+    stash = create("x", "data", namespace="app", config=config)
+    assert retrieve(stash.address, config=config) == stash
+    monkeypatch.setattr(S3Backend, "load_stash", fail)
+    assert retrieve(stash.address, config=config) == stash
+    assert retrieve(str(stash.address), config=config) == stash
+    cache = get_backend_pool(config).cache
+    assert cache is not None
+    assert cache.stats().hits == 2
+    assert cache.stats().misses == 1
+
+
+def test_cache_hits_do_not_share_decoded_data(s3_setup: S3Client):
+    config = Config(backends=["s3"], cache_max_bytes=1024)
+    stash = create("x", {"k": ["a"]}, namespace="app", config=config)
+    first = retrieve(stash.address, config=config)
+    first.data["k"].append("MUT")  # type: ignore
+    second = retrieve(stash.address, config=config)
+    assert second is not first
+    assert second.data == {"k": ["a"]}
+
+
+@pytest.mark.parametrize("cache_max_bytes", [0, 1024])
+def test_retrieve_bypasses_cache_for_inline(cache_max_bytes: int):
+    config = Config(backends=["inline"], cache_max_bytes=cache_max_bytes)
+    stash = create("x", "data", config=config)
+    assert retrieve(stash.address, config=config) == stash
+    cache = get_backend_pool(config).cache
+    assert cache is None or cache.stats() == CacheStats()
+
+
+def fail(*args: object, **kwargs: object) -> None:
+    raise AssertionError("unexpected call")
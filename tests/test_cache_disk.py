@@ -0,0 +1,118 @@
+import os
+import time
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from kstash.api import create, retrieve
+from kstash.backend import get_backend_pool
+from kstash.backend_s3 import S3Address, S3Backend
+from kstash.cache_disk import DiskCacheStats, DiskStashCache
+from kstash.config import Config
+from pytest import MonkeyPatch
+from types_boto3_s3 import S3Client
+
+ADDRESS = S3Address.from_string("s3://app/x.28a5e15a666b0cd1415490dcf6674255")
+
+
+def make_address(index: int) -> S3Address:
+    return S3Address.from_string(f"s3://app/x{index}.28a5e15a666b0cd1415490dcf6674255")
+
+
+def test_disk_cache_put_and_get(tmp_path: Path):
+    cache = DiskStashCache(directory=str(tmp_path), max_bytes=1024)
+    assert cache.get(ADDRESS) is None
+    cache.put(ADDRESS, b"payload")
+    encoded = cache.get(ADDRESS)
+    assert encoded is not None
+    assert bytes(encoded) == b"payload"
+    assert cache.stats() == DiskCacheStats(hits=1, misses=1, evictions=0)
+
+
+def test_disk_cache_entries_are_content_addressed_files(tmp_path: Path):
+    cache = DiskStashCache(directory=str(tmp_path), max_bytes=1024)
+    cache.put(ADDRESS, b"payload")
+    cache.put(ADDRESS, b"ignored")  # same address, same content
+    assert Path(cache.path(ADDRESS)).read_bytes() == b"payload"
+    assert Path(cache.path(ADDRESS)).name == ADDRESS.path.strip("/")
+    assert not [p for p in tmp_path.rglob("*") if p.name.startswith(".tmp-")]
+
+
+def test_disk_cache_evicts_least_recently_used(tmp_path: Path):
+    cache = DiskStashCache(directory=str(tmp_path), max_bytes=250)
+    for index in range(2):
+        cache.put(make_address(index), b"x" * 100)
+        old = time.time() - 100 + index
+        os.utime(cache.path(make_address(index)), (old, old))
+    cache.get(make_address(0))
+    cache.put(make_address(2), b"x" * 100)
+    assert cache.get(make_address(0)) is not None
+    assert cache.get(make_address(1)) is None
+    assert cache.get(make_address(2)) is not None
+    assert cache.stats().evictions == 1
+
+
+def test_disk_cache_scans_only_when_over_capacity(
+    tmp_path: Path, monkeypatch: MonkeyPatch
+):
+    cache = DiskStashCache(directory=str(tmp_path), max_bytes=1000)
+    walk = os.walk
+    scans: list[str] = []
+
+    def counting_walk(top: str) -> Iterator[tuple[str, list[str], list[str]]]:
+        scans.append(top)
+        return walk(top)
+
+    monkeypatch.setattr(os, "walk", counting_walk)
+    for index in range(9):
+        cache.put(make_address(index), b"x" * 100)
+    assert len(scans) == 1  # sizes the cache on first put
+    cache.put(make_address(9), b"x" * 200)
+    assert len(scans) == 2
+    assert cache.stats().evictions == 2  # down to 90% of capacity
+
+
+def test_disk_cache_shards_entries(tmp_path: Path):
+    cache = DiskStashCache(directory=str(tmp_path), max_bytes=100 * 1024)
+    for index in range(64):
+        cache.put(make_address(index), b"x")
+    shards = {Path(cache.path(make_address(index))).parent for index in range(64)}
+    assert len(shards) > 1
+
+
+def test_disk_cache_skips_oversized_entries(tmp_path: Path):
+    cache = DiskStashCache(directory=str(tmp_path), max_bytes=10)
+    cache.put(ADDRESS, b"x" * 100)
+    assert cache.get(ADDRESS) is None
+
+
+def test_disk_cache_concurrent_writers(tmp_path: Path):
+    cache = DiskStashCache(directory=str(tmp_path), max_bytes=1024 * 1024)
+    payload = os.urandom(64 * 1024)
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(lambda _: cache.put(ADDRESS, payload), range(32)))
+    encoded = cache.get(ADDRESS)
+    assert encoded is not None and bytes(encoded) == payload
+
+
+def test_retrieve_is_served_from_disk_cache(
+    tmp_path: Path, s3_setup: S3Client, monkeypatch: MonkeyPatch
+):
+    # Two configs stand for two worker processes sharing the cache directory.
+    config1 = Config(backends=["s3"], disk_cache_dir=str(tmp_path))
+    config2 = Config(backends=["s3"], disk_cache_dir=str(tmp_path))
+    stash = create("x", {"bin": b"0" * 1024}, namespace="app", config=config1)
+    assert retrieve(stash.address, config=config1) == stash
+
+    monkeypatch.setattr(S3Backend, "load_stash", fail)
+    loaded = retrieve(str(stash.address), config=config2)
+    assert loaded == stash
+    assert loaded.data == {"bin": b"0" * 1024}
+    assert loaded.backend.name == "s3"
+    disk_cache = get_backend_pool(config2).disk_cache
+    assert disk_cache is not None
+    assert disk_cache.stats().hits == 1
+
+
+def fail(*args: object, **kwargs: object) -> None:
+    raise AssertionError("unexpected call")
@@ -0,0 +1,153 @@
+import dataclasses
+import itertools
+import os
+import random
+
+import msgpack
+import pytest
+from pytest import MonkeyPatch
+from types_boto3_s3 import S3Client
+
+import kstash
+from kstash.backend_s3 import S3Backend
+from kstash.chunking import CHUNK_KEY_PREFIX, chunk_boundaries
+from kstash.config import Config
+from kstash.exceptions import StashNotFound, UnsupportedOperation
+
+SIZES = (1024, 4096, 16384)
+CHUNKED_CONFIG = Config(
+    backends=["s3"],
+    s3_chunking=True,
+    s3_chunking_threshold=32 * 1024,
+    s3_chunk_min_size=1024,
+    s3_chunk_avg_size=4096,
+    s3_chunk_max_size=16384,
+)
+
+
+def chunks_of(data: bytes) -> list[bytes]:
+    bounds = chunk_boundaries(data, *SIZES)
+    return [data[a:b] for a, b in itertools.pairwise([0, *bounds])]
+
+
+def test_chunk_boundaries_cover_data_within_bounds():
+    data = random.Random(0).randbytes(1024 * 1024)
+    bounds = chunk_boundaries(data, *SIZES)
+    assert bounds[-1] == len(data)
+    sizes = [b - a for a, b in itertools.pairwise([0, *bounds])]
+    assert all(1024 <= size <= 16384 for size in sizes[:-1])
+    assert 2048 < len(data) / len(sizes) < 8192
+    assert chunk_boundaries(data, *SIZES) == bounds
+
+
+def test_chunk_boundaries_resync_after_edits():
+    data = random.Random(0).randbytes(1024 * 1024)
+    edited = data[:500_000] + b"edit" + data[500_000:]
+    before, after = chunks_of(data), chunks_of(edited)
+    assert len(set(after) - set(before)) <= 2
+
+
+@pytest.mark.parametrize(
+    "data, expected",
+    [
+        pytest.param(b"", [], id="empty"),
+        pytest.param(b"x" * 100, [100], id="below-min"),
+        pytest.param(bytes(40000), [16384, 32768, 40000], id="no-cut-points"),
+    ],
+)
+def test_chunk_boundaries_edge_cases(data: bytes, expected: list[int]):
+    assert chunk_boundaries(data, *SIZES) == expected
+
+
+def test_chunk_boundaries_resync_on_structured_data():
+    # Repetitive records still vary enough for the hash to find cut points.
+    rows = [{"id": i, "color": "red", "size": i % 7} for i in range(8000)]
+    data = msgpack.packb(rows)
+    edited = data[:1000] + b"abc" + data[1000:]
+    before, after = chunks_of(data), chunks_of(edited)
+    assert len(data) / len(before) < 8192
+    assert len(set(after) - set(before)) <= 2
+
+
+def test_chunk_boundaries_accept_any_buffer():
+    data = random.Random(0).randbytes(64 * 1024)
+    bounds = chunk_boundaries(data, *SIZES)
+    assert chunk_boundaries(bytearray(data), *SIZES) == bounds
+    assert chunk_boundaries(memoryview(data)[1024:], *SIZES)[-3:] == [
+        bound - 1024 for bound in bounds[-3:]
+    ]
+
+
+def count_puts(backend: S3Backend, monkeypatch: MonkeyPatch) -> list[str]:
+    put_object = backend.s3_client.put_object
+    keys: list[str] = []
+
+    def spy_put_object(**kwargs: object) -> object:
+        keys.append(str(kwargs["Key"]))
+        return put_object(**kwargs)  # type: ignore
+
+    monkeypatch.setattr(backend.s3_client, "put_object", spy_put_object)
+    return keys
+
+
+def test_s3_chunked_stash(s3_setup: S3Client, monkeypatch: MonkeyPatch):
+    payload = os.urandom(256 * 1024)
+    backend = kstash.create("x", b"", namespace="app", config=CHUNKED_CONFIG).backend
+    puts = count_puts(backend, monkeypatch)  # type: ignore
+
+    stash = kstash.create("x", payload, namespace="app", config=CHUNKED_CONFIG)
+    assert kstash.retrieve(stash.address, config=CHUNKED_CONFIG).data == payload
+    with kstash.open(stash.address, config=CHUNKED_CONFIG) as reader:
+        assert reader.read() == payload
+    assert sum(key.startswith(CHUNK_KEY_PREFIX) for key in puts) > 10
+    assert puts[-1] == stash.address.path
+
+    # Unchanged chunks of a new version are not uploaded again.
+    puts.clear()
+    edited = payload[:100_000] + b"edit" + payload[100_000:]
+    stash = kstash.create("x", edited, namespace="app", config=CHUNKED_CONFIG)
+    assert kstash.retrieve(stash.address, config=CHUNKED_CONFIG).data == edited
+    assert 1 <= sum(key.startswith(CHUNK_KEY_PREFIX) for key in puts) <= 3
+
+
+def test_s3_chunked_stash_compressed(s3_setup: S3Client):
+    config = dataclasses.replace(CHUNKED_CONFIG, codec="zlib")
+    payload = b"compressible " * 10000
+    stash = kstash.create("x", payload, namespace="app", config=config)
+    assert kstash.retrieve(stash.address, config=config).data == payload
+    assert kstash.retrieve(stash.address, config=CHUNKED_CONFIG).data == payload
+
+
+def test_s3_chunked_stash_below_threshold(s3_setup: S3Client):
+    stash = kstash.create("x", b"x" * 1000, namespace="app", config=CHUNKED_CONFIG)
+    assert s3_setup.list_objects_v2(Bucket="app")["KeyCount"] == 1
+    assert kstash.retrieve(stash.address, config=Config()).data == b"x" * 1000
+
+
+def test_s3_chunked_stash_missing_chunk(s3_setup: S3Client):
+    payload = os.urandom(64 * 1024)
+    stash = kstash.create("x", payload, namespace="app", config=CHUNKED_CONFIG)
+    chunk = next(
+        item["Key"]
+        for item in s3_setup.list_objects_v2(Bucket="app")["Contents"]
+        if item["Key"].startswith(CHUNK_KEY_PREFIX)
+    )
+    s3_setup.delete_object(Bucket="app", Key=chunk)
+    with pytest.raises(StashNotFound):
+        kstash.retrieve(stash.address, config=CHUNKED_CONFIG)
+
+
+def test_s3_chunked_stash_cannot_be_shared(s3_setup: S3Client):
+    config = dataclasses.replace(CHUNKED_CONFIG, backends=["s3", "https"])
+    stash = kstash.create("x", os.urandom(64 * 1024), namespace="app", config=config)
+    with pytest.raises(UnsupportedOperation):
+        stash.share()
+
+    # Links made without the chunking config reach the manifest, and are rejected.
+    unchunked = Config(backends=["s3", "https"])
+    loaded = kstash.retrieve(stash.address, config=unchunked)
+    link = loaded.share()
+    with pytest.raises(UnsupportedOperation):
+        kstash.retrieve(link, config=unchunked)
+    with pytest.raises(UnsupportedOperation):
+        kstash.open(link, config=unchunked)
@@ -0,0 +1,143 @@
+import base64
+import zlib
+
+import pytest
+from kstash.api import create, retrieve
+from kstash.codec import (
+    CODEC_METADATA_KEY,
+    CODEC_REGISTRY,
+    Codec,
+    compress,
+    decompress,
+    get_decompressor,
+    register_codec,
+)
+from kstash.exceptions import UnsupportedOperation
+from kstash.config import Config
+from pytest import MonkeyPatch
+from types_boto3_s3 import S3Client
+
+PAYLOAD = {"rows": [{"color": "red", "size": index} for index in range(200)]}
+
+
+@pytest.mark.parametrize("codec", ["zlib", "lzma"])
+def test_compress_roundtrip(codec: str):
+    config = Config(codec=codec, codec_min_len=10)
+    encoded = b"abc" * 1000
+    applied, payload = compress(config, encoded)
+    assert applied == codec
+    assert len(payload) < len(encoded)
+    assert decompress(applied, payload) == encoded
+
+
+def test_compress_skips_small_payloads():
+    config = Config(codec="zlib", codec_min_len=1024)
+    assert compress(config, b"a" * 1023) == (None, b"a" * 1023)
+
+
+def test_compress_skips_incompressible_payloads():
+    config = Config(codec="zlib", codec_min_len=0)
+    assert compress(config, b"\x01") == (None, b"\x01")
+
+
+def test_compress_disabled_by_default():
+    assert compress(Config(), b"abc" * 1000) == (None, b"abc" * 1000)
+
+
+def test_register_codec_duplicate_should_raise():
+    with pytest.raises(ValueError, match="'zlib' is already registered"):
+        register_codec(Codec(name="zlib", compress=bytes, decompress=bytes))
+
+
+def test_decompress_unknown_codec_should_raise():
+    with pytest.raises(ValueError, match="unknown codec: unknown"):
+        decompress("unknown", b"")
+
+
+@pytest.mark.parametrize("codec", ["zlib", "lzma"])
+def test_get_decompressor(codec: str):
+    decompressor = get_decompressor(codec)
+    assert decompressor is not None
+    assert decompressor.decompress(CODEC_REGISTRY[codec].compress(b"abc")) == b"abc"
+
+
+def test_get_decompressor_without_streaming_support_should_raise():
+    register_codec(Codec(name="nostream", compress=bytes, decompress=bytes))
+    with pytest.raises(UnsupportedOperation):
+        get_decompressor("nostream")
+
+
+@pytest.mark.parametrize("codec", ["zlib", "lzma"])
+def test_s3_stash_roundtrip_with_codec(codec: str, s3_setup: S3Client):
+    config = Config(backends=["s3", "https"], codec=codec)
+    stash = create("rows", PAYLOAD, namespace="app", config=config)
+    key = stash.address.path.strip("/")
+    stored = s3_setup.get_object(Bucket="app", Key=key)
+    assert stored["Metadata"] == {CODEC_METADATA_KEY: codec}
+    assert stored["ContentLength"] < len(stash.encoded)
+
+    loaded = retrieve(stash.address, config=config)
+    assert loaded.data == PAYLOAD
+    assert loaded.encoded == stash.encoded
+
+    shared = retrieve(stash.share(), config=config)
+    assert shared.data == PAYLOAD
+
+
+def test_s3_stash_stored_uncompressed_loads_with_codec(s3_setup: S3Client):
+    stash = create("rows", PAYLOAD, namespace="app", config=Config(backends=["s3"]))
+    config = Config(backends=["s3"], codec="zlib")
+    assert retrieve(stash.address, config=config).data == PAYLOAD
+
+
+def count_compressions(monkeypatch: MonkeyPatch) -> list[int]:
+    sizes: list[int] = []
+
+    def compress(data: bytes) -> bytes:
+        sizes.append(len(data))
+        return zlib.compress(data)
+
+    codec = Codec("zlib", compress, zlib.decompress, zlib.decompressobj)
+    monkeypatch.setitem(CODEC_REGISTRY, "zlib", codec)
+    return sizes
+
+
+def test_create_compresses_once_across_backends(
+    s3_setup: S3Client, monkeypatch: MonkeyPatch
+):
+    sizes = count_compressions(monkeypatch)
+    config = Config(backends=["inline", "s3"], codec="zlib", codec_min_len=0)
+    stash = create("x", bytes(range(256)) * 2, namespace="app", config=config)
+    assert stash.backend.name == "s3"
+    assert sizes == [len(stash.encoded)]
+
+
+def test_inline_skips_compressing_payloads_too_large(monkeypatch: MonkeyPatch):
+    sizes = count_compressions(monkeypatch)
+    config = Config(backends=["inline", "mem"], codec="zlib", codec_min_len=0)
+    assert create("rows", PAYLOAD, config=config).backend.name == "mem"
+    assert sizes == []
+
+
+def test_inline_stash_roundtrip_with_codec():
+    data = "red " * 40
+    assert (
+        create("x", data, config=Config(backends=["inline", "mem"])).backend.name
+        == "mem"
+    )
+
+    config = Config(backends=["inline", "mem"], codec="zlib", codec_min_len=0)
+    stash = create("x", data, config=config)
+    assert stash.backend.name == "inline"
+    assert ("codec", "zlib") in stash.address.extra
+    loaded = retrieve(stash.address, config=config)
+    assert loaded.data == data
+    assert loaded.encoded == stash.encoded
+
+
+def test_inline_codec_payload_is_zlib():
+    config = Config(backends=["inline"], codec="zlib", codec_min_len=0)
+    stash = create("x", "red " * 40, config=config)
+    params = dict(stash.address.extra)
+    assert params["codec"] == "zlib"
+    assert zlib.decompress(base64.b64decode(params["data"])) == stash.encoded
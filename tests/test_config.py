@@ -1,5 +1,5 @@
 import pytest
-from kstash.config import Config
+from kstash.config import Config, ReadPolicy, Route
 
 
 def test_default_config():
@@ -43,3 +43,246 @@ def test_invalid_inline_backend_position():
         ValueError, match="invalid config \\(backends\\): inline must come first"
     ):
         Config(backends=["s3", "inline", "custom"])
+
+
+def test_invalid_batch_max_workers():
+    with pytest.raises(
+        ValueError,
+        match="invalid config \\(batch_max_workers\\): must be greater than 0",
+    ):
+        Config(batch_max_workers=0)
+
+
+def test_invalid_async_max_concurrency():
+    with pytest.raises(
+        ValueError,
+        match="invalid config \\(async_max_concurrency\\): must be greater than 0",
+    ):
+        Config(async_max_concurrency=0)
+
+
+def test_invalid_cache_max_bytes():
+    with pytest.raises(
+        ValueError, match="invalid config \\(cache_max_bytes\\): must not be negative"
+    ):
+        Config(cache_max_bytes=-1)
+
+
+def test_invalid_disk_cache_max_bytes():
+    with pytest.raises(
+        ValueError,
+        match="invalid config \\(disk_cache_max_bytes\\): must be greater than 0",
+    ):
+        Config(disk_cache_max_bytes=0)
+
+
+def test_invalid_codec():
+    with pytest.raises(
+        ValueError, match="invalid config \\(codec\\): 'unknown' is not registered"
+    ):
+        Config(codec="unknown")
+
+
+def test_invalid_codec_min_len():
+    with pytest.raises(
+        ValueError, match="invalid config \\(codec_min_len\\): must not be negative"
+    ):
+        Config(codec_min_len=-1)
+
+
+def test_invalid_multipart_settings():
+    with pytest.raises(
+        ValueError,
+        match="invalid config \\(multipart_chunk_size\\): must be at least 5 MiB",
+    ):
+        Config(multipart_chunk_size=1024)
+
+    with pytest.raises(
+        ValueError,
+        match="invalid config \\(multipart_threshold\\): below multipart_chunk_size",
+    ):
+        Config(
+            multipart_threshold=5 * 1024 * 1024, multipart_chunk_size=6 * 1024 * 1024
+        )
+
+    with pytest.raises(
+        ValueError,
+        match="invalid config \\(multipart_max_workers\\): must be greater than 0",
+    ):
+        Config(multipart_max_workers=0)
+
+
+def test_invalid_s3_download_settings():
+    with pytest.raises(
+        ValueError,
+        match="invalid config \\(s3_download_part_size\\): must be greater than 0",
+    ):
+        Config(s3_download_part_size=0)
+
+    with pytest.raises(
+        ValueError,
+        match="invalid config \\(s3_download_max_workers\\): must be greater than 0",
+    ):
+        Config(s3_download_max_workers=0)
+
+
+def test_invalid_hash_algorithm():
+    with pytest.raises(
+        ValueError,
+        match="invalid config \\(hash_algorithm\\): 'crc32' is not available",
+    ):
+        Config(hash_algorithm="crc32")
+
+
+def test_invalid_http_settings():
+    with pytest.raises(
+        ValueError,
+        match="invalid config \\(http_pool_maxsize\\): must be greater than 0",
+    ):
+        Config(http_pool_maxsize=0)
+
+    with pytest.raises(
+        ValueError,
+        match="invalid config \\(http_connect_timeout_sec\\): must be greater than 0",
+    ):
+        Config(http_connect_timeout_sec=0)
+
+    with pytest.raises(
+        ValueError,
+        match="invalid config \\(http_read_timeout_sec\\): must be greater than 0",
+    ):
+        Config(http_read_timeout_sec=0)
+
+    with pytest.raises(
+        ValueError, match="invalid config \\(http_max_retries\\): must not be negative"
+    ):
+        Config(http_max_retries=-1)
+
+    with pytest.raises(
+        ValueError,
+        match="invalid config \\(http_backoff_factor\\): must not be negative",
+    ):
+        Config(http_backoff_factor=-1)
+
+
+def test_invalid_routes():
+    with pytest.raises(
+        ValueError, match="invalid config \\(routes\\): 'mem' is not in backends"
+    ):
+        Config(backends=["s3"], routes=[Route("mem")])
+
+    with pytest.raises(
+        ValueError,
+        match="invalid config \\(routes\\): only the last route may be unbounded",
+    ):
+        Config(backends=["mem", "s3"], routes=[Route("mem"), Route("s3")])
+
+    with pytest.raises(
+        ValueError,
+        match="invalid config \\(routes\\): max_len must be strictly increasing",
+    ):
+        Config(
+            backends=["mem", "s3"],
+            routes=[Route("mem", max_len=100), Route("s3", max_len=100)],
+        )
+
+    with pytest.raises(
+        ValueError,
+        match="invalid config \\(routes\\): inline max_len must be at most 6",
+    ):
+        Config(
+            backends=["inline", "mem"],
+            routes=[Route("inline", max_len=7), Route("mem")],
+            max_inline_len=10,
+        )
+
+    with pytest.raises(ValueError, match="inline max_len must be at most 75"):
+        Config(backends=["inline"], routes=[Route("inline")])
+
+    Config(
+        backends=["inline", "mem"],
+        routes=[Route("inline", max_len=75), Route("mem")],
+    )
+
+
+def test_invalid_mem_settings():
+    with pytest.raises(
+        ValueError, match="invalid config \\(mem_max_bytes\\): must be greater than 0"
+    ):
+        Config(mem_max_bytes=0)
+
+    with pytest.raises(
+        ValueError, match="invalid config \\(mem_ttl_sec\\): must be greater than 0"
+    ):
+        Config(mem_ttl_sec=0)
+
+
+def test_invalid_file_root():
+    with pytest.raises(
+        ValueError,
+        match="invalid config \\(file_root\\): required by the file backend",
+    ):
+        Config(backends=["file"])
+
+
+@pytest.mark.parametrize(
+    "policy, message",
+    [
+        pytest.param(
+            ReadPolicy(max_retries=-1), "max_retries is negative", id="retries"
+        ),
+        pytest.param(
+            ReadPolicy(backoff_sec=2, max_backoff_sec=1),
+            "backoff_sec must be within 0 and max_backoff_sec",
+            id="backoff",
+        ),
+        pytest.param(
+            ReadPolicy(hedge_percentile=100),
+            "hedge_percentile must be within 0 and 100",
+            id="percentile",
+        ),
+        pytest.param(
+            ReadPolicy(latency_window=0),
+            "latency_window must be greater than 0",
+            id="window",
+        ),
+    ],
+)
+def test_invalid_s3_read_policy(policy: ReadPolicy, message: str):
+    with pytest.raises(
+        ValueError, match=f"invalid config \\(s3_read_policy\\): {message}"
+    ):
+        Config(s3_read_policy=policy)
+
+
+@pytest.mark.parametrize(
+    "field",
+    ["s3_write_behind_max_workers", "s3_write_behind_max_bytes"],
+)
+def test_invalid_s3_write_behind(field: str):
+    with pytest.raises(ValueError, match=f"invalid config \\({field}\\)"):
+        Config(**{field: 0})  # type: ignore
+
+
+@pytest.mark.parametrize("field", ["prefetch_max_inflight", "prefetch_max_bytes"])
+def test_invalid_prefetch(field: str):
+    with pytest.raises(ValueError, match=f"invalid config \\({field}\\)"):
+        Config(**{field: 0})  # type: ignore
+
+
+@pytest.mark.parametrize(
+    "sizes, field",
+    [
+        pytest.param((0, 2, 3), "s3_chunk_min_size", id="min"),
+        pytest.param((2, 2, 3), "s3_chunk_avg_size", id="avg-min"),
+        pytest.param((1, 3, 3), "s3_chunk_avg_size", id="avg-max"),
+    ],
+)
+def test_invalid_s3_chunk_sizes(sizes: tuple[int, int, int], field: str):
+    min_size, avg_size, max_size = sizes
+    with pytest.raises(ValueError, match=f"invalid config \\({field}\\)"):
+        Config(
+            s3_chunk_min_size=min_size,
+            s3_chunk_avg_size=avg_size,
+            s3_chunk_max_size=max_size,
+        )
@@ -0,0 +1,36 @@
+import hashlib
+
+import pytest
+from kstash.digest import (
+    HASH_ALGORITHMS,
+    digest_algorithm,
+    hash_digest,
+    parse_digest_path,
+)
+
+
+def test_md5_digest_is_untagged():
+    assert hash_digest("md5", b"data") == hashlib.md5(b"data").hexdigest()
+    assert digest_algorithm(hashlib.md5(b"data").hexdigest()) == "md5"
+
+
+@pytest.mark.parametrize("algorithm", sorted(set(HASH_ALGORITHMS) - {"md5"}))
+def test_digest_is_tagged(algorithm: str):
+    digest = hash_digest(algorithm, b"data")
+    assert digest.startswith(f"{algorithm}-")
+    assert digest_algorithm(digest) == algorithm
+    assert parse_digest_path(f"/x.{digest}") == ("x", digest)
+
+
+def test_unknown_hash_algorithm():
+    with pytest.raises(ValueError, match="unknown hash algorithm: crc32"):
+        hash_digest("crc32", b"data")
+
+
+@pytest.mark.parametrize(
+    "path",
+    ["/x", "/x.1234", "/x.crc32-0123abcd", "/x.blake2b-XYZ"],
+)
+def test_parse_invalid_digest_path(path: str):
+    with pytest.raises(ValueError, match="invalid address path"):
+        parse_digest_path(path)
@@ -0,0 +1,154 @@
+import threading
+import time
+
+import pytest
+from botocore.exceptions import ClientError
+from pytest import MonkeyPatch
+from types_boto3_s3 import S3Client
+
+from kstash.api import create, retrieve
+from kstash.backend_s3 import S3Backend, _is_retryable
+from kstash.config import Config, ReadPolicy
+from kstash.exceptions import BackendRemoteError, StashNotFound
+from kstash.hedge import HedgedReader, ReadStats
+
+
+class TransientError(Exception):
+    pass
+
+
+def is_transient(error: Exception) -> bool:
+    return isinstance(error, TransientError)
+
+
+def failing(times: int, result: str = "ok"):
+    calls: list[int] = []
+
+    def fn() -> str:
+        calls.append(1)
+        if len(calls) <= times:
+            raise TransientError()
+        return result
+
+    return fn, calls
+
+
+def test_reader_retries_transient_errors():
+    reader = HedgedReader(ReadPolicy(max_retries=3, backoff_sec=0), is_transient)
+    fn, calls = failing(2)
+    assert reader.read(fn, discard=print) == "ok"
+    assert len(calls) == 3
+    assert reader.stats() == ReadStats(reads=1, retries=2)
+
+
+def test_reader_gives_up_after_max_retries():
+    reader = HedgedReader(ReadPolicy(max_retries=2, backoff_sec=0), is_transient)
+    fn, calls = failing(5)
+    with pytest.raises(TransientError):
+        reader.read(fn, discard=print)
+    assert len(calls) == 3
+
+
+def test_reader_does_not_retry_other_errors():
+    reader = HedgedReader(ReadPolicy(max_retries=2, backoff_sec=0), is_transient)
+
+    def fn() -> str:
+        raise ValueError()
+
+    with pytest.raises(ValueError):
+        reader.read(fn, discard=print)
+    assert reader.stats().retries == 0
+
+
+def test_reader_hedges_slow_reads():
+    policy = ReadPolicy(hedge_percentile=90, hedge_initial_delay_sec=0.01)
+    reader = HedgedReader(policy, is_transient)
+    calls: list[int] = []
+    discarded: list[str] = []
+    released = threading.Event()
+
+    def fn() -> str:
+        calls.append(1)
+        if len(calls) == 1:
+            released.wait(5)  # the first call stalls until the hedge wins
+            return "slow"
+        return "fast"
+
+    def discard(result: str) -> None:
+        discarded.append(result)
+
+    assert reader.read(fn, discard) == "fast"
+    released.set()
+    deadline = time.monotonic() + 5
+    while not discarded and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert discarded == ["slow"]
+    assert reader.stats() == ReadStats(reads=1, hedges=1, hedge_wins=1)
+
+
+def test_reader_skips_hedge_for_fast_reads():
+    policy = ReadPolicy(hedge_percentile=90, hedge_initial_delay_sec=1)
+    reader = HedgedReader(policy, is_transient)
+    assert reader.read(lambda: "ok", discard=print) == "ok"
+    assert reader.stats() == ReadStats(reads=1)
+
+
+def test_reader_adapts_hedge_delay_to_latencies():
+    policy = ReadPolicy(
+        hedge_percentile=50, hedge_initial_delay_sec=1, hedge_min_delay_sec=0
+    )
+    reader = HedgedReader(policy, is_transient)
+    for _ in range(50):
+        reader.read(lambda: "ok", discard=print)
+    assert reader.hedge_delay_sec < 0.1
+
+
+@pytest.mark.parametrize(
+    "code, status, retryable",
+    [
+        pytest.param("SlowDown", 503, True, id="throttling"),
+        pytest.param("InternalError", 500, True, id="internal"),
+        pytest.param("Whatever", 502, True, id="5xx"),
+        pytest.param("AccessDenied", 403, False, id="4xx"),
+    ],
+)
+def test_s3_retryable_errors(code: str, status: int, retryable: bool):
+    cause = ClientError(
+        {"Error": {"Code": code}, "ResponseMetadata": {"HTTPStatusCode": status}},  # type: ignore
+        "GetObject",
+    )
+    error = BackendRemoteError("s3")
+    error.__cause__ = cause
+    assert _is_retryable(error) is retryable
+    assert _is_retryable(StashNotFound("x")) is False
+
+
+def test_s3_backend_retries_reads(s3_setup: S3Client, monkeypatch: MonkeyPatch):
+    policy = ReadPolicy(max_retries=2, backoff_sec=0)
+    config = Config(backends=["s3"], s3_read_policy=policy)
+    stash = create("x", "data", namespace="app", config=config)
+
+    get_object_once = S3Backend._get_object_once  # type: ignore
+    calls: list[int] = []
+
+    def flaky(self: S3Backend, *args: object, **kwargs: object) -> object:
+        calls.append(1)
+        if len(calls) == 1:
+            error = BackendRemoteError(self.name)
+            error.__cause__ = ClientError(
+                {"Error": {"Code": "SlowDown"}},
+                "GetObject",  # type: ignore
+            )
+            raise error
+        return get_object_once(self, *args, **kwargs)
+
+    monkeypatch.setattr(S3Backend, "_get_object_once", flaky)
+    assert retrieve(stash.address, config=config).data == "data"
+    assert stash.backend.read_stats().retries == 1  # type: ignore
+
+
+def test_s3_backend_without_read_policy(s3_setup: S3Client):
+    config = Config(backends=["s3"])
+    stash = create("x", "data", namespace="app", config=config)
+    assert retrieve(stash.address, config=config).data == "data"
+    assert stash.backend.read_stats() == ReadStats()  # type: ignore
@@ -0,0 +1,110 @@
+import pytest
+from kstash import api, backend_base, stash
+from kstash.api import create, retrieve
+from kstash.config import Config
+from kstash.observe import Event, Histogram, HistogramCollector
+from pytest import MonkeyPatch
+from types_boto3_s3 import S3Client
+
+
+class Recorder(list[Event]):
+    def __call__(self, event: Event) -> None:
+        self.append(event)
+
+    def phases(self) -> list[tuple[str, str | None]]:
+        return [(event.phase, event.backend) for event in self]
+
+
+def test_create_and_retrieve_events():
+    recorder = Recorder()
+    config = Config(backends=["inline", "mem"], observers=[recorder])
+    created = create("x", "c" * 200, config=config)
+    assert recorder.phases() == [
+        ("encode", None),
+        ("hash", None),
+        ("backend.skip", "inline"),
+        ("backend.save", "mem"),
+    ]
+    assert recorder[0].nbytes == len(created.encoded)
+    assert recorder[-1].nbytes == len(created.encoded)
+    assert all(event.duration_sec >= 0 for event in recorder)
+
+    recorder.clear()
+    loaded = retrieve(created.address, config=config)
+    assert loaded.data == "c" * 200
+    assert recorder.phases() == [("backend.load", "mem"), ("decode", "mem")]
+
+
+def test_create_encodes_once_across_backends(s3_setup: S3Client):
+    recorder = Recorder()
+    config = Config(backends=["inline", "s3"], observers=[recorder])
+    create("x", b"x" * 100_000, namespace="app", config=config)
+    phases = [phase for phase, _ in recorder.phases()]
+    assert phases.count("encode") == 1
+    assert phases.count("hash") == 1
+
+
+def test_network_and_cache_events(s3_setup: S3Client):
+    recorder = Recorder()
+    config = Config(backends=["s3"], cache_max_bytes=1024, observers=[recorder])
+    created = create("x", "data", namespace="app", config=config)
+    assert ("network", "s3") in recorder.phases()
+
+    recorder.clear()
+    retrieve(created.address, config=config)
+    retrieve(created.address, config=config)
+    assert recorder.phases() == [
+        ("cache.miss", "s3"),
+        ("network", "s3"),
+        ("backend.load", "s3"),
+        ("cache.hit", "s3"),
+    ]
+    assert recorder[-1].nbytes == len(created.encoded)
+
+
+def test_no_events_without_observers(monkeypatch: MonkeyPatch):
+    for module in (api, backend_base, stash):
+        monkeypatch.setattr(module, "notify", fail)
+    config = Config(backends=["inline", "mem"], cache_max_bytes=1024)
+    created = create("x", "c" * 200, config=config)
+    assert retrieve(created.address, config=config).data == "c" * 200
+
+
+def test_histogram_collector():
+    collector = HistogramCollector(bounds_sec=(0.001, 0.01, 0.1))
+    for duration in (0.0005, 0.005, 0.005, 0.05, 1.0):
+        collector(
+            Event(phase="network", duration_sec=duration, nbytes=10, backend="s3")
+        )
+    collector(Event(phase="encode", duration_sec=0.0001))
+
+    histogram = collector.get("network", "s3")
+    assert isinstance(histogram, Histogram)
+    assert histogram.count == 5
+    assert histogram.nbytes == 50
+    assert histogram.counts == (1, 2, 1, 1)
+    assert histogram.min_sec == 0.0005
+    assert histogram.max_sec == 1.0
+    assert histogram.total_sec == pytest.approx(1.0605)
+    assert histogram.percentile(50) == 0.01
+    assert histogram.percentile(100) == 1.0
+    assert collector.get("network") is None
+    assert set(collector.snapshot()) == {("network", "s3"), ("encode", None)}
+
+    collector.clear()
+    assert collector.snapshot() == {}
+
+
+def test_histogram_collector_as_observer():
+    collector = HistogramCollector()
+    config = Config(backends=["mem"], observers=[collector])
+    for i in range(10):
+        create(f"x{i}", "data", config=config)
+    histogram = collector.get("backend.save", "mem")
+    assert histogram is not None
+    assert histogram.count == 10
+    assert 0 < histogram.percentile(99) <= histogram.max_sec
+
+
+def fail(*args: object, **kwargs: object) -> None:
+    raise AssertionError("unexpected call")
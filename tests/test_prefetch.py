@@ -0,0 +1,214 @@
+import threading
+import time
+from collections.abc import Callable
+
+import pytest
+from pytest import MonkeyPatch
+from types_boto3_s3 import S3Client
+
+import kstash
+from kstash.address import Address
+from kstash.backend import get_backend_pool
+from kstash.backend_s3 import S3Backend
+from kstash.config import Config
+from kstash.exceptions import StashNotFound
+from kstash.observe import Event
+from kstash.prefetch import SingleFlight
+from kstash.stash import Buffer, SealedStash, Stash
+
+
+def make_encoded(name: str) -> bytes:
+    return Stash(name=name, data=name).encoded
+
+
+def wait_until(condition: Callable[[], bool], timeout_sec: float = 5) -> None:
+    deadline = time.monotonic() + timeout_sec
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.001)
+
+
+def count_loads(monkeypatch: MonkeyPatch, released: threading.Event | None = None):
+    load_stash = S3Backend.load_stash
+    calls: list[str] = []
+
+    def counted(self: S3Backend, address: Address | str) -> SealedStash:
+        calls.append(str(address))
+        if released is not None:
+            released.wait(5)
+        return load_stash(self, address)
+
+    monkeypatch.setattr(S3Backend, "load_stash", counted)
+    return calls
+
+
+def test_single_flight_coalesces_concurrent_loads():
+    flights = SingleFlight()
+    released = threading.Event()
+    calls: list[int] = []
+    encoded = make_encoded("a")
+
+    def load() -> bytes:
+        calls.append(1)
+        released.wait(5)
+        return encoded
+
+    results: list[Buffer] = []
+    threads = [
+        threading.Thread(target=lambda: results.append(flights.run("a", load)))
+        for _ in range(4)
+    ]
+    threads[0].start()
+    wait_until(lambda: "a" in flights)
+    for thread in threads[1:]:
+        thread.start()
+    threading.Timer(0.05, released.set).start()
+    for thread in threads:
+        thread.join()
+    assert calls == [1]
+    assert results == [encoded] * 4
+    assert "a" not in flights
+
+
+def test_single_flight_shares_errors():
+    flights = SingleFlight()
+
+    def load() -> bytes:
+        raise StashNotFound("a")
+
+    with pytest.raises(StashNotFound):
+        flights.run("a", load)
+    assert "a" not in flights
+    assert flights.run("a", lambda: make_encoded("a")) == make_encoded("a")
+
+
+def test_prefetch_serves_retrieve(s3_setup: S3Client, monkeypatch: MonkeyPatch):
+    config = Config(backends=["s3"])
+    stash = kstash.create("x", "data", namespace="app", config=config)
+    calls = count_loads(monkeypatch)
+    pool = get_backend_pool(config)
+
+    kstash.prefetch([stash.address], config=config)
+    wait_until(lambda: str(stash.address) not in pool.flights)
+    assert kstash.retrieve(stash.address, config=config).data == "data"
+    assert len(calls) == 1
+
+    # Prefetched stashes are held until their first retrieve only.
+    kstash.retrieve(stash.address, config=config)
+    assert len(calls) == 2
+
+
+def test_retrieve_waits_for_prefetch_in_flight(
+    s3_setup: S3Client, monkeypatch: MonkeyPatch
+):
+    config = Config(backends=["s3"])
+    stash = kstash.create("x", "data", namespace="app", config=config)
+    released = threading.Event()
+    calls = count_loads(monkeypatch, released)
+
+    pool = get_backend_pool(config)
+    kstash.prefetch([stash.address, stash.address], config=config)
+    wait_until(lambda: str(stash.address) in pool.flights)
+    threading.Timer(0.05, released.set).start()
+    assert kstash.retrieve(stash.address, config=config).data == "data"
+    assert len(calls) == 1
+    # The joined load was handed over to the retrieve, not held.
+    wait_until(lambda: str(stash.address) not in pool.flights)
+    assert pool.prefetcher.store.stats().entries == 0
+
+
+def test_retrieve_takes_over_queued_prefetch(
+    s3_setup: S3Client, monkeypatch: MonkeyPatch
+):
+    config = Config(backends=["s3"], prefetch_max_inflight=1)
+    blocked = kstash.create("a", "a", namespace="app", config=config)
+    queued = kstash.create("b", "b", namespace="app", config=config)
+    released = threading.Event()
+    load_stash = S3Backend.load_stash
+    calls: list[str] = []
+
+    def load(self: S3Backend, address: Address | str) -> SealedStash:
+        calls.append(str(address))
+        if str(address) == str(blocked.address):
+            released.wait(5)
+        return load_stash(self, address)
+
+    monkeypatch.setattr(S3Backend, "load_stash", load)
+    pool = get_backend_pool(config)
+    kstash.prefetch([blocked.address, queued.address], config=config)
+    wait_until(lambda: str(blocked.address) in pool.flights)
+
+    # Not held up behind the load of the other address.
+    assert kstash.retrieve(queued.address, config=config).data == "b"
+    assert str(blocked.address) in pool.flights
+    released.set()
+    wait_until(lambda: str(blocked.address) not in pool.flights)
+    pool.prefetcher.submit("sentinel", lambda: b"")  # runs after the queue
+    wait_until(lambda: "sentinel" in pool.prefetcher.store)
+    assert calls.count(str(queued.address)) == 1
+
+
+def test_concurrent_retrieves_share_one_load(
+    s3_setup: S3Client, monkeypatch: MonkeyPatch
+):
+    config = Config(backends=["s3"])
+    stash = kstash.create("x", "data", namespace="app", config=config)
+    released = threading.Event()
+    calls = count_loads(monkeypatch, released)
+
+    threading.Timer(0.05, released.set).start()
+    results = kstash.retrieve_many([stash.address] * 8, config=config)
+    assert [r.data for r in results] == ["data"] * 8  # type: ignore
+    assert len({id(r) for r in results}) == 8  # each gets a stash of its own
+    assert len(calls) == 1
+
+
+def test_prefetch_errors_surface_on_retrieve(s3_setup: S3Client):
+    config = Config(backends=["s3"])
+    address = "s3://app/x.00000000000000000000000000000000"
+    kstash.prefetch([address], config=config)
+    with pytest.raises(StashNotFound):
+        kstash.retrieve(address, config=config)
+
+
+def test_prefetch_skips_unloadable_addresses(s3_setup: S3Client):
+    config = Config(backends=["s3"])
+    stash = kstash.create("x", "data", namespace="app", config=config)
+    addresses = ["mem://app/x", "nope://app/x", "s3://app/x", stash.address]
+    kstash.prefetch(addresses, config=config)
+    pool = get_backend_pool(config)
+    wait_until(lambda: str(stash.address) not in pool.flights)
+    assert pool.prefetcher.store.stats().entries == 1
+
+
+def test_prefetch_skips_local_backends():
+    config = Config(backends=["inline"])
+    stash = kstash.create("x", "data", config=config)
+    kstash.prefetch([stash.address], config=config)
+    assert get_backend_pool(config).prefetcher.store.stats().entries == 0
+
+
+def test_prefetch_is_bounded_by_max_bytes(s3_setup: S3Client, monkeypatch: MonkeyPatch):
+    config = Config(backends=["s3"], prefetch_max_bytes=8)
+    stash = kstash.create("x", "data" * 10, namespace="app", config=config)
+    calls = count_loads(monkeypatch)
+    pool = get_backend_pool(config)
+
+    kstash.prefetch([stash.address], config=config)
+    wait_until(lambda: str(stash.address) not in pool.flights)
+    assert pool.prefetcher.store.stats().entries == 0
+    kstash.retrieve(stash.address, config=config)
+    assert len(calls) == 2
+
+
+def test_prefetch_hit_event(s3_setup: S3Client):
+    events: list[Event] = []
+    config = Config(backends=["s3"], observers=[events.append])
+    stash = kstash.create("x", "data", namespace="app", config=config)
+    pool = get_backend_pool(config)
+
+    kstash.prefetch([stash.address], config=config)
+    wait_until(lambda: str(stash.address) not in pool.flights)
+    events.clear()
+    kstash.retrieve(stash.address, config=config)
+    assert [e.phase for e in events] == ["prefetch.hit"]
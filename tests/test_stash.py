@@ -1,6 +1,10 @@
+import msgpack
 import pytest
+from kstash.backend_inline import InlineBackend
+from kstash import stash as stash_module
 from kstash.backend_mem import MemBackend
 from kstash.stash import Stash
+from pytest import MonkeyPatch
 
 
 @pytest.mark.parametrize(
@@ -51,3 +55,93 @@ def test_stash_sealed_repr():
     stash = Stash(name="x", namespace="app", data="data").seal(backend=MemBackend())
     expected = "Stash(name=x, namespace=app, address=mem://app/x.266f01c5105567ba27fece1c0383227f)"
     assert repr(stash) == expected
+
+
+def test_stash_from_encoded():
+    original = Stash(name="x", namespace="app", data={"color": "red"})
+    stash = Stash.from_encoded(original.encoded, name="x", namespace="app")
+    assert stash == original
+    assert not stash.is_decoded
+    assert stash.data == {"color": "red"}
+    assert stash.is_decoded
+    assert stash.encoded is original.encoded
+    assert stash.digest == original.digest
+
+
+def test_stash_seal_does_not_encode_or_hash_again(monkeypatch: MonkeyPatch):
+    stash = Stash(name="x", namespace="app", data="data")
+    monkeypatch.setattr(msgpack, "packb", fail)
+    monkeypatch.setattr(stash_module, "hash_digest", fail)
+    sealed = stash.seal(backend=MemBackend())
+    assert sealed.encoded is stash.encoded
+    assert sealed.digest == stash.digest
+    assert sealed.data == "data"
+
+
+def test_stash_load_does_not_encode_again(monkeypatch: MonkeyPatch):
+    backend = InlineBackend()
+    stash = backend.save_stash("x", "data", namespace="app")
+    monkeypatch.setattr(msgpack, "packb", fail)
+    loaded = backend.load_stash(stash.address)
+    assert loaded == stash
+    assert loaded.data == "data"
+
+
+def test_stash_from_encoded_decodes_data_once(monkeypatch: MonkeyPatch):
+    calls: list[object] = []
+    unpackb = msgpack.unpackb
+    monkeypatch.setattr(
+        msgpack, "unpackb", lambda raw: calls.append(raw) or unpackb(raw)
+    )
+    encoded = msgpack.packb([1, 2, 3])
+    stash = Stash.from_encoded(encoded, name="x").seal(backend=MemBackend())
+    assert calls == []
+    assert stash.data == [1, 2, 3]
+    assert stash.data == [1, 2, 3]
+    assert calls == [encoded]
+
+
+def test_stash_load_keeps_data_encoded_until_accessed():
+    backend = InlineBackend()
+    stash = backend.save_stash("x", {"color": "red"}, namespace="app")
+    loaded = backend.load_stash(stash.address)
+    assert not loaded.is_decoded
+    assert loaded.encoded == stash.encoded
+    assert str(loaded.address) == str(stash.address)
+    assert loaded.data == {"color": "red"}
+
+
+def test_stash_missing_attribute_should_raise():
+    stash = Stash.from_encoded(msgpack.packb(1), name="x")
+    with pytest.raises(AttributeError):
+        stash.unknown  # type: ignore
+
+
+def fail(*args: object, **kwargs: object) -> None:
+    raise AssertionError("unexpected call")
+
+
+def test_stash_digest_algorithm():
+    stash = Stash(name="x", data="data", hash_algorithm="blake2b")
+    assert stash.digest.startswith("blake2b-")
+    assert len(stash.digest) == len("blake2b-") + 32
+    assert stash != Stash(name="x", data="data")
+    assert Stash(name="x", data="data").md5 == Stash(name="x", data="data").digest
+
+
+def test_stash_splits_large_binary_payloads(monkeypatch: MonkeyPatch):
+    monkeypatch.setattr(stash_module, "MAX_BIN_LEN", 100)
+    payload = bytes(range(250))
+    stash = Stash(name="x", data=payload)
+    assert msgpack.unpackb(stash.encoded) == [
+        stash_module.LARGE_BIN_MARKER,
+        payload[:100],
+        payload[100:200],
+        payload[200:],
+    ]
+    assert Stash.from_encoded(stash.encoded, name="x").data == payload
+    # Lists of bytes are not mistaken for split payloads.
+    parts = [payload[:100], payload[100:]]
+    assert (
+        Stash.from_encoded(Stash(name="x", data=parts).encoded, name="x").data == parts
+    )
@@ -0,0 +1,146 @@
+import io
+import os
+import zlib
+
+import msgpack
+import pytest
+from kstash import stash as stash_module
+from kstash import stream as stream_module
+from kstash.stash import Stash
+from kstash.stream import (
+    ChunkReader,
+    EncodedStream,
+    bin_header,
+    is_stream,
+    open_payload,
+    read_stream,
+)
+from pytest import MonkeyPatch
+
+
+@pytest.mark.parametrize("size", [0, 255, 256, 65535, 65536])
+def test_bin_header_matches_msgpack(size: int):
+    payload = b"x" * size
+    assert bin_header(size) + payload == msgpack.packb(payload)
+
+
+def test_bin_header_too_large_should_raise():
+    with pytest.raises(ValueError, match="too large"):
+        bin_header(2**32)
+
+
+@pytest.mark.parametrize(
+    "data, expected",
+    [
+        pytest.param(io.BytesIO(b"abc"), True, id="file"),
+        pytest.param(iter([b"abc"]), True, id="iterator"),
+        pytest.param(b"abc", False, id="bytes"),
+        pytest.param([b"abc"], False, id="list"),
+        pytest.param({"a": 1}, False, id="dict"),
+    ],
+)
+def test_is_stream(data: object, expected: bool):
+    assert is_stream(data) == expected
+
+
+def test_read_stream():
+    assert read_stream(io.BytesIO(b"abc")) == b"abc"
+    assert read_stream(iter([b"a", b"bc"])) == b"abc"
+
+
+@pytest.mark.parametrize(
+    "make_stream",
+    [
+        pytest.param(lambda payload: io.BytesIO(payload), id="seekable"),
+        pytest.param(
+            lambda payload: io.BufferedReader(NonSeekable(payload)), id="pipe"
+        ),
+        pytest.param(
+            lambda payload: iter([payload[:100], payload[100:]]), id="iterator"
+        ),
+    ],
+)
+def test_encoded_stream_matches_msgpack(make_stream):  # type: ignore
+    payload = bytes(range(256)) * 4
+    expected = msgpack.packb(payload)
+    with EncodedStream.open(make_stream(payload), chunk_size=64) as encoded:  # type: ignore
+        assert encoded.size == len(expected)
+        assert encoded.digest == Stash(name="x", data=payload).digest
+        assert encoded.read(0, encoded.size) == expected
+        assert encoded.read(1, 2) == expected[1:3]
+        assert encoded.read(2, 100) == expected[2:102]
+        assert encoded.read(500, 1000) == expected[500:1500]
+
+
+@pytest.mark.parametrize("size", [250, 1700])
+def test_encoded_stream_splits_large_payloads(size: int, monkeypatch: MonkeyPatch):
+    monkeypatch.setattr(stash_module, "MAX_BIN_LEN", 100)
+    monkeypatch.setattr(stream_module, "MAX_BIN_LEN", 100)
+    payload = os.urandom(size)
+    expected = Stash(name="x", data=payload)
+    with EncodedStream.open(io.BytesIO(payload), chunk_size=64) as encoded:
+        assert encoded.size == len(expected.encoded)
+        assert encoded.digest == expected.digest
+        assert encoded.read(0, encoded.size) == expected.encoded
+        for start in range(0, encoded.size, 37):
+            assert encoded.read(start, 51) == expected.encoded[start : start + 51]
+    reader = open_payload(io.BufferedReader(io.BytesIO(expected.encoded)))
+    assert reader.read() == payload
+
+
+def test_encoded_stream_starts_at_current_position():
+    file = io.BytesIO(b"skip" + b"payload")
+    file.seek(4)
+    with EncodedStream.open(file, chunk_size=64) as encoded:
+        assert encoded.read(0, encoded.size) == msgpack.packb(b"payload")
+
+
+def test_chunk_reader_decompresses():
+    payload = os.urandom(1000) * 50
+    compressed = io.BytesIO(zlib.compress(payload))
+    reader = io.BufferedReader(ChunkReader(compressed.read, zlib.decompressobj()))
+    assert reader.read() == payload
+
+
+def test_chunk_reader_closes_source():
+    closed: list[bool] = []
+    reader = ChunkReader(io.BytesIO(b"abc").read, close=lambda: closed.append(True))
+    reader.close()
+    reader.close()
+    assert closed == [True]
+
+
+@pytest.mark.parametrize("size", [0, 10, 300, 70000])
+def test_open_payload(size: int):
+    payload = os.urandom(size)
+    reader = open_payload(io.BufferedReader(io.BytesIO(msgpack.packb(payload))))
+    assert b"".join(iter(lambda: reader.read(1000), b"")) == payload
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        pytest.param({"a": 1}, id="dict"),
+        pytest.param([b"a", b"b"], id="list"),
+    ],
+)
+def test_open_payload_not_binary_should_raise(data: object):
+    with pytest.raises(ValueError, match="not binary"):
+        open_payload(io.BytesIO(msgpack.packb(data)))
+
+
+def test_open_payload_truncated_should_raise():
+    reader = open_payload(io.BytesIO(msgpack.packb(b"abc")[:-1]))
+    with pytest.raises(ValueError, match="truncated"):
+        reader.read()
+
+
+class NonSeekable(io.RawIOBase):
+    def __init__(self, payload: bytes):
+        self._file = io.BytesIO(payload)
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:  # type: ignore
+        return self._file.readinto(buffer)  # type: ignore
@@ -0,0 +1,196 @@
+import threading
+
+import pytest
+from botocore.exceptions import ClientError
+from pytest import MonkeyPatch
+from types_boto3_s3 import S3Client
+
+import kstash
+from kstash.backend_s3 import S3Backend
+from kstash.config import Config
+from kstash.exceptions import BackendRemoteError
+from kstash.stash import Stash
+from kstash.write_behind import PendingPayloads, WriteBehindQueue
+
+
+def blocked_upload(released: threading.Event, done: list[str], key: str):
+    def upload() -> None:
+        released.wait(5)
+        done.append(key)
+
+    return upload
+
+
+def test_queue_serves_pending_payloads():
+    queue = WriteBehindQueue(max_workers=2, max_bytes=1024)
+    released = threading.Event()
+    done: list[str] = []
+    queue.submit("a", b"payload", blocked_upload(released, done, "a"))
+    assert queue.get("a") == b"payload"
+    assert len(queue) == 1
+
+    released.set()
+    queue.flush()
+    assert done == ["a"]
+    assert queue.get("a") is None
+    assert len(queue) == 0
+
+
+def test_queues_share_pending_payloads():
+    registry = PendingPayloads()
+    queues = [WriteBehindQueue(1, 1024, registry=registry) for _ in range(2)]
+    released = threading.Event()
+    done: list[str] = []
+    for queue in queues:
+        queue.submit("a", b"payload", blocked_upload(released, done, "a"))
+    assert registry.get("a") == b"payload"
+
+    released.set()
+    queues[0].flush()
+    queues[1].flush()
+    assert done == ["a", "a"]
+    assert registry.get("a") is None
+
+
+def test_queue_skips_pending_keys():
+    queue = WriteBehindQueue(max_workers=2, max_bytes=1024)
+    released = threading.Event()
+    done: list[str] = []
+    queue.submit("a", b"payload", blocked_upload(released, done, "a"))
+    queue.submit("a", b"payload", blocked_upload(released, done, "a"))
+    released.set()
+    queue.flush()
+    assert done == ["a"]
+
+
+def test_queue_blocks_submit_while_full():
+    queue = WriteBehindQueue(max_workers=2, max_bytes=10)
+    released = threading.Event()
+    done: list[str] = []
+    queue.submit("a", b"x" * 8, blocked_upload(released, done, "a"))
+
+    submitted = threading.Event()
+
+    def submit_b() -> None:
+        queue.submit("b", b"x" * 8, blocked_upload(released, done, "b"))
+        submitted.set()
+
+    thread = threading.Thread(target=submit_b)
+    thread.start()
+    assert not submitted.wait(0.1)
+    released.set()
+    assert submitted.wait(5)
+    thread.join()
+    queue.flush()
+    assert done == ["a", "b"]
+
+
+def test_queue_accepts_oversized_payloads_when_empty():
+    queue = WriteBehindQueue(max_workers=1, max_bytes=1)
+    queue.submit("a", b"payload", lambda: None)
+    queue.flush()
+
+
+def test_queue_raises_errors_on_flush():
+    queue = WriteBehindQueue(max_workers=1, max_bytes=1024)
+
+    def upload() -> None:
+        raise BackendRemoteError("s3")
+
+    queue.submit("a", b"payload", upload)
+    with pytest.raises(BackendRemoteError):
+        queue.flush()
+    queue.flush()  # errors are reported once
+
+
+def test_queue_flush_timeout():
+    queue = WriteBehindQueue(max_workers=1, max_bytes=1024)
+    released = threading.Event()
+    queue.submit("a", b"payload", blocked_upload(released, [], "a"))
+    with pytest.raises(TimeoutError):
+        queue.flush(timeout_sec=0.01)
+    released.set()
+    queue.flush()
+
+
+def test_s3_write_behind_reads_own_writes(s3_setup: S3Client, monkeypatch: MonkeyPatch):
+    config = Config(backends=["s3"], s3_write_behind=True)
+    released = threading.Event()
+    upload = S3Backend._upload  # type: ignore
+
+    def slow_upload(self: S3Backend, stash: Stash) -> None:
+        released.wait(5)
+        upload(self, stash)
+
+    monkeypatch.setattr(S3Backend, "_upload", slow_upload)
+    stash = kstash.create("x", b"payload", namespace="app", config=config)
+    assert s3_setup.list_objects_v2(Bucket="app").get("KeyCount") == 0
+
+    assert kstash.retrieve(stash.address, config=config).data == b"payload"
+    with kstash.open(stash.address, config=config) as reader:
+        assert reader.read() == b"payload"
+
+    released.set()
+    kstash.flush(config)
+    assert s3_setup.list_objects_v2(Bucket="app").get("KeyCount") == 1
+    assert kstash.retrieve(stash.address, config=config).data == b"payload"
+
+
+def test_s3_write_behind_reads_own_writes_through_other_configs(
+    s3_setup: S3Client, monkeypatch: MonkeyPatch
+):
+    config = Config(backends=["s3"], s3_write_behind=True)
+    released = threading.Event()
+    upload = S3Backend._upload  # type: ignore
+
+    def slow_upload(self: S3Backend, stash: Stash) -> None:
+        released.wait(5)
+        upload(self, stash)
+
+    monkeypatch.setattr(S3Backend, "_upload", slow_upload)
+    stash = kstash.create("x", b"payload", namespace="app", config=config)
+    assert kstash.retrieve(stash.address).data == b"payload"
+    assert kstash.retrieve(stash.address, config=Config()).data == b"payload"
+
+    released.set()
+    kstash.flush(config)
+    assert s3_setup.list_objects_v2(Bucket="app").get("KeyCount") == 1
+
+
+def test_s3_write_behind_flushing(s3_setup: S3Client):
+    config = Config(backends=["s3"], s3_write_behind=True)
+    with kstash.flushing(config):
+        stashes = [
+            kstash.create(f"x{i}", i, namespace="app", config=config) for i in range(5)
+        ]
+    assert s3_setup.list_objects_v2(Bucket="app").get("KeyCount") == 5
+    assert [kstash.retrieve(s.address, config=config).data for s in stashes] == [
+        0,
+        1,
+        2,
+        3,
+        4,
+    ]
+
+
+def test_s3_write_behind_upload_error(s3_setup: S3Client, monkeypatch: MonkeyPatch):
+    config = Config(backends=["s3"], s3_write_behind=True)
+    backend = S3Backend(config=config)
+    monkeypatch.setattr(backend.s3_client, "put_object", mock_put_object)
+    backend.save_stash("x", "data", namespace="app")
+    with pytest.raises(BackendRemoteError):
+        backend.flush()
+
+
+def test_flush_without_write_behind(s3_setup: S3Client):
+    config = Config(backends=["inline", "s3"])
+    kstash.create("x", "data" * 100, namespace="app", config=config)
+    kstash.flush(config)
+    assert s3_setup.list_objects_v2(Bucket="app").get("KeyCount") == 1
+
+
+def mock_put_object(*args: object, **kwargs: object) -> None:
+    raise ClientError(
+        error_response={"Error": {"Code": "InternalError", "Message": "Mocked"}},
+        operation_name="PutObject",
+    )
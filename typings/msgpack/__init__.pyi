@@ -1,4 +1,9 @@
-from typing import Any
+from collections.abc import Buffer
+from typing import Any, NamedTuple
+
+class ExtType(NamedTuple):
+    code: int
+    data: bytes
 
 def packb(
     obj: Any,
@@ -11,7 +16,7 @@ def packb(
     use_float: bool = False,
 ) -> bytes: ...
 def unpackb(
-    data: bytes,
+    data: Buffer,
     *,
     raw: bool = False,
 ) -> Any: ...